@@ -1,6 +1,181 @@
 # Analytics/AggregatedCashflows.py
 
+import numpy as np
 import pandas as pd
+from Analytics.Instrumentation import track
+
+
+class CashflowAggregator:
+    """
+    One-pass daily and monthly aggregation of cashflows by instrument_type.
+
+    Cashflows are fed in chunks (``add``) and accumulated with ``np.bincount``
+    into preallocated (instrument type x day) arrays of interest, principal
+    and row counts. The arrays span the calendar range seen so far, growing a
+    year at a time, so memory depends on the number of days and types rather
+    than on the number of cashflows. Daily and monthly totals are both read
+    from the same accumulators.
+
+    Parameters:
+        chunk_rows (int): Rows per chunk when splitting a cashflow table or
+            dictionary into a stream.
+    """
+
+    GROWTH_DAYS = 366
+
+    def __init__(self, chunk_rows=1_000_000):
+        self.chunk_rows = chunk_rows
+        self.types = []
+        self._type_codes = {}
+        self._origin = None
+        self._interest = np.zeros((0, 0))
+        self._principal = np.zeros((0, 0))
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+
+    def _codes(self, instrument_types):
+        labels, inverse = np.unique(np.asarray(instrument_types, dtype=object).astype(str), return_inverse=True)
+        for label in labels:
+            if label not in self._type_codes:
+                self._type_codes[label] = len(self.types)
+                self.types.append(label)
+        return np.array([self._type_codes[label] for label in labels], dtype=np.int64)[inverse.ravel()]
+
+    def _reserve(self, first_day, last_day):
+        """
+        Grow the accumulators to cover days first_day..last_day and every type.
+        """
+        if self._origin is None:
+            self._origin = first_day
+        span = self._interest.shape[1]
+        start = min(self._origin, first_day - (first_day < self._origin) * self.GROWTH_DAYS)
+        stop = max(self._origin + span, last_day + 1 + (last_day >= self._origin + span) * self.GROWTH_DAYS)
+        shape = (len(self.types), stop - start)
+        if shape == self._interest.shape:
+            return
+
+        offset = self._origin - start
+        for name in ("_interest", "_principal", "_counts"):
+            old = getattr(self, name)
+            new = np.zeros(shape, dtype=old.dtype)
+            new[:old.shape[0], offset:offset + old.shape[1]] = old
+            setattr(self, name, new)
+        self._origin = start
+
+    def copy(self):
+        clone = CashflowAggregator(self.chunk_rows)
+        clone.types = list(self.types)
+        clone._type_codes = dict(self._type_codes)
+        clone._origin = self._origin
+        clone._interest = self._interest.copy()
+        clone._principal = self._principal.copy()
+        clone._counts = self._counts.copy()
+        return clone
+
+    def add(self, payment_dates, instrument_types, interest, principal, sign=1):
+        """
+        Accumulate one chunk of cashflows. Rows without a payment date are
+        ignored; missing amounts count as zero. ``sign=-1`` removes cashflows
+        added earlier, for incremental updates.
+        """
+        days = np.asarray(payment_dates, dtype="datetime64[D]")
+        valid = ~np.isnat(days)
+        if not valid.any():
+            return
+
+        days = days[valid].astype(np.int64)
+        codes = self._codes(np.asarray(instrument_types, dtype=object)[valid])
+        self._reserve(int(days.min()), int(days.max()))
+
+        shape = self._interest.shape
+        cells = codes * shape[1] + (days - self._origin)
+        for name, values in (("_interest", interest), ("_principal", principal)):
+            weights = np.nan_to_num(np.broadcast_to(np.asarray(values, dtype=float), valid.shape)[valid])
+            getattr(self, name)[...] += sign * np.bincount(cells, weights, minlength=self._interest.size).reshape(shape)
+        self._counts += sign * np.bincount(cells, minlength=self._counts.size).reshape(shape)
+
+    def add_cashflow_table(self, table, instrument_types, sign=1):
+        """
+        Stream a long-format cashflow table (see ``BatchCashflowEngine``).
+
+        Parameters:
+            instrument_types (array): Type of each instrument, indexed by the
+                table's instrument_index.
+        """
+        instrument_types = np.asarray(instrument_types, dtype=object)
+        with track("aggregate_cashflows", rows=len(table), sign=sign):
+            for start in range(0, len(table), self.chunk_rows):
+                chunk = table.iloc[start:start + self.chunk_rows]
+                self.add(chunk["payment_date"].to_numpy(), instrument_types[chunk["instrument_index"].to_numpy()],
+                         chunk["interest"].to_numpy(), chunk["principal"].to_numpy(), sign)
+        return self
+
+    def add_cashflows(self, cashflows_dict, instrument_map):
+        """
+        Stream a {ID: DataFrame} dictionary, batching frames into chunks of
+        about ``chunk_rows`` rows. Frames without interest or principal
+        columns (e.g. swap legs) contribute zero amounts on their dates.
+        """
+        batch, rows = [], 0
+        for ID, df in cashflows_dict.items():
+            batch.append((instrument_map.get(ID, "Unknown"), df))
+            rows += len(df)
+            if rows >= self.chunk_rows:
+                self._add_frames(batch)
+                batch, rows = [], 0
+        self._add_frames(batch)
+        return self
+
+    def _add_frames(self, batch):
+        if not batch:
+            return
+
+        def column(df, name):
+            return df[name].to_numpy(dtype=float) if name in df.columns else np.zeros(len(df))
+
+        self.add(
+            np.concatenate([pd.to_datetime(df["payment_date"]).to_numpy() for _, df in batch]),
+            np.repeat([instrument_type for instrument_type, _ in batch], [len(df) for _, df in batch]),
+            np.concatenate([column(df, "interest") for _, df in batch]),
+            np.concatenate([column(df, "principal") for _, df in batch]),
+        )
+
+    def _frame(self, date_column, dates, interest, principal, counts):
+        order = np.argsort(self.types)
+        day, type_code = np.nonzero(counts[order].T)
+        return pd.DataFrame({
+            date_column: dates[day].astype("datetime64[ns]"),
+            "instrument_type": np.asarray(self.types, dtype=object)[order][type_code],
+            "interest": interest[order].T[day, type_code],
+            "principal": principal[order].T[day, type_code],
+        })
+
+    def daily(self):
+        """
+        Returns:
+            DataFrame: payment_date, instrument_type, interest, principal,
+            sorted by date then type.
+        """
+        span = self._interest.shape[1]
+        origin = 0 if self._origin is None else self._origin
+        dates = np.datetime64(origin, "D") + np.arange(span)
+        return self._frame("payment_date", dates, self._interest, self._principal, self._counts)
+
+    def monthly(self):
+        """
+        Returns:
+            DataFrame: Month (first day), instrument_type, interest, principal.
+        """
+        span = self._interest.shape[1]
+        if not span:
+            return self._frame("Month", np.empty(0, dtype="datetime64[D]"), self._interest,
+                               self._principal, self._counts)
+
+        months = (np.datetime64(self._origin, "D") + np.arange(span)).astype("datetime64[M]")
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        return self._frame("Month", months[starts].astype("datetime64[D]"),
+                           np.add.reduceat(self._interest, starts, axis=1),
+                           np.add.reduceat(self._principal, starts, axis=1),
+                           np.add.reduceat(self._counts, starts, axis=1))
 
 
 def aggregate_daily_cashflows_by_type(cashflows_dict, instrument_map):
@@ -14,18 +189,7 @@ def aggregate_daily_cashflows_by_type(cashflows_dict, instrument_map):
     Returns:
         DataFrame: Daily totals of interest, principal by instrument_type
     """
-    all_rows = []
-
-    for ID, df in cashflows_dict.items():
-        df = df.copy()
-        df['instrument_type'] = instrument_map.get(ID, "Unknown")
-        df['ID'] = ID
-        df['payment_date'] = pd.to_datetime(df['payment_date'])
-        all_rows.append(df)
-
-    combined_df = pd.concat(all_rows)
-    grouped = combined_df.groupby(['payment_date', 'instrument_type'])[['interest', 'principal']].sum().reset_index()
-    return grouped
+    return CashflowAggregator().add_cashflows(cashflows_dict, instrument_map).daily()
 
 
 def aggregate_monthly_cashflows_by_type(cashflows_dict, instrument_map):
@@ -39,16 +203,4 @@ def aggregate_monthly_cashflows_by_type(cashflows_dict, instrument_map):
     Returns:
         DataFrame: Monthly totals of interest, principal by instrument_type
     """
-    all_rows = []
-
-    for ID, df in cashflows_dict.items():
-        df = df.copy()
-        df['instrument_type'] = instrument_map.get(ID, "Unknown")
-        df['ID'] = ID
-        df['payment_date'] = pd.to_datetime(df['payment_date'])
-        df['Month'] = df['payment_date'].dt.to_period("M").dt.to_timestamp()
-        all_rows.append(df)
-
-    combined_df = pd.concat(all_rows)
-    grouped = combined_df.groupby(['Month', 'instrument_type'])[['interest', 'principal']].sum().reset_index()
-    return grouped
+    return CashflowAggregator().add_cashflows(cashflows_dict, instrument_map).monthly()
@@ -0,0 +1,313 @@
+# Analytics/BatchCashflowEngine.py
+
+from collections.abc import Mapping
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from Analytics.Instrumentation import track
+from Analytics.PortfolioTable import as_tables, portfolio_ids
+from Analytics.Prepayment import prepaid_mortgage_cashflows
+from Analytics.Schedules import batch_schedules, to_day_array
+from Analytics.SwapBookEngine import SWAP_TYPE, swap_cashflow_frame
+
+
+CASHFLOW_TABLE_COLUMNS = ["instrument_index", "payment_date", "interest", "principal"]
+
+
+def _year_month(dates):
+    """
+    Split a datetime64[D] array into integer calendar years and months (1-12).
+    """
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    return months // 12 + 1970, months % 12 + 1
+
+
+def _long_frame(owner, payment_dates, interest, principal):
+    return pd.DataFrame({
+        "instrument_index": owner,
+        "payment_date": payment_dates.astype("datetime64[ns]"),
+        "interest": interest,
+        "principal": principal,
+    })
+
+
+def bond_cashflows(notional, coupon_rate, issue_date, maturity_date, frequency):
+    """
+    Project bullet bond cashflows for a whole set of bonds at once.
+
+    Mirrors ``Bond.generate_cashflows``: a level coupon every ``12 / frequency``
+    months from issue and the notional repaid with the final coupon.
+
+    Returns:
+        DataFrame: long-format table with CASHFLOW_TABLE_COLUMNS, where
+        ``instrument_index`` is the position within the input arrays.
+    """
+    notional = np.asarray(notional, dtype=float)
+    coupon_rate = np.asarray(coupon_rate, dtype=float)
+    frequency = np.asarray(frequency, dtype=np.int64)
+    issue = to_day_array(issue_date)
+    maturity = to_day_array(maturity_date)
+
+    issue_year, issue_month = _year_month(issue)
+    maturity_year, maturity_month = _year_month(maturity)
+    periods = ((maturity_year - issue_year) * frequency
+               + (maturity_month - issue_month) / (12 / frequency)).astype(np.int64)
+
+    owner, step, payment_dates = batch_schedules(issue, frequency, periods)
+
+    interest = (notional * coupon_rate / frequency)[owner]
+    principal = np.where(step == periods[owner], notional[owner], 0.0)
+    return _long_frame(owner, payment_dates, interest, principal)
+
+
+def mortgage_cashflows(notional, coupon_rate, issue_date, term_months):
+    """
+    Project level-payment mortgage cashflows for a whole pool at once.
+
+    Uses the closed-form outstanding balance after k payments,
+    ``B_k = N (1+r)^k - PMT ((1+r)^k - 1) / r``, instead of stepping the
+    amortization loop of ``Mortgage.generate_cashflows`` one month at a time.
+    """
+    notional = np.asarray(notional, dtype=float)
+    monthly_rate = np.asarray(coupon_rate, dtype=float) / 12
+    term = np.asarray(term_months, dtype=np.int64)
+    issue = to_day_array(issue_date)
+
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    pmt = np.where(zero_rate, notional / term,
+                   notional * safe_rate / (1 - (1 + safe_rate) ** -term.astype(float)))
+
+    owner, step, payment_dates = batch_schedules(issue, 12, term)
+    rate = monthly_rate[owner]
+    growth = (1 + rate) ** (step - 1)
+    annuity = np.where(zero_rate[owner], step - 1, (growth - 1) / safe_rate[owner])
+    opening_balance = notional[owner] * growth - pmt[owner] * annuity
+
+    interest = opening_balance * rate
+    principal = pmt[owner] - interest
+    return _long_frame(owner, payment_dates, interest, principal)
+
+
+def demand_deposit_cashflows(notional, rate, issue_date, decay_term_months, frequency):
+    """
+    Project straight-line run-off cashflows for a set of demand deposits.
+
+    Mirrors ``DemandDeposit.generate_cashflows``: a payment every
+    ``12 / frequency`` months over the decay term.
+    """
+    notional = np.asarray(notional, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    decay = np.asarray(decay_term_months, dtype=np.int64)
+    frequency = np.asarray(frequency, dtype=np.int64)
+    period = 12 // frequency
+    issue = to_day_array(issue_date)
+
+    owner, step, payment_dates = batch_schedules(issue, 12 // period, decay // period)
+    months = step * period[owner]
+
+    remaining = notional[owner] * (1 - months / decay[owner])
+    interest = remaining * rate[owner] / frequency[owner]
+    principal = (notional / decay)[owner]
+    return _long_frame(owner, payment_dates, interest, principal)
+
+
+BATCH_GENERATORS = {
+    "Bond": lambda table: bond_cashflows(
+        table["notional"], table["coupon_rate"], table["issue_date"], table["maturity_date"],
+        table["frequency"]),
+    "Mortgage": lambda table: mortgage_cashflows(
+        table["notional"], table["coupon_rate"], table["issue_date"], table["term_months"]),
+    "DemandDeposit": lambda table: demand_deposit_cashflows(
+        table["notional"], table["rate"], table["issue_date"], table["decay_term_months"],
+        table["frequency"]),
+}
+
+# Types whose projection follows a prepayment model when one is given:
+# generator(table, model, market_rate), market_rate defaulting to yield_rate.
+PREPAYMENT_GENERATORS = {
+    "Mortgage": lambda table, model, market_rate=None: prepaid_mortgage_cashflows(
+        table["notional"], table["coupon_rate"], table["issue_date"], table["term_months"], model,
+        table["yield_rate"] if market_rate is None else market_rate),
+}
+
+# Types projected a table at a time off their curves:
+# generator(table, valuation_date). Their cashflows depend on the projection
+# date, so ``update_cashflow_table`` always projects them again.
+CURVE_GENERATORS = {SWAP_TYPE: swap_cashflow_frame}
+
+
+def _reference_frame(index, inst):
+    """
+    Fall back to the instrument's own (cached) cashflows and reshape the
+    result into table rows. Swaps contribute their net cashflow as interest.
+    """
+    df = inst.cached_cashflows()
+    interest = df["interest"] if "interest" in df.columns else df.get("net_cashflow", 0.0)
+    principal = df["principal"] if "principal" in df.columns else 0.0
+    return pd.DataFrame({
+        "instrument_index": index,
+        "payment_date": pd.to_datetime(df["payment_date"]).astype("datetime64[ns]"),
+        "interest": interest,
+        "principal": principal,
+    })
+
+
+def project_table(table, prepayment=None, valuation_date=None):
+    """
+    Project the cashflows of one PortfolioTable, with instrument_index set to
+    the table's positions (row numbers for a standalone table). With a
+    ``prepayment`` model (see ``Analytics.Prepayment``), types in
+    PREPAYMENT_GENERATORS are projected with behavioural prepayments; types
+    in CURVE_GENERATORS are projected from ``valuation_date`` (default today).
+    """
+    positions = np.arange(len(table)) if table.positions is None else table.positions
+    generator = BATCH_GENERATORS.get(table.instrument_type)
+    if prepayment is not None and table.instrument_type in PREPAYMENT_GENERATORS:
+        generator = partial(PREPAYMENT_GENERATORS[table.instrument_type], model=prepayment)
+    curve_generator = CURVE_GENERATORS.get(table.instrument_type)
+    with track("project_table", instrument_type=table.instrument_type, instruments=len(table),
+               batch=generator is not None or curve_generator is not None) as record:
+        if curve_generator is not None:
+            frame = curve_generator(table, valuation_date)
+        elif generator is None:
+            frames = [_reference_frame(positions[row], table.instrument(row)) for row in range(len(table))]
+            frame = pd.concat(frames, ignore_index=True) if frames else None
+        else:
+            frame = generator(table)
+            frame["instrument_index"] = positions[frame["instrument_index"].to_numpy()]
+        record["rows"] = 0 if frame is None else len(frame)
+    return frame
+
+
+def generate_cashflow_table(instruments, prepayment=None, valuation_date=None):
+    """
+    Project cashflows for a whole portfolio into one long-format table.
+
+    Each instrument type is projected in a single vectorized call from its
+    PortfolioTable columns (swaps off their forward curves, see
+    ``SwapBookEngine``); other types use their own ``cached_cashflows``.
+
+    Parameters:
+        instruments: Instrument objects or PortfolioTables (see ``as_tables``).
+        prepayment (PrepaymentModel): Optional behavioural prepayment model
+            for mortgages; without one they amortize on schedule.
+        valuation_date: Date swap floating legs are projected from
+            (default today).
+
+    Returns:
+        DataFrame: columns CASHFLOW_TABLE_COLUMNS, sorted by instrument_index,
+        where instrument_index is the position in the portfolio.
+    """
+    with track("cashflow_table") as record:
+        frames = [project_table(table, prepayment, valuation_date) for table in as_tables(instruments)]
+        frames = [frame for frame in frames if frame is not None]
+
+        if not frames:
+            table = _long_frame(np.empty(0, dtype=np.int64), np.empty(0, dtype="datetime64[D]"),
+                                np.empty(0), np.empty(0))
+        else:
+            table = pd.concat(frames, ignore_index=True)
+            table = table.sort_values("instrument_index", kind="stable", ignore_index=True)
+        record["rows"] = len(table)
+    return table
+
+
+def update_cashflow_table(previous_table, previous_keys, tables, keys, prepayment=None, valuation_date=None):
+    """
+    Project a portfolio's cashflows, reusing a previous projection for
+    every batch-projected instrument whose row key (``PortfolioTable.row_keys``)
+    is unchanged; only new or changed instruments, and types without a batch
+    generator, are projected again.
+
+    Parameters:
+        previous_table (DataFrame): Earlier long-format cashflow table.
+        previous_keys (array): Row key by position for ``previous_table``,
+            0 where the rows may not be reused.
+        tables (list): PortfolioTables with positions (see ``as_tables``).
+        keys (array): Row key by position for ``tables``.
+        prepayment (PrepaymentModel): Model the previous table was projected
+            with, applied to the instruments projected again.
+        valuation_date: Date swap floating legs are projected from
+            (default today).
+
+    Returns:
+        tuple: (table, previous_positions, positions) where the last two
+        pair the instruments whose rows were carried over.
+    """
+    with track("update_cashflow_table") as record:
+        table, previous_positions, positions = _update_cashflow_table(previous_table, previous_keys, tables, keys,
+                                                                      prepayment, valuation_date)
+        record.update(rows=len(table), reused_instruments=len(positions))
+    return table, previous_positions, positions
+
+
+def _update_cashflow_table(previous_table, previous_keys, tables, keys, prepayment, valuation_date):
+    reusable = np.zeros(len(keys), dtype=bool)
+    for table in tables:
+        if table.instrument_type in BATCH_GENERATORS:
+            reusable[table.positions] = True
+
+    candidates = np.flatnonzero(previous_keys != 0)
+    lookup = pd.Index(previous_keys[candidates])
+    first = ~lookup.duplicated()
+    hit = pd.Index(lookup[first]).get_indexer(keys)
+    hit[~reusable] = -1
+
+    positions = np.flatnonzero(hit >= 0)
+    previous_positions = candidates[first][hit[positions]]
+
+    bounds = np.searchsorted(previous_table["instrument_index"].to_numpy(), np.arange(len(previous_keys) + 1))
+    starts = bounds[previous_positions]
+    counts = bounds[previous_positions + 1] - starts
+    rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    carried = previous_table.iloc[rows].reset_index(drop=True)
+    carried["instrument_index"] = np.repeat(positions, counts)
+
+    fresh = [table.take(np.flatnonzero(hit[table.positions] < 0)) for table in tables]
+    frames = [carried] + [frame for frame in (project_table(table, prepayment, valuation_date) for table in fresh)
+                          if frame is not None]
+    table = pd.concat(frames, ignore_index=True).sort_values("instrument_index", kind="stable", ignore_index=True)
+    return table, previous_positions, positions
+
+
+class InstrumentCashflows(Mapping):
+    """
+    Read-only {ID: DataFrame} view of a long-format cashflow table. Each
+    instrument's frame is sliced from the table when it is looked up, so
+    building the view costs one ``searchsorted`` over the table instead of
+    a DataFrame per instrument. With duplicate IDs the last one wins, as in
+    a dict built row by row.
+    """
+
+    def __init__(self, table, ids):
+        self._frames = table[["payment_date", "interest", "principal"]]
+        self._bounds = np.searchsorted(table["instrument_index"].to_numpy(), np.arange(len(ids) + 1))
+        self._rows = dict(zip(ids, range(len(ids))))
+
+    def __getitem__(self, inst_id):
+        row = self._rows[inst_id]
+        return self._frames.iloc[self._bounds[row]:self._bounds[row + 1]].reset_index(drop=True)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the view's copy of the cashflow columns and its bounds.
+        """
+        return int(self._frames.memory_usage(index=True).sum()) + self._bounds.nbytes
+
+
+def split_cashflow_table(table, instruments):
+    """
+    Split a long-format cashflow table into the per-instrument
+    {ID: DataFrame} mapping used by the reporting functions (an
+    ``InstrumentCashflows`` view; frames are built on lookup).
+    """
+    return InstrumentCashflows(table, portfolio_ids(instruments))
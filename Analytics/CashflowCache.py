@@ -0,0 +1,20 @@
+# Analytics/CashflowCache.py
+
+from Analytics.LRUCache import LRUCache
+
+
+class CashflowCache(LRUCache):
+    """
+    Bounded LRU cache of projected cashflow DataFrames.
+
+    Entries are keyed on an instrument's contractual terms (see
+    ``BaseInstrument.cashflow_key``), so copies of an instrument that only
+    differ in yield share the same cashflows. Cached frames are shared between
+    callers and must not be modified in place.
+    """
+
+    def __init__(self, maxsize=10000):
+        super().__init__(maxsize=maxsize)
+
+
+cashflow_cache = CashflowCache()
@@ -1,9 +1,54 @@
-def generate_cashflows_for_portfolio(instruments):
+from Analytics.BatchCashflowEngine import BATCH_GENERATORS, generate_cashflow_table, split_cashflow_table
+from Analytics.CashflowCache import cashflow_cache
+from Analytics.PortfolioTable import is_table_portfolio
+
+
+def generate_cashflows_for_portfolio(instruments, vectorized=True, cashflow_table=None):
     """
     Generate a dictionary of DataFrames, each containing the cash flows of an instrument.
+
+    With a ``cashflow_table`` (the run's projection) every instrument's
+    cashflows are sliced from it, swaps projected from the run's valuation
+    date and reporting their net cashflow as interest. That table is not
+    cached: it may be a behavioural (prepayment) projection rather than the
+    contractual cashflows the cache keys describe.
+
+    Otherwise cashflows already in the shared cashflow cache are reused.
+    With ``vectorized=True`` the remaining instruments of every type that
+    has a batch generator are projected in one pass by the batch engine and
+    stored in the cache. ``vectorized=False`` calls each instrument's own
+    ``generate_cashflows`` and is kept as the uncached reference path.
+
+    PortfolioTables are always projected in one pass from their columns,
+    without going through per-instrument cache keys; swaps then report their
+    net cashflow as interest, as in the long-format table.
     """
+    if is_table_portfolio(instruments):
+        if cashflow_table is None:
+            cashflow_table = generate_cashflow_table(instruments)
+        return split_cashflow_table(cashflow_table, instruments)
+
+    if not vectorized:
+        return {inst.ID: inst.generate_cashflows() for inst in instruments}
+
+    if cashflow_table is not None:
+        # The table may follow a prepayment model, so it is only read, never
+        # stored under the contractual cache keys.
+        return split_cashflow_table(cashflow_table, instruments)
+
     cashflows = {}
+    misses = []
     for inst in instruments:
-        df = inst.generate_cashflows()
-        cashflows[inst.ID] = df
+        if type(inst).__name__ not in BATCH_GENERATORS:
+            cashflows[inst.ID] = inst.cached_cashflows()
+            continue
+        cached = cashflow_cache.get(inst.cashflow_key())
+        if cached is None:
+            misses.append(inst)
+        cashflows[inst.ID] = cached
+
+    generated = split_cashflow_table(generate_cashflow_table(misses), misses)
+    for inst in misses:
+        cashflow_cache.put(inst.cashflow_key(), generated[inst.ID])
+        cashflows[inst.ID] = generated[inst.ID]
     return cashflows
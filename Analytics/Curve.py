@@ -0,0 +1,116 @@
+# Analytics/Curve.py
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+GRID_STEPS_PER_YEAR = {"monthly": 12, "daily": 365}
+
+
+class Curve:
+    """
+    Immutable discount curve sampled on a regular monthly or daily grid.
+
+    Discount factors, continuously-compounded zero rates and one-step forward
+    rates are computed once at build time; every lookup is a clipped array
+    index into those grids, for a single point or a whole vector.
+
+    Lookups accept either grid offsets from the valuation date (months for a
+    monthly grid, days for a daily grid; fractional values round to the nearest
+    point) or dates.
+    """
+
+    __slots__ = ("valuation_date", "grid", "steps_per_year", "times",
+                 "discount_factors", "zero_rates", "forward_rates", "token")
+
+    def __init__(self, valuation_date, discount_factors, grid="monthly"):
+        if grid not in GRID_STEPS_PER_YEAR:
+            raise ValueError(f"Unknown grid '{grid}', expected one of {list(GRID_STEPS_PER_YEAR)}")
+
+        steps_per_year = GRID_STEPS_PER_YEAR[grid]
+        discount_factors = np.asarray(discount_factors, dtype=float)
+        times = np.arange(len(discount_factors)) / steps_per_year
+
+        zero_rates = np.empty_like(discount_factors)
+        zero_rates[1:] = -np.log(discount_factors[1:]) / times[1:]
+        zero_rates[0] = zero_rates[1] if len(zero_rates) > 1 else 0.0
+
+        forward_rates = np.empty_like(discount_factors)
+        forward_rates[:-1] = (discount_factors[:-1] / discount_factors[1:] - 1) * steps_per_year
+        forward_rates[-1] = forward_rates[-2] if len(forward_rates) > 1 else zero_rates[-1]
+
+        for array in (times, discount_factors, zero_rates, forward_rates):
+            array.setflags(write=False)
+
+        set_attr = super().__setattr__
+        set_attr("valuation_date", pd.Timestamp(valuation_date).normalize())
+        set_attr("grid", grid)
+        set_attr("steps_per_year", steps_per_year)
+        set_attr("times", times)
+        set_attr("discount_factors", discount_factors)
+        set_attr("zero_rates", zero_rates)
+        set_attr("forward_rates", forward_rates)
+        # A digest rather than ``hash`` so tokens (and the portfolio keys built
+        # from them) are the same in every process.
+        digest = hashlib.blake2b(f"{grid}|{self.valuation_date.isoformat()}|".encode() + discount_factors.tobytes(),
+                                 digest_size=8).digest()
+        set_attr("token", int.from_bytes(digest, "little"))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Curve is immutable")
+
+    def __reduce__(self):
+        # Rebuilt from its discount factors when sent to worker processes.
+        return Curve, (self.valuation_date, self.discount_factors, self.grid)
+
+    def __len__(self):
+        return len(self.discount_factors)
+
+    def __repr__(self):
+        return f"Curve({self.grid}, valuation_date={self.valuation_date.date()}, points={len(self)})"
+
+    def index(self, points):
+        """
+        Grid index for offsets or dates, clipped to the curve's range.
+        """
+        points = np.asarray(points)
+        if np.issubdtype(points.dtype, np.datetime64) or points.dtype == object:
+            dates = pd.to_datetime(points.ravel()).to_numpy().reshape(points.shape)
+            days = (dates - self.valuation_date.to_datetime64()) / np.timedelta64(1, "D")
+            points = days if self.grid == "daily" else days * 12 / 365.25
+        return np.clip(np.rint(points).astype(np.int64), 0, len(self) - 1)
+
+    def discount_factor(self, points):
+        return self.discount_factors[self.index(points)]
+
+    def zero_rate(self, points, frequency=None):
+        """
+        Zero rate at ``points``; continuously compounded, or with
+        ``frequency`` compounding periods per year (scalar or array).
+        """
+        rates = self.zero_rates[self.index(points)]
+        if frequency is None:
+            return rates
+        return frequency * np.expm1(rates / frequency)
+
+    def forward_rate(self, points):
+        """
+        Simple annualized forward rate over one grid step starting at ``points``.
+        """
+        return self.forward_rates[self.index(points)]
+
+    def to_frame(self, max_months=None):
+        """
+        Monthly Months / Zero Rate / Forward Rate DataFrame in the layout
+        returned by ``build_zero_forward_curve`` for DataFrame-based callers.
+        """
+        horizon = int(self.times[-1] * 12) if max_months is None else max_months
+        months = np.arange(1, horizon + 1)
+        points = months if self.grid == "monthly" else np.rint(months * 365 / 12)
+        return pd.DataFrame({
+            "Months": months,
+            "Zero Rate": self.zero_rate(points),
+            "Forward Rate": self.forward_rate(points),
+        })
@@ -0,0 +1,201 @@
+# Analytics/CurveScenarioEngine.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from Analytics.Curve import Curve
+from Analytics.Instrumentation import track
+from Analytics.PortfolioTable import portfolio_ids, portfolio_size, portfolio_types
+from Analytics.RiskKernel import build_discount_inputs
+from Analytics.ScenarioEngine import price_rate_shifts
+from Analytics.SwapBookEngine import attached_zero_curve
+
+
+STANDARD_KEY_TENORS = [3, 6, 12, 24, 36, 60, 84, 120, 180, 240, 360]  # months
+
+# Instrument types discounted directly off the scenario zero curve; all other
+# types keep their own yield_rate and receive the curve bump as a spread shift.
+CURVE_DISCOUNTED_TYPES = {"InterestRateSwap"}
+
+
+def tenor_label(months):
+    return f"{months}M" if months < 12 or months % 12 else f"{months // 12}Y"
+
+
+def key_rate_profiles(tenors=None, bump_bps=1.0):
+    """
+    Triangular key-rate bumps: each tenor's bump peaks at that tenor, falls
+    linearly to zero at the neighbouring tenors and is flat beyond the first
+    and last tenors, so the bumps sum to a parallel shift.
+
+    Returns:
+        callable: ``profiles(t_years)`` returning a len(t) x len(tenors) matrix of
+        rate shifts in decimal.
+    """
+    tenors = np.asarray(STANDARD_KEY_TENORS if tenors is None else tenors, dtype=float)
+    size = bump_bps / 10000
+
+    def profiles(t):
+        months = np.asarray(t, dtype=float) * 12
+        return np.column_stack([np.interp(months, tenors, size * unit) for unit in np.eye(len(tenors))])
+
+    return profiles
+
+
+def regulatory_curve_scenarios(parallel_bps=200, short_bps=300, long_bps=150,
+                               decay_years=4.0, pivot_years=5.0):
+    """
+    Standard non-parallel curve shapes, following the IRRBB short/long shock
+    decomposition ``S(t) = short * exp(-t / 4)`` and ``L(t) = long * (1 - exp(-t / 4))``.
+
+    Returns:
+        dict: {scenario name: callable(t_years) -> rate shift in decimal}.
+    """
+    parallel, short, long_ = parallel_bps / 10000, short_bps / 10000, long_bps / 10000
+
+    def short_shape(t):
+        return short * np.exp(-t / decay_years)
+
+    def long_shape(t):
+        return long_ * (1 - np.exp(-t / decay_years))
+
+    return {
+        "Parallel Up": lambda t: np.full_like(t, parallel),
+        "Parallel Down": lambda t: np.full_like(t, -parallel),
+        "Short Rate Up": short_shape,
+        "Short Rate Down": lambda t: -short_shape(t),
+        "Steepener": lambda t: -0.65 * short_shape(t) + 0.9 * long_shape(t),
+        "Flattener": lambda t: 0.8 * short_shape(t) - 0.6 * long_shape(t),
+        "Twist": lambda t: parallel * np.clip((t - pivot_years) / pivot_years, -1, 1),
+    }
+
+
+def _curve_discount_inputs(portfolio, curve, valuation_date, cashflow_table):
+    """
+    Discount inputs with CURVE_DISCOUNTED_TYPES re-based on ``curve``
+    (a ``Curve`` or a Months / Zero Rate DataFrame); with None they keep the
+    rates of their own attached curves.
+    """
+    index, t, amounts, rates, frequency, failed = build_discount_inputs(portfolio, valuation_date, cashflow_table)
+    if curve is None:
+        return (index, t, amounts, rates, frequency), failed
+
+    uses_curve = np.isin(portfolio_types(portfolio), list(CURVE_DISCOUNTED_TYPES))
+    rows = uses_curve[index]
+    rates = rates.copy()
+    if isinstance(curve, Curve):
+        rates[rows] = curve.zero_rate(t[rows] * curve.steps_per_year, frequency[rows])
+    else:
+        rates[rows] = np.interp(t[rows] * 12, curve["Months"].to_numpy(), curve["Zero Rate"].to_numpy())
+    return (index, t, amounts, rates, frequency), failed
+
+
+def price_curve_profiles(portfolio, profiles, n_profiles, curve=None, valuation_date=None, cashflow_table=None):
+    """
+    Reprice the portfolio under a set of tenor-dependent curve shifts in one
+    batched pass. Column 0 of the result is the unshifted base case.
+
+    Parameters:
+        profiles (callable): ``profiles(t_years)`` -> len(t) x n_profiles shifts.
+        curve: Zero curve CURVE_DISCOUNTED_TYPES are discounted off; defaults
+            to the one attached to them (ValueError if they carry different
+            curves), read as pricing reads it so the base case is their price.
+
+    Returns:
+        ndarray: instruments x (1 + n_profiles) present values.
+    """
+    if curve is None:
+        # Swaps keep the rates of their own curve; it must be one curve.
+        attached_zero_curve(portfolio)
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+
+    with track("discount_inputs") as record:
+        inputs, failed = _curve_discount_inputs(portfolio, curve, valuation_date, cashflow_table)
+        # Cashflows paid on or before the valuation date carry no curve risk,
+        # and the shift shapes are only defined for t > 0 (exp(-t / decay)
+        # grows without bound for past payments).
+        future = inputs[1] > 0
+        inputs = tuple(array[future] for array in inputs)
+        record.update(rows=len(inputs[0]), failed=len(failed))
+
+    def shift_rates(rates, t):
+        shifts = np.column_stack([np.zeros(len(t)), profiles(t)])
+        return rates[:, None] + shifts
+
+    with track("scenario_matrix", rows=len(inputs[0]), scenarios=1 + n_profiles):
+        matrix = price_rate_shifts(*inputs, portfolio_size(portfolio), shift_rates, 1 + n_profiles)
+    matrix[failed] = np.nan
+    return matrix
+
+
+def key_rate_durations(portfolio, curve=None, tenors=None, bump_bps=1.0,
+                       valuation_date=None, cashflow_table=None):
+    """
+    Key-rate durations by central difference on triangular tenor bumps.
+
+    Returns:
+        DataFrame: instruments x tenors, indexed by ID.
+    """
+    tenors = list(STANDARD_KEY_TENORS if tenors is None else tenors)
+    up = key_rate_profiles(tenors, bump_bps)
+    n = len(tenors)
+
+    def up_and_down(t):
+        bumps = up(t)
+        return np.hstack([bumps, -bumps])
+
+    matrix = price_curve_profiles(portfolio, up_and_down, 2 * n, curve, valuation_date, cashflow_table)
+    base, bumped_up, bumped_down = matrix[:, :1], matrix[:, 1:n + 1], matrix[:, n + 1:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        krd = (bumped_down - bumped_up) / (2 * base * bump_bps / 10000)
+
+    return pd.DataFrame(krd, index=pd.Index(portfolio_ids(portfolio), name="ID"),
+                        columns=[tenor_label(m) for m in tenors])
+
+
+def run_curve_scenarios(portfolio, scenarios=None, curve=None, valuation_date=None, cashflow_table=None):
+    """
+    Reprice the portfolio under non-parallel curve scenarios (steepener,
+    flattener, short-rate shocks, twist, ...).
+
+    Parameters:
+        scenarios (dict): {name: callable(t_years) -> shift}; defaults to
+            ``regulatory_curve_scenarios()``.
+
+    Returns:
+        dict: 'portfolio' (Scenario, Portfolio Market Value, Change in Market Value),
+        'by_type' and 'by_instrument' breakdowns.
+    """
+    if scenarios is None:
+        scenarios = regulatory_curve_scenarios()
+    names = list(scenarios)
+    shapes = [scenarios[name] for name in names]
+
+    matrix = price_curve_profiles(portfolio, lambda t: np.column_stack([shape(t) for shape in shapes]),
+                                  len(names), curve, valuation_date, cashflow_table)
+    matrix = np.nan_to_num(matrix)
+
+    ids = portfolio_ids(portfolio)
+    types = portfolio_types(portfolio).astype(str)
+
+    by_instrument = pd.DataFrame(matrix[:, 1:], index=pd.Index(ids, name="ID"), columns=names)
+    by_instrument.insert(0, "Base", matrix[:, 0])
+
+    type_values = pd.DataFrame(matrix).groupby(types).sum()
+    by_type = pd.DataFrame({
+        "Instrument Type": np.repeat(type_values.index.to_numpy(), len(names)),
+        "Scenario": np.tile(names, len(type_values)),
+        "Market Value": type_values.to_numpy()[:, 1:].ravel(),
+        "Change in Market Value": (type_values.to_numpy()[:, 1:] - type_values.to_numpy()[:, [0]]).ravel(),
+    })
+
+    totals = matrix.sum(axis=0)
+    portfolio_df = pd.DataFrame({
+        "Scenario": names,
+        "Portfolio Market Value": totals[1:],
+        "Change in Market Value": totals[1:] - totals[0],
+    })
+
+    return {"portfolio": portfolio_df, "by_type": by_type, "by_instrument": by_instrument}
@@ -0,0 +1,163 @@
+# Analytics/DayCount.py
+
+import numpy as np
+import pandas as pd
+
+
+# Day-count conventions as small integer codes, so a whole book's conventions
+# fit in one int8 array and dispatch happens once per convention, not per cashflow.
+THIRTY_360 = 0
+ACTUAL_360 = 1
+ACTUAL_365 = 2
+ACTUAL_ACTUAL = 3
+
+DAY_COUNT_CODES = {
+    "30/360": THIRTY_360,
+    "Actual/360": ACTUAL_360,
+    "Actual/365": ACTUAL_365,
+    "Actual/Actual": ACTUAL_ACTUAL,
+}
+
+# Spellings found in portfolio files, matched case-insensitively.
+_ALIASES = {
+    "30/360": THIRTY_360, "30/360 us": THIRTY_360, "30u/360": THIRTY_360, "bond basis": THIRTY_360,
+    "actual/360": ACTUAL_360, "act/360": ACTUAL_360, "a/360": ACTUAL_360,
+    "actual/365": ACTUAL_365, "act/365": ACTUAL_365, "actual/365 fixed": ACTUAL_365,
+    "act/365f": ACTUAL_365, "a/365": ACTUAL_365,
+    "actual/actual": ACTUAL_ACTUAL, "act/act": ACTUAL_ACTUAL, "actual/actual isda": ACTUAL_ACTUAL,
+    "act/act isda": ACTUAL_ACTUAL,
+}
+
+# Convention used where none is given: the year fraction the pricers used
+# before day counts were honoured (actual days / 365).
+DEFAULT_DAY_COUNT = ACTUAL_365
+
+
+def day_count_code(name):
+    """
+    Integer code of a day-count convention name; None or NaN gives
+    DEFAULT_DAY_COUNT.
+    """
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return DEFAULT_DAY_COUNT
+    try:
+        return _ALIASES[str(name).strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown day count convention '{name}', expected one of {list(DAY_COUNT_CODES)}")
+
+
+def day_count_codes(names):
+    """
+    Codes for an array of convention names, looking up each distinct name once.
+    """
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=True)
+    lookup = np.array([day_count_code(name) for name in uniques] + [DEFAULT_DAY_COUNT], dtype=np.int8)
+    return lookup[codes]
+
+
+def _civil(days):
+    """
+    (year, month, day) of int64 days since 1970-01-01, by integer arithmetic
+    (H. Hinnant's civil_from_days); much cheaper than datetime64[M]/[Y] casts.
+    """
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    return yoe + era * 400 + (month <= 2), month, day
+
+
+def _january_first(years):
+    """
+    Days since 1970-01-01 of 1 January of each year.
+    """
+    y = years - 1
+    era = y // 400
+    yoe = y - era * 400
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + 306 - 719468
+
+
+def _year_length(years):
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    return 365.0 + leap
+
+
+def _thirty_360(start, end):
+    """
+    30/360 US bond basis: a 31st start becomes the 30th, and a 31st end
+    becomes the 30th when the start is the 30th or 31st.
+    """
+    y1, m1, d1 = _civil(start)
+    y2, m2, d2 = _civil(end)
+    d1 = np.minimum(d1, 30)
+    d2 = np.where((d2 == 31) & (d1 == 30), 30, d2)
+    return (360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360
+
+
+def _actual_actual(start, end):
+    """
+    Actual/Actual ISDA: days falling in each calendar year over that year's length.
+    """
+    lo, hi = np.minimum(start, end), np.maximum(start, end)
+    lo_year, hi_year = _civil(lo)[0], _civil(hi)[0]
+    lo_next, hi_start = _january_first(lo_year + 1), _january_first(hi_year)
+    fraction = np.where(
+        lo_year == hi_year,
+        (hi - lo) / _year_length(lo_year),
+        (lo_next - lo) / _year_length(lo_year) + (hi_year - lo_year - 1)
+        + (hi - hi_start) / _year_length(hi_year),
+    )
+    return np.where(end >= start, fraction, -fraction)
+
+
+def year_fraction(start, end, codes=DEFAULT_DAY_COUNT):
+    """
+    Year fractions from ``start`` to ``end`` (negative when end is earlier).
+
+    Parameters:
+        start, end: Dates (anything ``np.asarray(..., 'datetime64[D]')``
+            accepts); either may be a scalar.
+        codes (int or array): Day-count code per element (see DAY_COUNT_CODES).
+
+    Returns:
+        ndarray: year fractions. Each convention present is evaluated once,
+        over all the elements that use it. With a single start date (the
+        pricers' valuation date) each convention is evaluated once per day
+        of the range the end dates span and gathered, which is far cheaper
+        than calendar arithmetic per cashflow.
+    """
+    start = np.asarray(start, dtype="datetime64[D]").astype(np.int64)
+    end = np.asarray(end, dtype="datetime64[D]").astype(np.int64)
+    codes = np.asarray(codes)
+
+    present = np.flatnonzero(np.bincount(codes.ravel(), minlength=len(_FRACTIONS)))
+    if start.ndim == 0 and end.size:
+        first = end.min()
+        span = end.max() - first + 1
+        if span <= end.size:
+            days = np.arange(first, first + span)
+            lookup = np.zeros((len(_FRACTIONS), span))
+            for code in present:
+                lookup[code] = _FRACTIONS[code](start, days)
+            return lookup[codes, end - first]
+    if len(present) == 1:
+        return np.broadcast_to(_FRACTIONS[present[0]](start, end), np.broadcast(start, end, codes).shape).copy()
+
+    start, end, codes = np.broadcast_arrays(start, end, codes)
+    fractions = np.empty(start.shape)
+    for code in present:
+        rows = codes == code
+        fractions[rows] = _FRACTIONS[code](start[rows], end[rows])
+    return fractions
+
+
+_FRACTIONS = {
+    THIRTY_360: _thirty_360,
+    ACTUAL_360: lambda start, end: (end - start) / 360,
+    ACTUAL_365: lambda start, end: (end - start) / 365,
+    ACTUAL_ACTUAL: _actual_actual,
+}
@@ -1,13 +1,16 @@
-from concurrent.futures import ProcessPoolExecutor
+from Analytics.ExecutionBackend import get_default_backend
+from Analytics.PortfolioTable import portfolio_ids
+from Analytics.RiskKernel import compute_risk_measures
 
 
-def _duration_instrument(args):
-    instrument, valuation_date = args
-    mac, mod = instrument.calculate_duration(valuation_date=valuation_date)
-    return instrument.ID, {"macaulay_duration": mac, "modified_duration": mod}
-
-
-def calculate_durations_for_portfolio(instruments, valuation_date=None):
-    with ProcessPoolExecutor() as executor:
-        results = executor.map(_duration_instrument, [(inst, valuation_date) for inst in instruments])
-    return {ID: durations for ID, durations in results}
+def calculate_durations_for_portfolio(instruments, valuation_date=None, backend=None):
+    measures = compute_risk_measures(instruments, valuation_date, backend=backend or get_default_backend())
+    return {
+        inst_id: {
+            "macaulay_duration": round(mac, 4),
+            "modified_duration": round(mod, 4),
+            "convexity": round(conv, 4),
+        }
+        for inst_id, mac, mod, conv in zip(portfolio_ids(instruments), measures["macaulay"],
+                                           measures["modified"], measures["convexity"])
+    }
@@ -0,0 +1,149 @@
+# Analytics/ExecutionBackend.py
+
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from Analytics.RiskKernel import RISK_MEASURES, build_discount_inputs, discount_cashflows
+
+
+def _risk_chunk(tables, cashflow_table, valuation_date, prepayment, inst_start, n_instruments):
+    """
+    Worker task: set up and discount the cashflows of one chunk of whole
+    instruments (``tables`` and ``cashflow_table`` positioned
+    0..n_instruments-1), projecting them first when no table is given.
+
+    Returns:
+        tuple: (inst_start, {measure: array}, failed chunk positions).
+    """
+    *inputs, failed = build_discount_inputs(tables, valuation_date, cashflow_table, prepayment)
+    return inst_start, discount_cashflows(*inputs, n_instruments), failed
+
+
+class ExecutionBackend:
+    """
+    Long-lived process pool for the portfolio risk computation.
+
+    The pool is created on first use and reused across calls; its workers
+    are started with ``spawn``, since it may be created from a pipeline
+    worker thread and forking a threaded process can deadlock. The
+    portfolio is split into a few large chunks of whole instruments, each
+    shipped with its slice of the cashflow table when the caller has one
+    (otherwise the worker projects it), and per-instrument measures come
+    back. Portfolios below
+    ``min_parallel_instruments`` run serially in the calling process, where
+    pool overhead would outweigh the gain.
+
+    Parameters:
+        max_workers (int): Worker processes (default: CPU count).
+        min_parallel_instruments (int): Instruments below which work runs serially.
+        chunks_per_worker (int): Chunks submitted per worker, for load balancing.
+    """
+
+    def __init__(self, max_workers=None, min_parallel_instruments=20_000, chunks_per_worker=2):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_parallel_instruments = min_parallel_instruments
+        self.chunks_per_worker = chunks_per_worker
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def is_parallel(self, n_instruments):
+        return self.max_workers > 1 and n_instruments >= self.min_parallel_instruments
+
+    def _chunks(self, tables, n_instruments, cashflow_table=None):
+        """
+        Split positioned tables, and the cashflow table when given, into
+        roughly equal chunks of whole instruments, each renumbered from 0.
+        Yields (inst_start, inst_stop, tables, cashflow_table or None).
+        """
+        n_chunks = min(self.max_workers * self.chunks_per_worker, max(n_instruments, 1))
+        bounds = np.unique(np.linspace(0, n_instruments, n_chunks + 1).astype(np.int64))
+        if cashflow_table is not None:
+            index = cashflow_table["instrument_index"].to_numpy()
+            if np.any(index[1:] < index[:-1]):
+                cashflow_table = cashflow_table.iloc[np.argsort(index, kind="stable")]
+                index = cashflow_table["instrument_index"].to_numpy()
+            row_bounds = np.searchsorted(index, bounds)
+        for i, (inst_start, inst_stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            chunk = []
+            for table in tables:
+                rows = np.flatnonzero((table.positions >= inst_start) & (table.positions < inst_stop))
+                if len(rows):
+                    chunk.append(table.take(rows).with_positions(table.positions[rows] - inst_start))
+            flows = None
+            if cashflow_table is not None:
+                flows = cashflow_table.iloc[row_bounds[i]:row_bounds[i + 1]].reset_index(drop=True)
+                flows["instrument_index"] -= inst_start
+            yield int(inst_start), int(inst_stop), chunk, flows
+
+    def risk_measures(self, tables, valuation_date, prepayment=None, cashflow_table=None):
+        """
+        ``RiskKernel.build_discount_inputs`` and ``discount_cashflows`` for a
+        positioned portfolio (see ``as_tables``), spread across the pool.
+        ``cashflow_table`` (its long-format projection) is sliced per chunk
+        rather than projected again in the workers.
+
+        Returns:
+            tuple: ({measure: array in portfolio order}, failed positions).
+        """
+        n_instruments = sum(len(table) for table in tables)
+        futures = [self.submit(_risk_chunk, chunk, flows, valuation_date, prepayment, inst_start,
+                               inst_stop - inst_start)
+                   for inst_start, inst_stop, chunk, flows in self._chunks(tables, n_instruments, cashflow_table)]
+
+        measures = {name: np.zeros(n_instruments) for name in RISK_MEASURES}
+        failed = []
+        for future in futures:
+            inst_start, chunk, chunk_failed = future.result()
+            for name in RISK_MEASURES:
+                measures[name][inst_start:inst_start + len(chunk[name])] = chunk[name]
+            failed.extend(inst_start + position for position in chunk_failed)
+        return measures, failed
+
+
+_default_backend = None
+
+
+def get_default_backend():
+    """
+    Shared backend used by the pricing and duration engines unless one is passed in.
+    """
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = ExecutionBackend()
+    return _default_backend
+
+
+def set_default_backend(backend):
+    global _default_backend
+    if _default_backend is not None and _default_backend is not backend:
+        _default_backend.shutdown()
+    _default_backend = backend
+
+
+@atexit.register
+def _shutdown_default_backend():
+    if _default_backend is not None:
+        _default_backend.shutdown()
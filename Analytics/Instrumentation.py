@@ -0,0 +1,219 @@
+# Analytics/Instrumentation.py
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextvars import ContextVar
+from threading import Lock
+
+import pandas as pd
+
+
+_current = ContextVar("alm_instrumentation", default=None)
+_parent = ContextVar("alm_instrumentation_parent", default=None)
+
+
+class _NullStage:
+    """
+    What ``track`` returns while no instrumentation is active: entering it
+    costs one method call and the yielded record is a scratch dict nobody reads.
+    """
+
+    __slots__ = ()
+    record = {}
+
+    def __enter__(self):
+        return self.record
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("owner", "record", "token", "wall", "cpu", "profiler", "memory_frame")
+
+    def __init__(self, owner, record):
+        self.owner = owner
+        self.record = record
+
+    def __enter__(self):
+        owner, record = self.owner, self.record
+        self.token = _parent.set(record["stage"] if record["parent"] is None
+                                 else f"{record['parent']}/{record['stage']}")
+        self.memory_frame = owner._start_memory() if owner.memory else None
+        self.profiler = None
+        if owner.profile_stage == record["stage"]:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        return record
+
+    def __exit__(self, exc_type, exc, tb):
+        record, owner = self.record, self.owner
+        record["wall_s"] = time.perf_counter() - self.wall
+        record["cpu_s"] = time.process_time() - self.cpu
+        if self.profiler is not None:
+            self.profiler.disable()
+            record["profile"] = owner._profile_text(self.profiler)
+        if self.memory_frame is not None:
+            record["peak_mb"] = owner._stop_memory(self.memory_frame)
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        _parent.reset(self.token)
+        owner._finish(record)
+        return False
+
+
+class Instrumentation:
+    """
+    Per-stage timings and counts for one ALM run.
+
+    While active (see ``activate`` or ``run_alm(instrumentation=...)``),
+    every ``track`` block in the Analytics, rbi and Output modules appends
+    a record: stage name, parent stage, wall and CPU time, optional peak
+    memory, and the counts the stage reports (instruments, rows,
+    instrument_type...). With no active instrumentation ``track`` does
+    nothing.
+
+    Parameters:
+        memory (bool): Record peak traced memory per stage with tracemalloc.
+            Tracing slows NumPy-heavy code noticeably, so it is off by default.
+        log: Where to write one JSON line per finished stage: a file-like
+            object, a ``logging.Logger`` or any callable taking the line.
+        profile_stage (str): Run this stage under cProfile and attach the top
+            functions (by cumulative time) to its record as ``profile``.
+        profile_path (str): Also dump the raw profile of ``profile_stage`` here.
+        profile_limit (int): Functions listed in the profile text.
+    """
+
+    def __init__(self, memory=False, log=None, profile_stage=None, profile_path=None, profile_limit=30):
+        self.memory = memory
+        self.log = log
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path
+        self.profile_limit = profile_limit
+        self.records = []
+        self._lock = Lock()
+        self._memory_frames = []
+        self._started_tracing = False
+
+    def stage(self, name, **fields):
+        record = {"stage": name, "parent": _parent.get()}
+        record.update(fields)
+        return _Stage(self, record)
+
+    def activate(self):
+        """
+        Make this the instrumentation ``track`` reports to in the current
+        context. Returns a token for ``deactivate``.
+        """
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return _current.set(self)
+
+    def deactivate(self, token):
+        _current.reset(token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        """
+        DataFrame with one row per finished stage, in completion order.
+        """
+        with self._lock:
+            records = [{k: v for k, v in r.items() if k != "profile"} for r in self.records]
+        return pd.DataFrame(records)
+
+    def summary(self):
+        """
+        Total wall and CPU time and call count per (parent, stage).
+        """
+        report = self.report()
+        if report.empty:
+            return report
+        return (report.fillna({"parent": ""})
+                .groupby(["parent", "stage"], sort=False)
+                .agg(calls=("wall_s", "size"), wall_s=("wall_s", "sum"), cpu_s=("cpu_s", "sum"))
+                .reset_index())
+
+    def profile(self, stage=None):
+        """
+        Profile text recorded for ``stage`` (default ``profile_stage``), or None.
+        """
+        stage = stage or self.profile_stage
+        for record in self.records:
+            if record["stage"] == stage and "profile" in record:
+                return record["profile"]
+        return None
+
+    def _finish(self, record):
+        with self._lock:
+            self.records.append(record)
+        if self.log is not None:
+            line = json.dumps({k: v for k, v in record.items() if k != "profile"}, default=str)
+            if hasattr(self.log, "info"):
+                self.log.info(line)
+            elif hasattr(self.log, "write"):
+                self.log.write(line + "\n")
+            else:
+                self.log(line)
+
+    def _start_memory(self):
+        if not tracemalloc.is_tracing():
+            return None
+        with self._lock:
+            self._carry_peak()
+            tracemalloc.reset_peak()
+            frame = [tracemalloc.get_traced_memory()[0], 0]
+            self._memory_frames.append(frame)
+        return frame
+
+    def _stop_memory(self, frame):
+        with self._lock:
+            self._carry_peak()
+            self._memory_frames = [f for f in self._memory_frames if f is not frame]
+        return (frame[1] - frame[0]) / 2 ** 20
+
+    def _carry_peak(self):
+        # Nested stages reset tracemalloc's peak; keep the enclosing stages'.
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._memory_frames:
+            frame[1] = max(frame[1], peak)
+
+    def _profile_text(self, profiler):
+        if self.profile_path:
+            profiler.dump_stats(self.profile_path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(self.profile_limit)
+        return out.getvalue()
+
+
+def track(name, **fields):
+    """
+    Context manager timing a stage for the active instrumentation; yields
+    the stage's record so the body can add counts (``record["rows"] = n``).
+    Returns a shared no-op when instrumentation is off.
+    """
+    instrumentation = _current.get()
+    if instrumentation is None:
+        return _NULL_STAGE
+    return instrumentation.stage(name, **fields)
+
+
+def current_instrumentation():
+    return _current.get()
+
+
+def counts_by_type(tables):
+    """
+    {instrument type: instruments} for the record of a portfolio-wide stage.
+    """
+    return {table.instrument_type: len(table) for table in tables}
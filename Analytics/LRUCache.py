@@ -0,0 +1,106 @@
+# Analytics/LRUCache.py
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache, bounded by entry count and
+    optionally by size.
+
+    Parameters:
+        maxsize (int): Entries kept (None for no count bound).
+        max_bytes (int): Total ``sizeof`` of the entries kept (None for no
+            size bound). A value larger than this on its own is not kept.
+        sizeof (callable): ``sizeof(value)`` -> bytes; required with ``max_bytes``.
+    """
+
+    def __init__(self, maxsize=None, max_bytes=None, sizeof=None):
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes needs a sizeof function")
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the cached value for ``key`` or None, updating the counters.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for ``key``, calling ``compute()`` and
+        storing the result on a miss.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, key):
+        if key in self._entries:
+            del self._entries[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def _evict(self):
+        while self._entries and (
+                (self.maxsize is not None and len(self._entries) > self.maxsize)
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit_rate, size, maxsize, bytes and max_bytes.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,290 @@
+# Analytics/MonteCarlo.py
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from Analytics.BatchCashflowEngine import generate_cashflow_table
+from Analytics.Curve import Curve
+from Analytics.ExecutionBackend import get_default_backend
+from Analytics.Instrumentation import track
+from Analytics.PortfolioTable import as_tables, portfolio_types
+from Analytics.YieldCurveBuilder import bootstrap_curve
+from rbi.liquidity import INSTRUMENT_SIDES
+
+
+DEFAULT_CONFIDENCE = (0.95, 0.99)
+STEPS_PER_YEAR = 12
+
+
+class Vasicek:
+    """
+    Vasicek short rate, ``dr = kappa (theta - r) dt + sigma dW``, simulated
+    with the exact joint Gaussian transition of the rate and its integral
+    over each step, so path discount factors carry no discretization bias:
+    with no volatility every path reprices ``discount_curve`` exactly.
+    """
+
+    def __init__(self, kappa=0.15, theta=0.05, sigma=0.01, r0=0.045):
+        self.kappa = float(kappa)
+        self.theta = float(theta)
+        self.sigma = float(sigma)
+        self.r0 = float(r0)
+
+    def __repr__(self):
+        return f"Vasicek(kappa={self.kappa}, theta={self.theta}, sigma={self.sigma}, r0={self.r0})"
+
+    def simulate(self, rng, n_paths, n_steps, dt):
+        """
+        paths x n_steps short rates, each the average rate over its step
+        (the step's exact integral over dt).
+        """
+        decay = np.exp(-self.kappa * dt)
+        b = (1 - decay) / self.kappa
+        # Covariance of the rate at the step's end and of its integral over
+        # the step, given the rate at its start; drawn through its Cholesky factor.
+        end_var = self.sigma ** 2 * (1 - decay ** 2) / (2 * self.kappa)
+        integral_var = self.sigma ** 2 / self.kappa ** 2 * (dt - 2 * b + (1 - decay ** 2) / (2 * self.kappa))
+        covariance = self.sigma ** 2 * b ** 2 / 2
+        end_scale = np.sqrt(end_var)
+        mixed = covariance / end_scale if end_scale > 0 else 0.0
+        own = np.sqrt(max(integral_var - mixed ** 2, 0.0))
+
+        shocks = rng.standard_normal((2, n_paths, n_steps))
+        rates = np.empty((n_paths, n_steps))
+        deviation = np.full(n_paths, self.r0 - self.theta)
+        for k in range(n_steps):
+            rates[:, k] = self.theta + (deviation * b + mixed * shocks[0, :, k] + own * shocks[1, :, k]) / dt
+            deviation = deviation * decay + end_scale * shocks[0, :, k]
+        return rates
+
+    def discount_curve(self, n_steps, dt):
+        """
+        Analytic zero-coupon prices P(0, k dt) for k = 0..n_steps.
+        """
+        t = np.arange(n_steps + 1) * dt
+        b = (1 - np.exp(-self.kappa * t)) / self.kappa
+        a = ((self.theta - self.sigma ** 2 / (2 * self.kappa ** 2)) * (b - t)
+             - self.sigma ** 2 * b ** 2 / (4 * self.kappa))
+        return np.exp(a - b * self.r0)
+
+
+class HullWhite:
+    """
+    Hull-White one-factor short rate, ``r(t) = x(t) + phi(t)`` with ``x`` a
+    zero-mean Ornstein-Uhlenbeck process and ``phi`` fitted to ``curve`` (a
+    ``Curve``; the bootstrapped sample curve by default), so simulated
+    discount factors reprice the initial curve.
+    """
+
+    def __init__(self, curve=None, kappa=0.10, sigma=0.01):
+        self.curve = bootstrap_curve() if curve is None else curve
+        self.kappa = float(kappa)
+        self.sigma = float(sigma)
+
+    def __repr__(self):
+        return f"HullWhite({self.curve!r}, kappa={self.kappa}, sigma={self.sigma})"
+
+    def discount_curve(self, n_steps, dt):
+        """
+        The initial curve's discount factors at k dt for k = 0..n_steps,
+        extrapolated at its last zero rate.
+        """
+        curve = self.curve
+        if not isinstance(curve, Curve):
+            raise TypeError("HullWhite needs a Curve to fit to")
+        t = np.arange(n_steps + 1) * dt
+        points = t * curve.steps_per_year
+        inside = np.rint(points) < len(curve)
+        return np.where(inside, curve.discount_factor(points), np.exp(-curve.zero_rates[-1] * t))
+
+    def simulate(self, rng, n_paths, n_steps, dt):
+        decay = np.exp(-self.kappa * dt)
+        scale = self.sigma * np.sqrt((1 - decay ** 2) / (2 * self.kappa))
+        shocks = rng.standard_normal((n_paths, n_steps - 1)) * scale
+        x = np.zeros((n_paths, n_steps))
+        for k in range(1, n_steps):
+            x[:, k] = x[:, k - 1] * decay + shocks[:, k - 1]
+
+        t = np.arange(n_steps) * dt
+        forwards = -np.diff(np.log(self.discount_curve(n_steps, dt))) / dt
+        phi = forwards + self.sigma ** 2 / (2 * self.kappa ** 2) * (1 - np.exp(-self.kappa * t)) ** 2
+        return x + phi
+
+
+def value_at_risk(losses, confidence):
+    """
+    Loss not exceeded with probability ``confidence``.
+    """
+    return float(np.quantile(losses, confidence))
+
+
+def expected_shortfall(losses, confidence):
+    """
+    Mean loss at or beyond the ``confidence`` VaR.
+    """
+    losses = np.asarray(losses)
+    return float(losses[losses >= value_at_risk(losses, confidence)].mean())
+
+
+def _bucket_cashflows(cashflow_table, types, valuation_date, horizon_months):
+    """
+    Net the projected cashflows into monthly buckets per instrument type,
+    signed by balance sheet side (liabilities negative).
+
+    Returns:
+        tuple: (type_names, cashflows, interest, principal) where cashflows is
+        a months x types array over the whole projection and interest /
+        principal cover the NII horizon.
+    """
+    dates = cashflow_table["payment_date"].to_numpy()
+    days = (dates - pd.Timestamp(valuation_date).to_datetime64()) / np.timedelta64(1, "D")
+    future = days > 0
+    month = np.maximum(np.rint(days[future] * 12 / 365.25).astype(np.int64), 1)
+
+    names, type_codes = np.unique(np.asarray(types, dtype=object).astype(str), return_inverse=True)
+    signs = np.array([-1.0 if INSTRUMENT_SIDES.get(name) == "Liability" else 1.0 for name in names])
+    codes = type_codes.ravel()[cashflow_table["instrument_index"].to_numpy()[future]]
+    sign = signs[codes]
+    interest = cashflow_table["interest"].to_numpy()[future] * sign
+    principal = cashflow_table["principal"].to_numpy()[future] * sign
+
+    n_months = int(month.max(initial=horizon_months)) + 1
+    cells = month * len(names) + codes
+
+    def buckets(amounts, months):
+        return np.bincount(cells, np.nan_to_num(amounts), minlength=months * len(names))[:months * len(names)] \
+            .reshape(months, len(names))
+
+    in_horizon = month <= horizon_months
+    return (list(names), buckets(interest + principal, n_months),
+            buckets(np.where(in_horizon, interest, 0.0), horizon_months + 1),
+            buckets(np.where(in_horizon, principal, 0.0), horizon_months + 1))
+
+
+def _evaluate_rates(rates, dt, cashflows, interest, principal):
+    """
+    EVE and NII per path and type for a paths x months matrix of short rates.
+
+    EVE discounts every bucket at the path's discount factor
+    ``exp(-sum r dt)``. NII is the contractual interest in the horizon plus
+    principal received (or repaid) in it rolled over at the path's short
+    rate until the horizon.
+    """
+    integral = np.zeros((len(rates), rates.shape[1] + 1))
+    np.cumsum(rates * dt, axis=1, out=integral[:, 1:])
+    eve = np.exp(-integral[:, :len(cashflows)]) @ cashflows
+
+    horizon = len(principal) - 1
+    rollover = integral[:, [horizon]] - integral[:, :horizon + 1]
+    nii = interest.sum(axis=0) + rollover @ principal
+    return eve, nii
+
+
+def _simulate_batch(model, seed, n_paths, dt, cashflows, interest, principal):
+    """
+    Worker task: simulate one batch of paths from its own seed and reduce
+    them to EVE and NII per path and type.
+    """
+    rng = np.random.default_rng(seed)
+    rates = model.simulate(rng, n_paths, len(cashflows), dt)
+    return _evaluate_rates(rates, dt, cashflows, interest, principal)
+
+
+def run_monte_carlo(portfolio, model=None, n_paths=10_000, valuation_date=None, seed=None,
+                    horizon_months=12, batch_paths=5_000, confidence=DEFAULT_CONFIDENCE,
+                    cashflow_table=None, prepayment=None, backend=None, min_parallel_paths=20_000):
+    """
+    Distributions of economic value of equity (EVE) and net interest income
+    (NII) under simulated short-rate paths.
+
+    The portfolio's cashflows are projected once and netted into monthly
+    buckets per instrument type (liabilities negative), so the cost per path
+    depends on the projection horizon, not the number of positions. Paths
+    are simulated monthly in batches of ``batch_paths``; each batch draws
+    from its own child of ``SeedSequence(seed)``, so results depend only on
+    the seed and batch size, not on how batches are scheduled. Large runs
+    are spread over the ``ExecutionBackend`` process pool.
+
+    Parameters:
+        portfolio: Instrument objects or PortfolioTables.
+        model: ``Vasicek`` or ``HullWhite`` (default: Hull-White fitted to the
+            sample curve).
+        n_paths (int): Number of simulated paths.
+        valuation_date: Valuation date (default today).
+        seed (int): Root seed; None draws fresh entropy (reported in the result).
+        horizon_months (int): NII horizon.
+        batch_paths (int): Paths per batch; bounds memory at
+            batch_paths x projection months per array.
+        confidence (tuple): VaR / ES confidence levels.
+        cashflow_table (DataFrame): Optional pre-computed long-format cashflows.
+        prepayment (PrepaymentModel): Prepayment model for the projection.
+        backend (ExecutionBackend): Process pool (default: the shared one).
+        min_parallel_paths (int): Paths below which batches run in-process.
+
+    Returns:
+        dict: 'summary' (base, mean, standard deviation, VaR and ES of EVE
+        and NII; VaR and ES as losses against the base), 'by_type' (base and
+        mean EVE / NII per instrument type), 'eve' and 'nii' (per-path totals),
+        'seed' and 'model'.
+    """
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+    if model is None:
+        model = HullWhite(bootstrap_curve(valuation_date=valuation_date))
+    seed_sequence = np.random.SeedSequence(seed)
+    dt = 1 / STEPS_PER_YEAR
+
+    tables = as_tables(portfolio)
+    if cashflow_table is None:
+        cashflow_table = generate_cashflow_table(tables, prepayment, valuation_date)
+    names, cashflows, interest, principal = _bucket_cashflows(
+        cashflow_table, portfolio_types(tables), valuation_date, horizon_months)
+
+    sizes = [min(batch_paths, n_paths - start) for start in range(0, n_paths, batch_paths)]
+    seeds = seed_sequence.spawn(len(sizes))
+    backend = get_default_backend() if backend is None else backend
+    parallel = backend.max_workers > 1 and n_paths >= min_parallel_paths
+
+    with track("monte_carlo", paths=n_paths, batches=len(sizes), months=len(cashflows), parallel=parallel):
+        if parallel:
+            futures = [backend.submit(_simulate_batch, model, child, size, dt, cashflows, interest, principal)
+                       for child, size in zip(seeds, sizes)]
+            batches = [future.result() for future in futures]
+        else:
+            batches = [_simulate_batch(model, child, size, dt, cashflows, interest, principal)
+                       for child, size in zip(seeds, sizes)]
+
+    eve = np.concatenate([batch[0] for batch in batches])
+    nii = np.concatenate([batch[1] for batch in batches])
+
+    # Base case: the model's initial discount curve and its one-step forwards.
+    base_discount = model.discount_curve(len(cashflows), dt)
+    base_rates = -np.diff(np.log(base_discount)) / dt
+    base_eve, base_nii = _evaluate_rates(base_rates[None, :], dt, cashflows, interest, principal)
+
+    rows = []
+    for metric, paths, base in (("EVE", eve.sum(axis=1), base_eve.sum()), ("NII", nii.sum(axis=1), base_nii.sum())):
+        row = {"Metric": metric, "Base": base, "Mean": paths.mean(), "Std Dev": paths.std(ddof=1)}
+        losses = base - paths
+        for level in confidence:
+            row[f"VaR {level:.0%}"] = value_at_risk(losses, level)
+            row[f"ES {level:.0%}"] = expected_shortfall(losses, level)
+        rows.append(row)
+
+    by_type = pd.DataFrame({
+        "Instrument Type": names,
+        "Base EVE": base_eve[0],
+        "Mean EVE": eve.mean(axis=0),
+        "Base NII": base_nii[0],
+        "Mean NII": nii.mean(axis=0),
+    })
+
+    return {
+        "summary": pd.DataFrame(rows),
+        "by_type": by_type,
+        "eve": eve.sum(axis=1),
+        "nii": nii.sum(axis=1),
+        "seed": seed_sequence.entropy,
+        "model": repr(model),
+    }
@@ -0,0 +1,278 @@
+# Analytics/Pipeline.py
+
+import contextvars
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+
+from Analytics.Instrumentation import current_instrumentation, track
+
+
+# How a stage runs when the pipeline runs concurrently: on a worker thread
+# (NumPy / pandas kernels release the GIL), in a worker process (Python-level
+# loops that hold it; ``compute`` must then be picklable), or on the calling
+# thread.
+CONCURRENCY_MODES = ("thread", "process", "serial")
+
+
+class StageError(Exception):
+    """
+    A stage that raised; ``cause`` is the original exception.
+    """
+
+    def __init__(self, stage, cause):
+        super().__init__(f"Stage '{stage}' failed: {type(cause).__name__}: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+    def __reduce__(self):
+        return StageError, (self.stage, self.cause)
+
+
+class Recompute(Exception):
+    """
+    Raised by a stage's ``update`` when the change since the last run cannot
+    be applied incrementally; the stage is computed from scratch instead and
+    reported as 'computed'.
+    """
+
+
+class PipelineError(Exception):
+    """
+    Raised after a run in which stages failed. Stages independent of the
+    failures still ran.
+
+    Attributes:
+        errors (dict): {stage name: StageError} for the stages that raised.
+        skipped (list): Stages not run because an input failed.
+        values (dict): Sources and the outputs that were produced.
+        statuses (dict): {stage name: 'cached' / 'updated' / 'computed' /
+            'failed' / 'skipped'}.
+    """
+
+    def __init__(self, errors, skipped, values, statuses):
+        lines = "; ".join(str(error) for error in errors.values())
+        super().__init__(f"{len(errors)} pipeline stage(s) failed ({len(skipped)} skipped): {lines}")
+        self.errors = errors
+        self.skipped = skipped
+        self.values = values
+        self.statuses = statuses
+
+    def __reduce__(self):
+        # Raised in worker processes too; the produced values stay behind.
+        return PipelineError, (self.errors, self.skipped, {}, self.statuses)
+
+
+class Stage:
+    """
+    One node of a ``Pipeline``.
+
+    Parameters:
+        name (str): Output name other stages refer to.
+        inputs (list): Names of sources or upstream stages passed to ``compute``.
+        compute (callable): ``compute(*inputs)`` -> output.
+        update (callable): Optional ``update(previous_output, previous_inputs, *inputs)``
+            producing the output incrementally when the inputs changed since
+            the last run; falls back to ``compute`` when absent or when it
+            raises ``Recompute``.
+        label (str): Progress message shown while the stage runs.
+        concurrency (str): One of CONCURRENCY_MODES; where the stage runs when
+            the pipeline runs stages concurrently.
+    """
+
+    __slots__ = ("name", "inputs", "compute", "update", "label", "concurrency")
+
+    def __init__(self, name, inputs, compute, update=None, label=None, concurrency="thread"):
+        if concurrency not in CONCURRENCY_MODES:
+            raise ValueError(f"Unknown concurrency '{concurrency}', expected one of {CONCURRENCY_MODES}")
+        self.name = name
+        self.inputs = list(inputs)
+        self.compute = compute
+        self.update = update
+        self.label = label or name
+        self.concurrency = concurrency
+
+
+class Pipeline:
+    """
+    Dependency-tracked stages with outputs cached by input fingerprint.
+
+    Each run fingerprints every stage from its name and the fingerprints of
+    its inputs. A stage whose fingerprint is unchanged reuses its last
+    output; a changed stage is updated from its last output when it has an
+    ``update`` function, and recomputed otherwise. Only the last output of
+    each stage is kept, for as long as the pipeline lives.
+
+    Stages whose inputs are all available run concurrently on a thread pool
+    (``process`` stages are handed to a process pool from there), so
+    independent branches of the graph overlap. A failing stage does not stop
+    the run: stages that depend on it are skipped, the others complete and
+    ``PipelineError`` is raised at the end.
+
+    Parameters:
+        stages (list): Stages in dependency order (inputs before consumers).
+        max_workers (int): Default number of stages run at once.
+        process_pool: Object with ``submit(fn, *args)`` for ``process``
+            stages (default: the shared ``ExecutionBackend``).
+    """
+
+    def __init__(self, stages, max_workers=None, process_pool=None):
+        known = {stage.name for stage in stages}
+        self.stages = list(stages)
+        self.sources = sorted({name for stage in stages for name in stage.inputs} - known)
+        self.max_workers = max_workers
+        self.process_pool = process_pool
+        self._entries = {}
+        self._lock = Lock()
+
+        produced = set(self.sources)
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in produced]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on {missing} produced later or never")
+            produced.add(stage.name)
+
+    def run(self, sources, fingerprints, progress_callback=None, max_workers=None):
+        """
+        Run the pipeline.
+
+        Parameters:
+            sources (dict): {source name: value}.
+            fingerprints (dict): {source name: hashable fingerprint}.
+            progress_callback (callable): ``progress_callback(fraction, message)``,
+                called on the calling thread as each stage starts.
+            max_workers (int): Stages run at once (default: the pipeline's
+                ``max_workers``, else CPU count); 1 runs them in order, as
+                does an active ``Instrumentation(memory=True)``.
+
+        Returns:
+            tuple: (values, statuses). ``values`` holds the sources and every
+            stage output by name; ``statuses`` records whether each stage of
+            this run was 'cached', 'updated' or 'computed' (a run that raises
+            ``PipelineError`` carries them, with 'failed' / 'skipped', as
+            ``statuses``).
+        """
+        missing = [name for name in self.sources if name not in sources]
+        if missing:
+            raise ValueError(f"Pipeline sources missing: {missing}")
+        if max_workers is None:
+            max_workers = self.max_workers or os.cpu_count() or 1
+        instrumentation = current_instrumentation()
+        if instrumentation is not None and instrumentation.memory:
+            # tracemalloc keeps one process-wide peak, which each stage resets:
+            # overlapping stages would reset and share each other's peaks.
+            max_workers = 1
+
+        with self._lock:
+            values = dict(sources)
+            prints = {name: fingerprints[name] for name in self.sources}
+            statuses = {}
+            errors, skipped = {}, []
+            pending = list(self.stages)
+            running = {}
+            started = 0
+
+            executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+            try:
+                while pending or running:
+                    for stage in list(pending):
+                        if any(name in errors or name in skipped for name in stage.inputs):
+                            pending.remove(stage)
+                            skipped.append(stage.name)
+                            statuses[stage.name] = "skipped"
+                            continue
+                        if not all(name in values for name in stage.inputs):
+                            continue
+                        pending.remove(stage)
+                        if progress_callback is not None:
+                            progress_callback(started / len(self.stages), stage.label)
+                        started += 1
+
+                        fingerprint = hash((stage.name,) + tuple(prints[name] for name in stage.inputs))
+                        args = [values[name] for name in stage.inputs]
+                        if executor is None or stage.concurrency == "serial":
+                            outcome = self._execute(stage, fingerprint, args)
+                            self._finish(stage, fingerprint, args, outcome, values, prints, errors, statuses)
+                        else:
+                            # Workers see the caller's context, so their records
+                            # nest under the caller's instrumentation stage.
+                            context = contextvars.copy_context()
+                            future = executor.submit(context.run, self._execute, stage, fingerprint, args)
+                            running[future] = (stage, fingerprint, args)
+                        if executor is None:
+                            break
+
+                    if running:
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            stage, fingerprint, args = running.pop(future)
+                            self._finish(stage, fingerprint, args, future.result(), values, prints, errors,
+                                         statuses)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+            if errors:
+                raise PipelineError(errors, skipped, values, statuses)
+            return values, statuses
+
+    def _execute(self, stage, fingerprint, args):
+        """
+        Produce one stage's output. Returns (output, status) or (StageError,
+        'failed'); exceptions never escape, so one failure cannot cancel
+        stages running alongside it.
+        """
+        entry = self._entries.get(stage.name)
+        try:
+            with track(stage.name, concurrency=stage.concurrency) as record:
+                if entry is not None and entry[0] == fingerprint:
+                    output, status = entry[2], "cached"
+                else:
+                    output, status = None, "computed"
+                    if entry is not None and stage.update is not None:
+                        try:
+                            output, status = self._call(stage, stage.update, entry[2], entry[1], *args), "updated"
+                        except Recompute:
+                            pass
+                    if status == "computed":
+                        output = self._call(stage, stage.compute, *args)
+                record["status"] = status
+            return output, status
+        except Exception as exc:
+            return StageError(stage.name, exc), "failed"
+
+    def _call(self, stage, fn, *args):
+        if stage.concurrency != "process":
+            return fn(*args)
+        pool = self.process_pool
+        if pool is None:
+            from Analytics.ExecutionBackend import get_default_backend
+            pool = get_default_backend()
+        return pool.submit(fn, *args).result()
+
+    def _finish(self, stage, fingerprint, args, outcome, values, prints, errors, statuses):
+        output, status = outcome
+        statuses[stage.name] = status
+        if status == "failed":
+            errors[stage.name] = output
+            return
+        self._entries[stage.name] = (fingerprint, args, output)
+        values[stage.name] = output
+        prints[stage.name] = fingerprint
+
+    def outputs(self):
+        """
+        The last output kept for each stage, by name.
+        """
+        with self._lock:
+            return {name: entry[2] for name, entry in self._entries.items()}
+
+    def invalidate(self, name=None):
+        """
+        Drop the cached output of one stage, or of every stage.
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
@@ -0,0 +1,461 @@
+# Analytics/PortfolioTable.py
+
+import copy
+import hashlib
+import inspect
+import numpy as np
+import pandas as pd
+
+
+# Per type: (attribute, kind, constructor argument). Attributes with no
+# constructor argument are derived by the constructor (e.g. a swap's
+# day_count from its fixed leg).
+TABLE_SCHEMAS = {
+    "Bond": [
+        ("notional", "float", "notional"),
+        ("coupon_rate", "float", "coupon_rate"),
+        ("yield_rate", "float", "yield_rate"),
+        ("issue_date", "date", "issue_date"),
+        ("maturity_date", "date", "maturity_date"),
+        ("frequency", "int", "frequency"),
+        ("day_count", "category", "day_count"),
+        ("country", "category", "country"),
+        ("instrument_subtype", "category", "instrument_subtype"),
+    ],
+    "Mortgage": [
+        ("notional", "float", "notional"),
+        ("coupon_rate", "float", "coupon_rate"),
+        ("yield_rate", "float", "yield_rate"),
+        ("issue_date", "date", "issue_date"),
+        ("maturity_date", "date", "maturity_date"),
+        ("term_months", "int", "term_months"),
+        ("day_count", "category", "day_count"),
+        ("country", "category", "country"),
+    ],
+    "DemandDeposit": [
+        ("notional", "float", "notional"),
+        ("rate", "float", "rate"),
+        ("yield_rate", "float", "yield_rate"),
+        ("issue_date", "date", "issue_date"),
+        ("maturity_date", "date", "maturity_date"),
+        ("decay_term_months", "int", "decay_term_months"),
+        ("frequency", "int", "frequency"),
+        ("day_count", "category", "day_count"),
+        ("country", "category", "country"),
+    ],
+    "InterestRateSwap": [
+        ("notional", "float", "notional"),
+        ("coupon_rate", "float", "fixed_rate"),
+        ("float_spread", "float", "float_spread"),
+        ("yield_rate", "float", "yield_rate"),
+        ("issue_date", "date", "start_date"),
+        ("maturity_date", "date", "end_date"),
+        ("pay_fixed", "bool", "pay_fixed"),
+        ("frequency", "int", "frequency"),
+        ("day_count", "category", None),
+        ("fixed_leg_day_count", "category", "fixed_leg_day_count"),
+        ("float_leg_day_count", "category", "float_leg_day_count"),
+        ("country", "category", "country"),
+    ],
+}
+
+_NUMERIC_DTYPES = {"float": float, "int": np.int64, "bool": bool}
+
+# Per-object attributes that change projected cashflows but are not columns.
+OBJECT_ATTRIBUTES = {"InterestRateSwap": ("zero_curve", "forward_curve")}
+
+
+def instrument_classes():
+    # Imported lazily: the instrument modules import the analytics kernel.
+    from Instruments.Bond import Bond
+    from Instruments.Mortgage import Mortgage
+    from Instruments.DemandDeposit import DemandDeposit
+    from Instruments.InterestRateSwap import InterestRateSwap
+    return {"Bond": Bond, "Mortgage": Mortgage, "DemandDeposit": DemandDeposit,
+            "InterestRateSwap": InterestRateSwap}
+
+
+def _to_dates(values):
+    """
+    datetime64[D] array from dates in any form; missing values become NaT.
+    Distinct values are parsed once.
+    """
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[D]")
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    lookup = np.append(pd.to_datetime(uniques).to_numpy().astype("datetime64[D]"), np.datetime64("NaT", "D"))
+    return lookup[codes]
+
+
+def _encode(values, kind):
+    """
+    Returns:
+        tuple: (array, categories) where categories is None except for
+        categorical columns, which are stored as int32 codes (-1 = missing).
+    """
+    if kind == "date":
+        return _to_dates(values), None
+    if kind == "category":
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        return codes.astype(np.int32), list(uniques)
+    return np.asarray(values, dtype=_NUMERIC_DTYPES[kind]), None
+
+
+class InstrumentView:
+    """
+    Read-only, attribute-style access to one row of a ``PortfolioTable``.
+
+    A view holds only a reference to its table and a row number; attributes
+    are decoded on access (dates as Timestamps, categorical codes as labels).
+    ``to_instrument`` builds the full instrument object when one is needed.
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.table.value(name, self.row)
+
+    @property
+    def instrument_type(self):
+        return self.table.instrument_type
+
+    def to_instrument(self):
+        return self.table.instrument(self.row)
+
+    def __repr__(self):
+        return f"InstrumentView({self.table.instrument_type}, ID={self.ID!r})"
+
+
+class PortfolioTable:
+    """
+    Columnar store for all instruments of one type.
+
+    Every attribute in ``TABLE_SCHEMAS`` is one typed NumPy array: floats,
+    int64, bool, dates as ``datetime64[D]`` and day count, country and subtype
+    as int32 codes into ``categories``. The analytics read whole columns
+    (``table["notional"]``) instead of one attribute per object.
+
+    Parameters:
+        instrument_type (str): Instrument class name.
+        ids: Instrument IDs.
+        columns (dict): {attribute: array}.
+        categories (dict): {attribute: labels} for categorical columns.
+        shared (dict): Attributes common to every row, e.g. a swap book's
+            zero_curve and forward_curve.
+        positions: Each row's position in the portfolio the table belongs to;
+            None for a standalone table (rows in order).
+    """
+
+    def __init__(self, instrument_type, ids, columns, categories=None, shared=None, positions=None):
+        self.instrument_type = instrument_type
+        self.ids = np.asarray(ids, dtype=object)
+        self.columns = columns
+        self.categories = categories or {}
+        self.shared = shared or {}
+        self.positions = None if positions is None else np.asarray(positions, dtype=np.int64)
+        self._instruments = None
+        self._row_keys = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        return (InstrumentView(self, row) for row in range(len(self)))
+
+    def __repr__(self):
+        return f"PortfolioTable({self.instrument_type}, rows={len(self)})"
+
+    @property
+    def instrument_class(self):
+        return instrument_classes()[self.instrument_type]
+
+    @property
+    def schema(self):
+        return TABLE_SCHEMAS.get(self.instrument_type, [])
+
+    @property
+    def compounding_frequency(self):
+        """
+        Per-row compounding frequency used when discounting at ``yield_rate``.
+        """
+        fixed = getattr(self.instrument_class, "COMPOUNDING_FREQUENCY", None)
+        if fixed is not None:
+            return np.full(len(self), fixed, dtype=np.int64)
+        return self.columns["frequency"]
+
+    def labels(self, name):
+        """
+        Decoded labels of a categorical column (None where missing).
+        """
+        lookup = np.array(list(self.categories[name]) + [None], dtype=object)
+        return lookup[self.columns[name]]
+
+    def value(self, name, row):
+        """
+        One attribute of one row as the instrument object would hold it.
+        """
+        if name == "ID":
+            return self.ids[row]
+        if name in self.columns:
+            raw = self.columns[name][row]
+            if name in self.categories:
+                return None if raw < 0 else self.categories[name][raw]
+            if isinstance(raw, np.datetime64):
+                return None if np.isnat(raw) else pd.Timestamp(raw)
+            return raw.item()
+        if name in self.shared:
+            return self.shared[name]
+        raise AttributeError(f"{self.instrument_type} table has no attribute '{name}'")
+
+    def view(self, row):
+        return InstrumentView(self, row)
+
+    def instrument(self, row):
+        """
+        Full instrument object for one row (the original object when the
+        table was built from instruments).
+        """
+        if self._instruments is not None:
+            return self._instruments[row]
+        arguments = {"ID": self.ids[row]}
+        for attribute, _, argument in self.schema:
+            if argument is not None:
+                arguments[argument] = self.value(attribute, row)
+        return self.instrument_class(**arguments, **self.shared)
+
+    def to_instruments(self):
+        return [self.instrument(row) for row in range(len(self))]
+
+    def row_keys(self):
+        """
+        64-bit hash of each row's ID and terms, stable across table builds:
+        categorical columns are hashed by label, table-wide ``shared``
+        attributes and per-object OBJECT_ATTRIBUTES (e.g. swap curves) are
+        folded in. Computed once per table.
+        """
+        if self._row_keys is not None:
+            return self._row_keys
+        frame = {"ID": self.ids}
+        for name, values in self.columns.items():
+            if name in self.categories:
+                values = pd.Categorical.from_codes(values, categories=pd.Index(self.categories[name], dtype=object))
+            frame[name] = values
+        keys = pd.util.hash_pandas_object(pd.DataFrame(frame), index=False).to_numpy()
+
+        tokens = [self.instrument_type] + [(name, _token(value)) for name, value in sorted(self.shared.items())]
+        keys = keys ^ pd.util.hash_array(np.array([str(tokens)], dtype=object))[0]
+
+        attributes = OBJECT_ATTRIBUTES.get(self.instrument_type, ())
+        if self._instruments is not None and attributes:
+            object_tokens = pd.util.hash_array(np.array(
+                [str(tuple(_token(getattr(inst, a, None)) for a in attributes)) for inst in self._instruments],
+                dtype=object))
+            keys = pd.util.hash_array(keys ^ object_tokens)
+        self._row_keys = keys
+        return keys
+
+    def with_positions(self, positions):
+        """
+        Shallow copy sharing this table's arrays, placed at ``positions``.
+        """
+        table = copy.copy(self)
+        table.positions = np.asarray(positions, dtype=np.int64)
+        return table
+
+    def take(self, rows):
+        """
+        New table holding the given rows.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        table = PortfolioTable(self.instrument_type, self.ids[rows],
+                               {name: values[rows] for name, values in self.columns.items()},
+                               self.categories, self.shared,
+                               None if self.positions is None else self.positions[rows])
+        if self._instruments is not None:
+            table._instruments = [self._instruments[row] for row in rows]
+        if self._row_keys is not None:
+            table._row_keys = self._row_keys[rows]
+        return table
+
+    @classmethod
+    def from_instruments(cls, instruments, positions=None):
+        """
+        Build a table from instrument objects of one type. The objects are
+        kept so that types without a batch generator can still use them.
+        """
+        instrument_type = type(instruments[0]).__name__ if instruments else None
+        columns, categories = {}, {}
+        for attribute, kind, _ in TABLE_SCHEMAS.get(instrument_type, []):
+            columns[attribute], labels = _encode([getattr(inst, attribute) for inst in instruments], kind)
+            if labels is not None:
+                categories[attribute] = labels
+
+        table = cls(instrument_type, [inst.ID for inst in instruments], columns, categories, positions=positions)
+        table._instruments = list(instruments)
+        return table
+
+    @classmethod
+    def from_arguments(cls, instrument_type, ids, arguments, shared=None):
+        """
+        Build a table straight from column data keyed by constructor argument,
+        without creating one object per row.
+
+        Arguments not supplied take the constructor's default. Conventions the
+        constructors derive (India day-count overrides, a swap's day_count)
+        are resolved by constructing one instrument per distinct combination
+        of categorical inputs and reading its attributes back.
+        """
+        schema = TABLE_SCHEMAS[instrument_type]
+        parameters = inspect.signature(instrument_classes()[instrument_type]).parameters
+        n = len(ids)
+
+        columns, categories = {}, {}
+        for attribute, kind, argument in schema:
+            if argument is None:
+                values = [None] * n
+            elif argument in arguments:
+                values = arguments[argument]
+            else:
+                values = [parameters[argument].default] * n
+            columns[attribute], labels = _encode(values, kind)
+            if labels is not None:
+                categories[attribute] = labels
+
+        table = cls(instrument_type, ids, columns, categories, shared)
+        table._resolve_conventions()
+        return table
+
+    def _resolve_conventions(self):
+        inputs = [a for a, kind, argument in self.schema if kind == "category" and argument is not None]
+        outputs = [a for a, kind, _ in self.schema if kind == "category"]
+        if not len(self) or not outputs:
+            return
+
+        combined = np.column_stack([self.columns[a] for a in inputs])
+        uniques, first, groups = np.unique(combined, axis=0, return_index=True, return_inverse=True)
+        groups = groups.ravel()
+
+        resolved = {a: [] for a in outputs}
+        for row in first:
+            inst = self.instrument(row)
+            for attribute in outputs:
+                resolved[attribute].append(getattr(inst, attribute))
+
+        for attribute in outputs:
+            codes, labels = _encode(resolved[attribute], "category")
+            self.columns[attribute] = codes[groups]
+            self.categories[attribute] = labels
+
+
+def _token(value):
+    """
+    Hashable stand-in for attribute values such as curves.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "token"):
+        return value.token
+    if isinstance(value, pd.DataFrame):
+        return int.from_bytes(hashlib.blake2b(value.to_numpy().tobytes(), digest_size=8).digest(), "little")
+    return id(value)
+
+
+def _portfolio_keys(portfolio):
+    tables = as_tables(portfolio)
+    keys = np.zeros(sum(len(table) for table in tables), dtype=np.uint64)
+    for table in tables:
+        keys[table.positions] = table.row_keys()
+    return keys
+
+
+def portfolio_fingerprint(portfolio):
+    """
+    Hashable fingerprint of a whole portfolio: every instrument's row key in
+    portfolio order.
+    """
+    return hash(_portfolio_keys(portfolio).tobytes())
+
+
+def portfolio_digest(portfolio):
+    """
+    Hex digest of the same row keys, identical across processes and hosts
+    (``portfolio_fingerprint`` is only stable within one process); keys
+    stored results.
+    """
+    return hashlib.blake2b(_portfolio_keys(portfolio).tobytes(), digest_size=8).hexdigest()
+
+
+def is_table_portfolio(portfolio):
+    if isinstance(portfolio, (PortfolioTable, dict)):
+        return True
+    return bool(portfolio) and isinstance(portfolio[0], PortfolioTable)
+
+
+def as_tables(portfolio):
+    """
+    Normalize a portfolio to a list of PortfolioTables with positions set.
+
+    Accepts a list of instrument objects (grouped by type; positions keep
+    the list order), a single PortfolioTable, or a list or dict of tables
+    (positions follow the tables in order).
+    """
+    if isinstance(portfolio, PortfolioTable):
+        portfolio = [portfolio]
+    elif isinstance(portfolio, dict):
+        portfolio = list(portfolio.values())
+
+    if is_table_portfolio(portfolio):
+        if all(table.positions is not None for table in portfolio):
+            return list(portfolio)
+        tables, offset = [], 0
+        for table in portfolio:
+            tables.append(table.with_positions(np.arange(offset, offset + len(table))))
+            offset += len(table)
+        return tables
+
+    groups = {}
+    for position, inst in enumerate(portfolio):
+        groups.setdefault(type(inst).__name__, []).append(position)
+    return [PortfolioTable.from_instruments([portfolio[i] for i in positions], positions)
+            for positions in groups.values()]
+
+
+def portfolio_size(portfolio):
+    if is_table_portfolio(portfolio):
+        return sum(len(table) for table in as_tables(portfolio))
+    return len(portfolio)
+
+
+def portfolio_ids(portfolio):
+    """
+    Instrument IDs in portfolio order, for instrument lists or tables.
+    """
+    if not is_table_portfolio(portfolio):
+        return [inst.ID for inst in portfolio]
+    tables = as_tables(portfolio)
+    ids = np.empty(sum(len(table) for table in tables), dtype=object)
+    for table in tables:
+        ids[table.positions] = table.ids
+    return ids.tolist()
+
+
+def portfolio_types(portfolio):
+    """
+    Instrument type names in portfolio order, as an array.
+    """
+    if not is_table_portfolio(portfolio):
+        return np.array([type(inst).__name__ for inst in portfolio], dtype=object)
+    tables = as_tables(portfolio)
+    types = np.empty(sum(len(table) for table in tables), dtype=object)
+    for table in tables:
+        types[table.positions] = table.instrument_type
+    return types
@@ -1,12 +1,8 @@
-from concurrent.futures import ProcessPoolExecutor
+from Analytics.ExecutionBackend import get_default_backend
+from Analytics.PortfolioTable import portfolio_ids
+from Analytics.RiskKernel import compute_risk_measures
 
 
-def _price_instrument(args):
-    instrument, valuation_date = args
-    return instrument.ID, instrument.calculate_price(valuation_date=valuation_date)
-
-
-def calculate_prices_for_portfolio(instruments, valuation_date=None):
-    with ProcessPoolExecutor() as executor:
-        results = executor.map(_price_instrument, [(inst, valuation_date) for inst in instruments])
-    return {ID: round(price, 4) for ID, price in results}
+def calculate_prices_for_portfolio(instruments, valuation_date=None, backend=None):
+    measures = compute_risk_measures(instruments, valuation_date, backend=backend or get_default_backend())
+    return {inst_id: round(price, 4) for inst_id, price in zip(portfolio_ids(instruments), measures["price"])}
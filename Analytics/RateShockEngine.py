@@ -1,42 +1,22 @@
 # Analytics/RateShockEngine.py
 
-import pandas as pd
+from Analytics.ScenarioEngine import DEFAULT_SHOCKS_BPS, run_rate_shock_scenarios
 
 
-def apply_parallel_rate_shocks(portfolio):
+def apply_parallel_rate_shocks(portfolio, shocks=None, valuation_date=None,
+                               shock_type="multiplicative", cashflow_table=None, prepayment=None):
     """
-    Apply +100bps and -100bps parallel rate shocks to each instrument and calculate new market values.
+    Apply parallel rate shocks to each instrument and calculate new market values.
+
+    Shocks default to -200/-100/0/+100/+200 bps applied multiplicatively to each
+    discount rate (+100bps = rate * 1.01); pass ``shock_type="additive"`` for
+    absolute bps moves. Pricing runs through the matrix scenario engine, so
+    instruments are never copied and any shock grid is supported. A
+    rate-dependent ``prepayment`` model re-projects mortgages at each
+    shocked rate level (see ``run_rate_shock_scenarios``).
     """
-    shocks = [-200, -100, 0, 100, 200]  # Shock scenarios in basis points
-    results = []
+    if shocks is None:
+        shocks = DEFAULT_SHOCKS_BPS
 
-    for shock in shocks:
-        shock_multiplier = 1 + (shock / 10000)  # E.g., +100bps = 1.01, -100bps = 0.99
-
-        total_market_value = 0.0
-
-        for inst in portfolio:
-            try:
-                shocked_yield = inst.yield_rate * shock_multiplier
-                inst_copy = type(inst)(**inst.__dict__)  # Deep copy to avoid changing original
-                inst_copy.yield_rate = shocked_yield
-
-                price = inst_copy.calculate_price()
-
-                total_market_value += price
-
-            except Exception as e:
-                print(f"⚠️ Error processing shock for instrument {inst.ID}: {e}")
-
-        results.append({
-            "Shock (bps)": shock,
-            "Portfolio Market Value": total_market_value,
-        })
-
-    df = pd.DataFrame(results)
-
-    # Add the "Change in Market Value" column
-    base_value = df.loc[df['Shock (bps)'] == 0, 'Portfolio Market Value'].values[0]
-    df["Change in Market Value"] = df["Portfolio Market Value"] - base_value
-
-    return df
+    return run_rate_shock_scenarios(portfolio, shocks, valuation_date, shock_type,
+                                    cashflow_table, prepayment)["portfolio"]
@@ -0,0 +1,170 @@
+# Analytics/RiskKernel.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from Analytics.BatchCashflowEngine import BATCH_GENERATORS, generate_cashflow_table
+from Analytics.DayCount import DEFAULT_DAY_COUNT, day_count_codes, year_fraction
+from Analytics.Instrumentation import counts_by_type, track
+from Analytics.PortfolioTable import as_tables
+from Analytics.SwapBookEngine import SWAP_TYPE, swap_discount_inputs
+
+
+RISK_MEASURES = ["price", "macaulay", "modified", "convexity", "dv01"]
+
+# Types discounted off their own curves, with a whole-table input builder.
+CURVE_INPUTS = {SWAP_TYPE: swap_discount_inputs}
+
+
+def discount_cashflows(instrument_index, t, amounts, rates, frequency, n_instruments):
+    """
+    Discount every cashflow once and reduce to per-instrument risk measures.
+
+    Each cashflow is discounted at ``(1 + rate / frequency) ** (-frequency * t)``;
+    the same present values feed price, duration and convexity.
+
+    Parameters:
+        instrument_index (array): Owning instrument (0..n_instruments-1) of each cashflow.
+        t (array): Time to payment in years.
+        amounts (array): Cashflow amounts.
+        rates (array): Discount rate applied to each cashflow.
+        frequency (array): Compounding frequency of each cashflow's rate.
+        n_instruments (int): Number of instruments.
+
+    Returns:
+        dict: {measure: array of length n_instruments} for RISK_MEASURES.
+        Modified duration uses the instrument's average discount rate.
+    """
+    index = np.asarray(instrument_index, dtype=np.int64)
+    t = np.asarray(t, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    frequency = np.asarray(frequency, dtype=float)
+
+    growth = 1 + rates / frequency
+    pv = np.asarray(amounts, dtype=float) * growth ** (-frequency * t)
+
+    price = np.bincount(index, pv, minlength=n_instruments)
+    weighted_time = np.bincount(index, t * pv, minlength=n_instruments)
+    curvature = np.bincount(index, pv * t * (t + 1 / frequency) / growth ** 2, minlength=n_instruments)
+
+    count = np.bincount(index, minlength=n_instruments)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_growth = 1 + np.bincount(index, rates / frequency, minlength=n_instruments) / count
+        macaulay = weighted_time / price
+        modified = macaulay / mean_growth
+        convexity = curvature / price
+
+    return {
+        "price": price,
+        "macaulay": macaulay,
+        "modified": modified,
+        "convexity": convexity,
+        "dv01": modified * price * 1e-4,
+    }
+
+
+def build_discount_inputs(instruments, valuation_date, cashflow_table=None, prepayment=None):
+    """
+    Assemble the flat cashflow arrays consumed by ``discount_cashflows``.
+
+    Instrument types with a batch generator are taken from the long-format
+    cashflow table (projected here if not supplied) and discounted at their
+    ``yield_rate``; types in ``CURVE_INPUTS`` are built a table at a time off
+    their curves, and any others supply their own ``_discount_inputs``.
+    Times are year fractions under each instrument's day-count convention.
+
+    Parameters:
+        instruments: Instrument objects or PortfolioTables (see ``as_tables``).
+        prepayment (PrepaymentModel): Prepayment model used when the cashflow
+            table is projected here.
+
+    Returns:
+        tuple: (instrument_index, t, amounts, rates, frequency, failed) where
+        ``failed`` lists the positions of instruments that could not be set up.
+    """
+    valuation_date = pd.Timestamp(valuation_date)
+    tables = as_tables(instruments)
+    n = sum(len(table) for table in tables)
+    batch_tables = [table for table in tables if table.instrument_type in BATCH_GENERATORS]
+
+    is_batch = np.zeros(n, dtype=bool)
+    yields = np.zeros(n)
+    frequencies = np.ones(n)
+    conventions = np.full(n, DEFAULT_DAY_COUNT, dtype=np.int8)
+    for table in batch_tables:
+        is_batch[table.positions] = True
+        yields[table.positions] = table["yield_rate"]
+        frequencies[table.positions] = table.compounding_frequency
+        # Codes are looked up once per category; -1 (missing) takes the default.
+        lookup = np.append(day_count_codes(table.categories["day_count"]), DEFAULT_DAY_COUNT)
+        conventions[table.positions] = lookup[table["day_count"]]
+
+    if cashflow_table is None:
+        cashflow_table = generate_cashflow_table(batch_tables, prepayment, valuation_date)
+    else:
+        cashflow_table = cashflow_table[is_batch[cashflow_table["instrument_index"].to_numpy()]]
+
+    index = cashflow_table["instrument_index"].to_numpy()
+    t = year_fraction(valuation_date.to_datetime64(), cashflow_table["payment_date"].to_numpy(), conventions[index])
+
+    segments = [(index, t,
+                 cashflow_table["interest"].to_numpy() + cashflow_table["principal"].to_numpy(),
+                 yields[index], frequencies[index])]
+    failed = []
+
+    for table in tables:
+        if table.instrument_type in BATCH_GENERATORS:
+            continue
+        if table.instrument_type in CURVE_INPUTS:
+            *arrays, missing = CURVE_INPUTS[table.instrument_type](table, valuation_date)
+            segments.append(tuple(arrays))
+            for position in missing:
+                print(f"Error calculating price or duration for {table.ids[table.positions == position][0]}: "
+                      f"no zero or forward curve attached")
+            failed.extend(missing)
+            continue
+        for row, position in enumerate(table.positions):
+            try:
+                t, amounts, rates, frequency = table.instrument(row)._discount_inputs(valuation_date)
+            except Exception as e:
+                print(f"Error calculating price or duration for {table.ids[row]}: {e}")
+                failed.append(position)
+                continue
+            segments.append((np.full(len(t), position), t, amounts, rates, np.full(len(t), frequency)))
+
+    return tuple(np.concatenate(arrays) for arrays in zip(*segments)) + (failed,)
+
+
+def compute_risk_measures(instruments, valuation_date=None, cashflow_table=None, backend=None, prepayment=None):
+    """
+    Price, Macaulay/modified duration, convexity and DV01 for a whole portfolio
+    in one discounting pass; mortgages prepay under ``prepayment`` when given.
+
+    ``backend`` (an ``ExecutionBackend``) spreads a large portfolio over its
+    worker pool, each worker setting up and discounting a chunk of whole
+    instruments from its slice of ``cashflow_table`` (projected there, with
+    ``prepayment``, when no table is given). Without a backend,
+    or below its size threshold, everything runs in-process.
+
+    Returns:
+        dict: {measure: array in portfolio order}; instruments that failed to
+        set up are NaN.
+    """
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+
+    tables = as_tables(instruments)
+    n_instruments = sum(len(table) for table in tables)
+    if backend is not None and backend.is_parallel(n_instruments):
+        with track("risk_chunks", instruments=counts_by_type(tables), workers=backend.max_workers) as record:
+            measures, failed = backend.risk_measures(tables, valuation_date, prepayment, cashflow_table)
+            record["failed"] = len(failed)
+    else:
+        with track("discount_inputs", instruments=counts_by_type(tables)) as record:
+            *inputs, failed = build_discount_inputs(tables, valuation_date, cashflow_table, prepayment)
+            record.update(rows=len(inputs[0]), failed=len(failed))
+        with track("discount_kernel", rows=len(inputs[0])):
+            measures = discount_cashflows(*inputs, n_instruments)
+    for values in measures.values():
+        values[failed] = np.nan
+    return measures
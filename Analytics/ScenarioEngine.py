@@ -0,0 +1,173 @@
+# Analytics/ScenarioEngine.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from Analytics.BatchCashflowEngine import PREPAYMENT_GENERATORS
+from Analytics.Instrumentation import track
+from Analytics.PortfolioTable import as_tables, portfolio_ids, portfolio_size, portfolio_types
+from Analytics.RiskKernel import build_discount_inputs
+
+
+DEFAULT_SHOCKS_BPS = [-200, -100, 0, 100, 200]
+
+
+def shock_grid(low_bps=-400, high_bps=400, count=400):
+    """
+    Evenly spaced additive shock grid in basis points, e.g. 400 shocks from -400 to +400.
+    """
+    return np.linspace(low_bps, high_bps, count)
+
+
+def _shock_rates(rates, shocks, shock_type):
+    if shock_type == "additive":
+        return rates[:, None] + shocks[None, :]
+    if shock_type == "multiplicative":
+        return rates[:, None] * (1 + shocks[None, :])
+    raise ValueError(f"Unknown shock_type '{shock_type}', expected 'additive' or 'multiplicative'")
+
+
+def price_rate_shifts(instrument_index, t, amounts, rates, frequency, n_instruments,
+                      shift_rates, n_scenarios, max_block=4_000_000):
+    """
+    Price every instrument under ``n_scenarios`` rate scenarios.
+
+    Cashflows, times and base rates are computed once by the caller; only the
+    discount factors are re-evaluated per scenario. Rows are processed in
+    blocks of at most ``max_block`` cashflow-scenario cells so memory stays
+    bounded for large grids.
+
+    Parameters:
+        shift_rates (callable): ``shift_rates(rates, t)`` for a block of
+            cashflows, returning the block x n_scenarios matrix of shocked rates.
+
+    Returns:
+        ndarray: instruments x scenarios matrix of present values.
+    """
+    order = np.argsort(instrument_index, kind="stable")
+    index = np.asarray(instrument_index, dtype=np.int64)[order]
+    t = np.asarray(t, dtype=float)[order]
+    amounts = np.asarray(amounts, dtype=float)[order]
+    rates = np.asarray(rates, dtype=float)[order]
+    frequency = np.asarray(frequency, dtype=float)[order]
+
+    values = np.zeros((n_instruments, n_scenarios))
+    block_rows = max(1, max_block // max(n_scenarios, 1))
+
+    for start in range(0, len(index), block_rows):
+        block = slice(start, start + block_rows)
+        block_index = index[block]
+        f = frequency[block, None]
+        shocked = shift_rates(rates[block], t[block])
+        pv = amounts[block, None] * (1 + shocked / f) ** (-f * t[block, None])
+
+        starts = np.flatnonzero(np.r_[True, block_index[1:] != block_index[:-1]])
+        values[block_index[starts]] += np.add.reduceat(pv, starts, axis=0)
+
+    return values
+
+
+def scenario_price_matrix(instrument_index, t, amounts, rates, frequency, n_instruments,
+                          shocks_bps, shock_type="additive", max_block=4_000_000):
+    """
+    Price every instrument under every parallel shock in ``shocks_bps``.
+
+    Parameters:
+        shock_type (str): 'additive' adds the shock to each rate,
+            'multiplicative' scales each rate by ``1 + shock / 10000``.
+
+    Returns:
+        ndarray: instruments x scenarios matrix of present values.
+    """
+    shocks = np.asarray(shocks_bps, dtype=float) / 10000
+    return price_rate_shifts(instrument_index, t, amounts, rates, frequency, n_instruments,
+                             lambda block_rates, _: _shock_rates(block_rates, shocks, shock_type),
+                             len(shocks), max_block)
+
+
+def _reprice_prepayments(matrix, portfolio, grid, valuation_date, shock_type, prepayment):
+    """
+    Overwrite the scenario values of prepayable instruments with prices of
+    cashflows re-projected at each scenario's rate level: the shocked yield
+    is the market rate driving a rate-dependent prepayment model, so falling
+    rates speed prepayments up and rising rates slow them down.
+    """
+    shocks = np.asarray(grid, dtype=float) / 10000
+    for table in as_tables(portfolio):
+        generator = PREPAYMENT_GENERATORS.get(table.instrument_type)
+        if generator is None or not len(table):
+            continue
+        local = table.with_positions(np.arange(len(table)))
+        market_rates = _shock_rates(np.asarray(table["yield_rate"], dtype=float), shocks, shock_type)
+        with track("prepayment_scenarios", instrument_type=table.instrument_type, instruments=len(table),
+                   scenarios=len(grid)):
+            for j, shock in enumerate(grid):
+                frame = generator(local, prepayment, market_rates[:, j])
+                *inputs, _ = build_discount_inputs(local, valuation_date, frame)
+                matrix[table.positions, j] = scenario_price_matrix(*inputs, len(table), [shock], shock_type)[:, 0]
+
+
+def run_rate_shock_scenarios(portfolio, shocks_bps=None, valuation_date=None,
+                             shock_type="additive", cashflow_table=None, prepayment=None):
+    """
+    Reprice the portfolio under a user-defined grid of parallel rate shocks.
+
+    Parameters:
+        portfolio: Instrument objects or PortfolioTables.
+        shocks_bps (array): Shock grid in basis points (default DEFAULT_SHOCKS_BPS).
+        valuation_date: Valuation date (default today).
+        shock_type (str): 'additive' or 'multiplicative'.
+        cashflow_table (DataFrame): Optional pre-computed long-format cashflows
+            (projected with ``prepayment`` when one is given).
+        prepayment (PrepaymentModel): Behavioural prepayment model for
+            mortgages. A rate-dependent model re-projects the mortgages once
+            per shock with the shocked yield as market rate, so their values
+            carry the prepayment (negative convexity) effect.
+
+    Returns:
+        dict: 'portfolio' (Shock (bps), Portfolio Market Value, Change in Market Value),
+        'by_type' (long format per instrument type), 'by_instrument'
+        (instruments x shocks market values) and 'matrix' (raw ndarray).
+    """
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+    shocks = np.asarray(DEFAULT_SHOCKS_BPS if shocks_bps is None else shocks_bps, dtype=float)
+    grid = shocks if (shocks == 0).any() else np.append(shocks, 0.0)
+
+    with track("discount_inputs") as record:
+        *inputs, failed = build_discount_inputs(portfolio, valuation_date, cashflow_table, prepayment)
+        record.update(rows=len(inputs[0]), failed=len(failed))
+    with track("scenario_matrix", rows=len(inputs[0]), scenarios=len(grid)):
+        matrix = scenario_price_matrix(*inputs, portfolio_size(portfolio), grid, shock_type)
+    if prepayment is not None and prepayment.rate_dependent:
+        _reprice_prepayments(matrix, portfolio, grid, valuation_date, shock_type, prepayment)
+    matrix[failed] = 0.0
+
+    zero = np.flatnonzero(grid == 0)[0]
+    ids = portfolio_ids(portfolio)
+    types = portfolio_types(portfolio).tolist()
+
+    by_instrument = pd.DataFrame(matrix[:, :len(shocks)], index=pd.Index(ids, name="ID"), columns=shocks)
+    by_instrument.columns.name = "Shock (bps)"
+
+    type_values = pd.DataFrame(matrix).groupby(np.array(types)).sum().to_numpy()
+    by_type = pd.DataFrame({
+        "Instrument Type": np.repeat(sorted(set(types)), len(shocks)),
+        "Shock (bps)": np.tile(shocks, len(type_values)),
+        "Market Value": type_values[:, :len(shocks)].ravel(),
+        "Change in Market Value": (type_values[:, :len(shocks)] - type_values[:, [zero]]).ravel(),
+    })
+
+    totals = matrix.sum(axis=0)
+    portfolio_df = pd.DataFrame({
+        "Shock (bps)": shocks,
+        "Portfolio Market Value": totals[:len(shocks)],
+        "Change in Market Value": totals[:len(shocks)] - totals[zero],
+    })
+
+    return {
+        "portfolio": portfolio_df,
+        "by_type": by_type,
+        "by_instrument": by_instrument,
+        "matrix": matrix[:, :len(shocks)],
+    }
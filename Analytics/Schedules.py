@@ -0,0 +1,147 @@
+# Analytics/Schedules.py
+
+import numpy as np
+import pandas as pd
+from Analytics.LRUCache import LRUCache
+
+
+# Roll conventions for month-based schedules.
+# "issue":   every date is start + n months, clamped to the target month's last
+#            day (``start + relativedelta(months=n)``).
+# "chained": each date is the previous one + step months, so a clamped day stays
+#            clamped (31-Jan, 30-Apr, 30-Jul, ...), like repeatedly adding
+#            ``relativedelta`` in a loop.
+# "eom":     as "issue", but a start on the last day of a month pays on the last
+#            day of every month.
+ROLL_CONVENTIONS = ("issue", "chained", "eom")
+
+# Schedules of single instruments (read-only datetime64[D] arrays), keyed on
+# (start day, frequency, count, roll).
+schedule_cache = LRUCache(maxsize=4096)
+
+
+def ragged_steps(counts):
+    """
+    Enumerate 1..counts[i] for every i.
+
+    Returns:
+        tuple: (owner, step) arrays where owner[j] is the position the j-th row
+        belongs to and step[j] its 1-based period number.
+    """
+    counts = np.clip(np.asarray(counts, dtype=np.int64), 0, None)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.cumsum(counts) - counts
+    step = np.arange(counts.sum(), dtype=np.int64) - np.repeat(offsets, counts) + 1
+    return owner, step
+
+
+def to_day_array(values):
+    """
+    Convert dates (Timestamps, strings, datetime64) to a datetime64[D] array.
+    """
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[D]")
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[D]")
+
+
+def _month_length(months):
+    """
+    Days in each month of a datetime64[M] array.
+    """
+    return ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+
+
+def add_months(dates, months):
+    """
+    Vectorized equivalent of ``date + relativedelta(months=n)``.
+
+    Days past the end of the target month are clamped to its last day, so
+    31-Jan + 1 month is 28/29-Feb exactly like ``relativedelta``.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    month_start = dates.astype("datetime64[M]")
+    day_offset = (dates - month_start.astype("datetime64[D]")).astype(np.int64)
+
+    target = month_start + np.asarray(months, dtype=np.int64)
+    return target.astype("datetime64[D]") + np.minimum(day_offset, _month_length(target) - 1)
+
+
+def _schedule_dates(starts, frequencies, steps, segments, roll):
+    """
+    Payment dates ``steps`` periods after ``starts`` (one row per payment);
+    ``segments`` numbers the schedule each row belongs to, increasing.
+    """
+    if roll not in ROLL_CONVENTIONS:
+        raise ValueError(f"Unknown roll convention '{roll}', expected one of {ROLL_CONVENTIONS}")
+
+    month_start = starts.astype("datetime64[M]")
+    day_offset = (starts - month_start.astype("datetime64[D]")).astype(np.int64)
+    target = month_start + steps * 12 // frequencies
+    last_day = _month_length(target) - 1
+
+    if roll == "chained":
+        # Running minimum of the month lengths within each schedule: shifting
+        # every schedule below all earlier ones lets one accumulate serve all.
+        shift = segments.astype(np.int64) * 64
+        last_day = np.minimum.accumulate(last_day - shift) + shift
+    elif roll == "eom":
+        at_month_end = day_offset == _month_length(month_start) - 1
+        day_offset = np.where(at_month_end, last_day, day_offset)
+    return target.astype("datetime64[D]") + np.minimum(day_offset, last_day)
+
+
+def month_schedule(start, frequency, count, roll="issue"):
+    """
+    The first ``count`` payment dates of a schedule paying ``frequency``
+    times a year from ``start``; period k falls ``floor(12 k / frequency)``
+    months after ``start``.
+
+    Schedules are cached and shared: the returned datetime64[D] array is
+    read-only.
+    """
+    start = np.datetime64(pd.Timestamp(start).date(), "D")
+    key = (int(start.astype(np.int64)), int(frequency), int(count), roll)
+
+    def build():
+        steps = np.arange(1, max(int(count), 0) + 1, dtype=np.int64)
+        dates = _schedule_dates(np.full(len(steps), start), np.int64(frequency), steps,
+                                np.zeros(len(steps), dtype=np.int64), roll)
+        dates.setflags(write=False)
+        return dates
+
+    return schedule_cache.get_or_compute(key, build)
+
+
+def batch_schedules(starts, frequencies, counts, roll="issue"):
+    """
+    Payment schedules for many instruments at once.
+
+    Instruments with identical (start, frequency, count) share one schedule:
+    the distinct schedules are generated with datetime64[M] arithmetic and
+    gathered for every instrument, so a mortgage pool with a few issue
+    months and terms does the date work only a few times.
+
+    Returns:
+        tuple: (owner, step, dates) with one row per payment, owner the
+        instrument's position in the inputs and step the 1-based period.
+    """
+    starts = to_day_array(starts)
+    n = len(starts)
+    frequencies = np.broadcast_to(np.asarray(frequencies, dtype=np.int64), (n,))
+    counts = np.clip(np.broadcast_to(np.asarray(counts, dtype=np.int64), (n,)), 0, None)
+
+    key = np.zeros(n, dtype=np.int64)
+    for column in (starts.astype(np.int64), frequencies, counts):
+        column_codes, column_uniques = pd.factorize(column)
+        key = key * len(column_uniques) + column_codes
+    codes, _ = pd.factorize(key)
+    first = np.empty(codes.max() + 1 if n else 0, dtype=np.int64)
+    first[codes[::-1]] = np.arange(n - 1, -1, -1)
+    unique_starts, unique_frequencies, unique_counts = starts[first], frequencies[first], counts[first]
+
+    segment, unique_step = ragged_steps(unique_counts)
+    unique_dates = _schedule_dates(unique_starts[segment], unique_frequencies[segment], unique_step, segment, roll)
+    offsets = np.cumsum(unique_counts) - unique_counts
+
+    owner, step = ragged_steps(counts)
+    return owner, step, unique_dates[offsets[codes[owner]] + step - 1]
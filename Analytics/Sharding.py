@@ -0,0 +1,268 @@
+# Analytics/Sharding.py
+
+import glob
+import json
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+from Analytics.Instrumentation import track
+from Analytics.PortfolioTable import as_tables, portfolio_ids
+from rbi.reporting import generate_rbi_reports
+
+
+# Additive result tables: (results key, key columns, sort columns). Partial
+# tables are summed per key; rows then follow the single-node order (sort
+# columns, else first appearance).
+SUMMED_TABLES = [
+    ("daily_agg", ["payment_date", "instrument_type"], ["payment_date", "instrument_type"]),
+    ("monthly_agg", ["Month", "instrument_type"], ["Month", "instrument_type"]),
+    ("rate_shock_results", ["Shock (bps)"], []),
+    ("rate_shock_by_type", ["Instrument Type", "Shock (bps)"], ["Instrument Type"]),
+    ("curve_scenario_results", ["Scenario"], []),
+    ("curve_scenario_by_type", ["Instrument Type", "Scenario"], ["Instrument Type"]),
+    ("nii_sensitivity", ["Shock (bps)"], []),
+    ("nii_by_type", ["Instrument Type", "Shock (bps)"], ["Instrument Type"]),
+    ("nii_monthly", ["Instrument Type", "Month", "Shock (bps)"], ["Instrument Type"]),
+]
+
+# One row per instrument; partials are interleaved back into portfolio order.
+INSTRUMENT_TABLES = ["pricing", "rate_shock_by_instrument", "key_rate_durations"]
+
+# Ratios recomputed from the merged sums instead of summed.
+DERIVED_COLUMNS = {"nii_sensitivity": ["Change (%)"]}
+
+MANIFEST = "manifest.json"
+
+
+def shard_of(ids, shards):
+    """
+    Shard of each instrument: CRC-32 of its ID (as text) modulo ``shards``.
+    Stable across processes, hosts and Python versions, unlike ``hash``.
+    """
+    return np.fromiter((zlib.crc32(str(ID).encode("utf-8")) for ID in ids), dtype=np.int64,
+                       count=len(ids)) % shards
+
+
+def _ids_checksum(ids):
+    checksum = 0
+    for ID in ids:
+        checksum = zlib.crc32(str(ID).encode("utf-8") + b"\n", checksum)
+    return checksum
+
+
+def select_shard(portfolio, shard, shards):
+    """
+    The positions of ``portfolio`` that fall in ``shard`` of ``shards``.
+
+    Returns:
+        tuple: (tables, info). ``tables`` hold the shard's rows renumbered
+        0..m-1 in portfolio order, so they run as a standalone portfolio;
+        ``info`` records shard, shards, the rows' portfolio ``positions``
+        and the whole portfolio's size and ID checksum, which
+        ``merge_partials`` checks every partial agrees on.
+    """
+    if not 0 <= shard < shards:
+        raise ValueError(f"Shard {shard} out of range for {shards} shards")
+    tables = as_tables(portfolio)
+    ids = portfolio_ids(tables)
+
+    selected = [table.take(np.flatnonzero(shard_of(table.ids, shards) == shard)) for table in tables]
+    selected = [table for table in selected if len(table)]
+    positions = np.sort(np.concatenate([table.positions for table in selected])) if selected \
+        else np.empty(0, dtype=np.int64)
+    local = [table.with_positions(np.searchsorted(positions, table.positions)) for table in selected]
+
+    info = {
+        "shard": int(shard),
+        "shards": int(shards),
+        "positions": positions,
+        "portfolio_instruments": len(ids),
+        "portfolio_checksum": _ids_checksum(ids),
+    }
+    return local, info
+
+
+def _subsequence(ids, subset):
+    """
+    Row in ``ids`` of each element of ``subset``, an in-order subsequence of
+    ``ids`` (pricing drops the instruments it could not price).
+    """
+    index = pd.Index(ids)
+    if index.is_unique:
+        return index.get_indexer(subset)
+    rows, row = np.empty(len(subset), dtype=np.int64), 0
+    for i, ID in enumerate(subset):
+        while ids[row] != ID:
+            row += 1
+        rows[i], row = row, row + 1
+    return rows
+
+
+def partial_name(shard, shards):
+    return f"shard-{shard:05d}-of-{shards:05d}"
+
+
+def write_partial(results, directory, valuation_date):
+    """
+    Write the mergeable part of a sharded ``run_alm`` (``results["shard"]``
+    set) to ``directory/shard-XXXXX-of-YYYYY``: one Parquet file per summed
+    and per-instrument table plus a JSON manifest. Per-instrument tables
+    carry each row's portfolio position as an extra index level. Cashflow
+    detail and RBI reports are not written; the reports are rebuilt from
+    the merged sums.
+
+    Returns:
+        str: The partial's directory.
+    """
+    info = results["shard"]
+    path = os.path.join(directory, partial_name(info["shard"], info["shards"]))
+    os.makedirs(path, exist_ok=True)
+    positions = np.asarray(info["positions"])
+
+    tables = []
+    with track("write_partial", shard=info["shard"], instruments=len(positions)):
+        for key, _, _ in SUMMED_TABLES:
+            if results.get(key) is not None:
+                results[key].to_parquet(os.path.join(path, f"{key}.parquet"))
+                tables.append(key)
+
+        ids = results["rate_shock_by_instrument"].index.to_numpy() if "rate_shock_by_instrument" in results else []
+        for key in INSTRUMENT_TABLES:
+            df = results.get(key)
+            if df is None:
+                continue
+            if df.index.name is None:
+                df = df.set_index(pd.Index(positions[_subsequence(ids, df["ID"].to_numpy())], name="position"))
+            else:
+                df = df.set_index(pd.Index(positions, name="position"), append=True)
+            df.to_parquet(os.path.join(path, f"{key}.parquet"))
+            tables.append(key)
+
+    manifest = {key: value for key, value in info.items() if key != "positions"}
+    manifest.update(instruments=len(positions), valuation_date=pd.Timestamp(valuation_date).isoformat(),
+                    tables=tables)
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def read_partial(path):
+    """
+    Returns:
+        tuple: (manifest, {results key: DataFrame}) of one partial.
+    """
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    tables = {key: pd.read_parquet(os.path.join(path, f"{key}.parquet")) for key in manifest["tables"]}
+    return manifest, tables
+
+
+def partial_paths(paths):
+    """
+    Partial directories among ``paths``; a directory that is not itself a
+    partial contributes the shard-* partials inside it.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    found = []
+    for path in paths:
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            found.append(str(path))
+        else:
+            found.extend(sorted(p for p in glob.glob(os.path.join(path, "shard-*"))
+                                if os.path.exists(os.path.join(p, MANIFEST))))
+    return found
+
+
+def _check_partials(manifests):
+    """
+    Every partial must come from the same portfolio, shard count and
+    valuation date, and every shard must be present exactly once.
+    """
+    if not manifests:
+        raise ValueError("No partial results to merge")
+    first = manifests[0]
+    for field in ("shards", "portfolio_instruments", "portfolio_checksum", "valuation_date"):
+        values = {manifest[field] for manifest in manifests}
+        if len(values) > 1:
+            raise ValueError(f"Partial results disagree on {field}: {sorted(values, key=str)}")
+
+    seen = [manifest["shard"] for manifest in manifests]
+    missing = sorted(set(range(first["shards"])) - set(seen))
+    duplicates = sorted({shard for shard in seen if seen.count(shard) > 1})
+    if missing or duplicates:
+        raise ValueError(f"Incomplete partial results: missing shards {missing}, duplicated shards {duplicates}")
+    if sum(manifest["instruments"] for manifest in manifests) != first["portfolio_instruments"]:
+        raise ValueError("Partial results do not cover the portfolio")
+
+
+def _sum_tables(frames, keys, order):
+    merged = pd.concat(frames, ignore_index=True).groupby(keys, sort=False, as_index=False, dropna=False).sum()
+    merged = merged[frames[0].columns]
+    if order:
+        merged = merged.sort_values(order, kind="stable")
+    return merged.reset_index(drop=True)
+
+
+def _interleave(frames):
+    merged = pd.concat(frames).sort_index(level="position", sort_remaining=False, kind="stable")
+    if merged.index.nlevels == 1:
+        return merged.reset_index(drop=True)
+    return merged.droplevel("position")
+
+
+def merge_partials(paths):
+    """
+    Combine the partial results of every shard into the results of a
+    single-node ``run_alm`` on the whole portfolio.
+
+    Summed tables (daily / monthly cashflows by type, shock and curve
+    scenario values, NII) are added up per key and per-instrument tables
+    (pricing, shock values, key-rate durations) are put back in portfolio
+    order; totals match the single-node run up to floating-point summation
+    order. The RBI reports, including the liquidity bucket sums, are rebuilt
+    from the merged tables.
+
+    Parameters:
+        paths: Partial directories, or directories holding them.
+
+    Returns:
+        dict: ``run_alm``-style results without per-instrument cashflows,
+        plus 'shards' and 'valuation_date'.
+    """
+    paths = partial_paths(paths)
+    partials = [read_partial(path) for path in paths]
+    manifests = [manifest for manifest, _ in partials]
+    _check_partials(manifests)
+    valuation_date = pd.Timestamp(manifests[0]["valuation_date"])
+
+    results = {}
+    with track("merge_partials", shards=len(partials)):
+        for key, keys, order in SUMMED_TABLES:
+            frames = [tables[key] for _, tables in partials if key in tables]
+            if frames:
+                frames = [frame.drop(columns=DERIVED_COLUMNS.get(key, []), errors="ignore") for frame in frames]
+                results[key] = _sum_tables(frames, keys, order)
+        for key in INSTRUMENT_TABLES:
+            frames = [tables[key] for _, tables in partials if key in tables]
+            if frames:
+                results[key] = _interleave(frames)
+
+        if "nii_sensitivity" in results:
+            nii = results["nii_sensitivity"]
+            base = nii["Net Interest Income"] - nii["Change in NII"]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                nii["Change (%)"] = np.where(base != 0, (nii["Net Interest Income"] / base - 1) * 100, np.nan)
+
+        results["rbi_reports"] = generate_rbi_reports({
+            "daily_agg": results.get("daily_agg"),
+            "monthly_agg": results.get("monthly_agg"),
+            "rate_shock_results": results.get("rate_shock_results"),
+            "nii_sensitivity": results.get("nii_sensitivity"),
+            "valuation_date": valuation_date,
+        })
+    results["shards"] = manifests[0]["shards"]
+    results["valuation_date"] = valuation_date
+    return results
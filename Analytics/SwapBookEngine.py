@@ -0,0 +1,261 @@
+# Analytics/SwapBookEngine.py
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Analytics.Curve import Curve
+from Analytics.DayCount import DEFAULT_DAY_COUNT, day_count_codes, year_fraction
+from Analytics.PortfolioTable import as_tables, _token
+from Analytics.Schedules import batch_schedules, to_day_array
+from Analytics.YieldCurveBuilder import build_zero_forward_curve
+
+
+SWAP_TYPE = "InterestRateSwap"
+CURVE_ATTRIBUTES = ("zero_curve", "forward_curve")
+
+
+def default_swap_curves(zero_curve=None, forward_curve=None):
+    """
+    {zero_curve, forward_curve} to attach to swaps at load time; either
+    missing curve is taken from ``build_zero_forward_curve``.
+    """
+    if zero_curve is None or forward_curve is None:
+        sample_zero, sample_forward = build_zero_forward_curve()
+        zero_curve = sample_zero if zero_curve is None else zero_curve
+        forward_curve = sample_forward if forward_curve is None else forward_curve
+    return {"zero_curve": zero_curve, "forward_curve": forward_curve}
+
+
+def interpolate_curve(curve, months, column, frequency=None):
+    """
+    'Zero Rate' or 'Forward Rate' at ``months`` from a ``Curve`` (grid
+    lookup, months converted to grid steps so monthly and daily grids agree;
+    zero rates compounded ``frequency`` times a year when given) or a
+    Months / Zero Rate / Forward Rate DataFrame (linear interpolation).
+    """
+    if isinstance(curve, Curve):
+        points = np.asarray(months, dtype=float) * curve.steps_per_year / 12
+        if column == 'Forward Rate':
+            return curve.forward_rate(points)
+        return curve.zero_rate(points, frequency)
+    return np.interp(months, curve['Months'].values, curve[column].values)
+
+
+def _on_month_grid(curve, months, column, frequency=None):
+    """
+    ``interpolate_curve`` at integer ``months`` for a whole book: a
+    DataFrame curve is interpolated once per month of the range the book
+    spans and gathered for every cashflow (a ``Curve`` is a gather already).
+    """
+    if isinstance(curve, Curve) or not len(months):
+        return np.asarray(interpolate_curve(curve, months, column, frequency), dtype=float)
+    first = months.min()
+    return interpolate_curve(curve, np.arange(first, months.max() + 1), column)[months - first]
+
+
+def _curve_groups(table):
+    """
+    (rows, zero_curve, forward_curve) for each set of rows sharing curves,
+    plus the rows without curves. Tables loaded from a file carry one
+    shared curve pair; tables built from objects are grouped by curve.
+    """
+    if all(table.shared.get(name) is not None for name in CURVE_ATTRIBUTES):
+        return [(np.arange(len(table)), table.shared["zero_curve"], table.shared["forward_curve"])], \
+            np.empty(0, dtype=np.int64)
+
+    if table._instruments is not None:
+        curves = [tuple(getattr(inst, name, None) for name in CURVE_ATTRIBUTES) for inst in table._instruments]
+    else:
+        curves = [tuple(table.shared.get(name) for name in CURVE_ATTRIBUTES)] * len(table)
+    keys = pd.Series([tuple(_token(curve) for curve in pair) for pair in curves], dtype=object)
+    codes, _ = pd.factorize(keys)
+    groups, missing = [], []
+    for code in np.unique(codes):
+        rows = np.flatnonzero(codes == code)
+        zero_curve, forward_curve = curves[rows[0]]
+        if zero_curve is None or forward_curve is None:
+            missing.append(rows)
+        else:
+            groups.append((rows, zero_curve, forward_curve))
+    return groups, (np.concatenate(missing) if missing else np.empty(0, dtype=np.int64))
+
+
+def attached_zero_curve(portfolio):
+    """
+    The zero curve attached to every swap of ``portfolio``, or None when it
+    holds no swaps with curves. Raises ValueError if swaps carry different
+    zero curves.
+    """
+    curves = {}
+    for table in as_tables(portfolio):
+        if table.instrument_type == SWAP_TYPE and len(table):
+            for _, zero_curve, _ in _curve_groups(table)[0]:
+                curves.setdefault(_token(zero_curve), zero_curve)
+    if len(curves) > 1:
+        raise ValueError(f"Swaps carry {len(curves)} different zero curves; pass the curve to use explicitly")
+    return next(iter(curves.values()), None)
+
+
+def swap_legs(table, rows, forward_curve, valuation_date):
+    """
+    Fixed and floating leg cashflows of ``rows`` of a swap table, as flat
+    arrays over all their payment dates.
+
+    Payment dates follow ``InterestRateSwap.generate_cashflows``: every
+    ``12 // frequency`` months from the start date, each date stepping from
+    the previous one, up to and including the end date. Floating rates are
+    read off ``forward_curve`` at whole months from the valuation date.
+
+    Returns:
+        dict: owner (row of ``rows``), payment_date (datetime64[D]),
+        months_forward, fixed_leg, float_leg and net_cashflow arrays.
+    """
+    notional = table["notional"][rows]
+    fixed_rate = table["coupon_rate"][rows]
+    spread = table["float_spread"][rows]
+    pay_fixed = table["pay_fixed"][rows].astype(bool)
+    frequency = table["frequency"][rows].astype(np.int64)
+    start = to_day_array(table["issue_date"][rows])
+    end = to_day_array(table["maturity_date"][rows])
+
+    period = 12 // frequency
+    month_span = (end.astype("datetime64[M]") - start.astype("datetime64[M]")).astype(np.int64)
+    owner, _, dates = batch_schedules(start, 12 // period, np.maximum(month_span // period + 1, 0), roll="chained")
+    keep = dates <= end[owner]
+    owner, dates = owner[keep], dates[keep]
+
+    months = (dates.astype("datetime64[M]")
+              - np.datetime64(pd.Timestamp(valuation_date).date(), "M")).astype(np.int64)
+    fixed_leg = (notional * fixed_rate / frequency)[owner]
+    float_leg = notional[owner] * (_on_month_grid(forward_curve, months, 'Forward Rate') + spread[owner]) \
+        / frequency[owner]
+    return {
+        "owner": owner,
+        "payment_date": dates,
+        "months_forward": months,
+        "fixed_leg": fixed_leg,
+        "float_leg": float_leg,
+        "net_cashflow": np.where(pay_fixed[owner], float_leg - fixed_leg, fixed_leg - float_leg),
+    }
+
+
+def _discount_terms(table, rows, legs, zero_curve, valuation_date):
+    """
+    Year fractions, zero rates and compounding frequency per cashflow, as
+    ``InterestRateSwap._discount_inputs`` computes them.
+    """
+    owner = legs["owner"]
+    frequency = table["frequency"][rows].astype(float)[owner]
+    codes = np.append(day_count_codes(table.categories.get("day_count", [])), DEFAULT_DAY_COUNT)
+    conventions = codes[table["day_count"][rows]][owner] if "day_count" in table.columns else DEFAULT_DAY_COUNT
+
+    t = year_fraction(pd.Timestamp(valuation_date).to_datetime64(), legs["payment_date"], conventions)
+    zero_rates = _on_month_grid(zero_curve, legs["months_forward"], 'Zero Rate', frequency)
+    return t, zero_rates, frequency
+
+
+def swap_discount_inputs(table, valuation_date):
+    """
+    Discount inputs of a whole swap table for ``RiskKernel.discount_cashflows``,
+    identical to every swap's own ``_discount_inputs`` but built in one pass
+    per curve pair.
+
+    Returns:
+        tuple: (instrument_index, t, amounts, rates, frequency, failed) with
+        instrument_index and failed as portfolio positions (table rows for a
+        standalone table).
+    """
+    positions = np.arange(len(table)) if table.positions is None else table.positions
+    groups, missing = _curve_groups(table)
+    segments = []
+    for rows, zero_curve, forward_curve in groups:
+        legs = swap_legs(table, rows, forward_curve, valuation_date)
+        t, zero_rates, frequency = _discount_terms(table, rows, legs, zero_curve, valuation_date)
+        segments.append((positions[rows][legs["owner"]], t, legs["net_cashflow"], zero_rates, frequency))
+
+    if not segments:
+        segments = [(np.empty(0, dtype=np.int64),) + (np.empty(0),) * 4]
+    return tuple(np.concatenate(arrays) for arrays in zip(*segments)) + (list(positions[missing]),)
+
+
+def swap_cashflow_frame(table, valuation_date=None):
+    """
+    Long-format cashflow rows of a swap table (net cashflow as interest, no
+    principal), with instrument_index set to the table's positions. Floating
+    legs are projected from ``valuation_date`` (default today), as
+    ``InterestRateSwap.cached_cashflows`` does. Swaps without curves are left out.
+    """
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+    positions = np.arange(len(table)) if table.positions is None else table.positions
+    frames = []
+    for rows, _, forward_curve in _curve_groups(table)[0]:
+        legs = swap_legs(table, rows, forward_curve, valuation_date)
+        frames.append(pd.DataFrame({
+            "instrument_index": positions[rows][legs["owner"]],
+            "payment_date": legs["payment_date"].astype("datetime64[ns]"),
+            "interest": legs["net_cashflow"],
+            "principal": 0.0,
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def value_swaps(portfolio, valuation_date=None):
+    """
+    Value a whole swap book in one vectorized pass per curve pair.
+
+    Only payments after the valuation date count. Discounting follows the
+    pricers: each swap's zero rate at the payment month, compounded at the
+    swap's frequency, over the fixed leg's day-count year fraction.
+
+    Parameters:
+        portfolio: Instrument objects or PortfolioTables; only swaps are valued.
+        valuation_date: Valuation date (default today).
+
+    Returns:
+        DataFrame indexed by ID: Fixed Leg PV, Float Leg PV, Value (to the
+        holder: float minus fixed for payers), Annuity (PV of 1 on the fixed
+        leg's notional schedule), Par Rate (fixed rate giving zero value)
+        and PV01 (value of one basis point of fixed rate, Annuity * 1e-4).
+    """
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+    valuation_day = np.datetime64(pd.Timestamp(valuation_date).date(), "D")
+
+    frames = []
+    for table in as_tables(portfolio):
+        if table.instrument_type != SWAP_TYPE:
+            continue
+        n = len(table)
+        fixed_pv, float_pv, annuity = np.zeros(n), np.zeros(n), np.zeros(n)
+        groups, missing = _curve_groups(table)
+        for rows, zero_curve, forward_curve in groups:
+            legs = swap_legs(table, rows, forward_curve, valuation_date)
+            t, zero_rates, frequency = _discount_terms(table, rows, legs, zero_curve, valuation_date)
+            future = legs["payment_date"] > valuation_day
+            discount = np.where(future, (1 + zero_rates / frequency) ** (-frequency * t), 0.0)
+            owner = rows[legs["owner"]]
+            fixed_pv += np.bincount(owner, legs["fixed_leg"] * discount, minlength=n)
+            float_pv += np.bincount(owner, legs["float_leg"] * discount, minlength=n)
+            annuity += np.bincount(owner, table["notional"][owner] / frequency * discount, minlength=n)
+
+        pay_fixed = table["pay_fixed"].astype(bool)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            par_rate = np.where(annuity != 0, (float_pv - fixed_pv) / annuity + table["coupon_rate"], np.nan)
+        frame = pd.DataFrame({
+            "Fixed Leg PV": fixed_pv,
+            "Float Leg PV": float_pv,
+            "Value": np.where(pay_fixed, float_pv - fixed_pv, fixed_pv - float_pv),
+            "Annuity": annuity,
+            "Par Rate": par_rate,
+            "PV01": annuity * 1e-4,
+        }, index=pd.Index(table.ids, name="ID"))
+        frame.iloc[missing] = np.nan
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=["Fixed Leg PV", "Float Leg PV", "Value", "Annuity", "Par Rate", "PV01"],
+                            index=pd.Index([], name="ID"))
+    return pd.concat(frames)
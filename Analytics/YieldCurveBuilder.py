@@ -2,12 +2,23 @@
 
 import pandas as pd
 import numpy as np
+from datetime import datetime
+from Analytics.Curve import Curve, GRID_STEPS_PER_YEAR
+
+
+# Sample deposit and par swap quotes (tenor in months), roughly matching the
+# synthetic curve below.
+SAMPLE_PAR_QUOTES = pd.DataFrame({
+    "Type": ["Deposit", "Deposit", "Deposit", "Deposit", "Swap", "Swap", "Swap", "Swap", "Swap", "Swap"],
+    "Tenor": [1, 3, 6, 12, 24, 36, 60, 84, 120, 360],
+    "Rate": [0.0285, 0.029, 0.0295, 0.031, 0.034, 0.036, 0.04, 0.0445, 0.0515, 0.056],
+})
 
 
 def build_zero_forward_curve():
     """
     Returns a sample DataFrame with months, zero rates, and forward rates.
-    Replace this with a bootstrap function in production.
+    Use ``bootstrap_curve`` for a curve built from market quotes.
     """
     months = np.arange(1, 121)
     zero_rates = 0.04 + 0.0002 * (months - 60)  # Example: upward slope
@@ -20,3 +31,75 @@ def build_zero_forward_curve():
     })
 
     return df, df
+
+
+def _bootstrap_pillars(quotes, swap_frequency):
+    """
+    Bootstrap (time in years, discount factor) pillars from deposit and par swap quotes.
+
+    Deposits are simple-interest: DF = 1 / (1 + r * T). Swap par rates are
+    linearly interpolated onto every fixed-leg coupon date and solved in
+    sequence from ``DF_n = (1 - S_n * tau * sum(DF_i, i < n)) / (1 + S_n * tau)``.
+    """
+    quotes = pd.DataFrame(quotes).sort_values("Tenor")
+    deposits = quotes[quotes["Type"].str.lower() == "deposit"]
+    swaps = quotes[quotes["Type"].str.lower() == "swap"]
+
+    times = [0.0] + list(deposits["Tenor"].to_numpy() / 12)
+    dfs = [1.0] + list(1 / (1 + deposits["Rate"].to_numpy() * deposits["Tenor"].to_numpy() / 12))
+
+    if swaps.empty:
+        return np.array(times), np.array(dfs)
+
+    step = 12 // swap_frequency
+    tau = step / 12
+    coupon_months = np.arange(step, int(swaps["Tenor"].max()) + 1, step)
+    par_rates = np.interp(coupon_months, swaps["Tenor"].to_numpy(), swaps["Rate"].to_numpy())
+    last_deposit = times[-1]
+
+    annuity = 0.0
+    for months, par in zip(coupon_months, par_rates):
+        t = months / 12
+        if t <= last_deposit:
+            df = np.exp(np.interp(t, times, np.log(dfs)))
+        else:
+            df = (1 - par * tau * annuity) / (1 + par * tau)
+            times.append(t)
+            dfs.append(df)
+        annuity += df
+
+    return np.array(times), np.array(dfs)
+
+
+def bootstrap_curve(quotes=None, valuation_date=None, grid="monthly", horizon_years=30, swap_frequency=2):
+    """
+    Bootstrap an immutable ``Curve`` from deposit and par swap quotes.
+
+    Parameters:
+        quotes (DataFrame): columns Type ('Deposit' or 'Swap'), Tenor (months), Rate.
+            Defaults to SAMPLE_PAR_QUOTES.
+        valuation_date: Curve date (default today).
+        grid (str): 'monthly' or 'daily' lookup grid.
+        horizon_years (int): Length of the precomputed grid.
+        swap_frequency (int): Fixed-leg payments per year of the quoted swaps.
+
+    Returns:
+        Curve: discount factors interpolated log-linearly between pillars
+        (piecewise-flat forwards) and extrapolated at the last zero rate.
+    """
+    if quotes is None:
+        quotes = SAMPLE_PAR_QUOTES
+    if valuation_date is None:
+        valuation_date = pd.to_datetime(datetime.today().date())
+
+    pillar_times, pillar_dfs = _bootstrap_pillars(quotes, swap_frequency)
+
+    steps_per_year = GRID_STEPS_PER_YEAR.get(grid, 12)
+    grid_times = np.arange(int(horizon_years * steps_per_year) + 1) / steps_per_year
+
+    last_zero = -np.log(pillar_dfs[-1]) / pillar_times[-1]
+    log_dfs = np.interp(grid_times, pillar_times, np.log(pillar_dfs))
+    beyond = grid_times > pillar_times[-1]
+    log_dfs[beyond] = -last_zero * grid_times[beyond]
+
+    return Curve(valuation_date, np.exp(log_dfs), grid)
@@ -1,4 +1,10 @@
 from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from Analytics.CashflowCache import cashflow_cache
+from Analytics.DayCount import day_count_code, year_fraction
+from Analytics.RiskKernel import discount_cashflows
 
 
 class BaseInstrument(ABC):
@@ -17,14 +23,60 @@ class BaseInstrument(ABC):
             return "30/360"  # default override logic handled in subclasses
         return user_day_count
 
+    @property
+    def compounding_frequency(self):
+        """
+        Compounding frequency used when discounting at ``yield_rate``.
+        """
+        return self.frequency
+
+    def _cashflow_terms(self):
+        """
+        Contractual terms that determine the projected cashflows.
+        Subclasses extend this with their own schedule parameters.
+        """
+        return (self.notional, self.coupon_rate,
+                pd.Timestamp(self.issue_date), pd.Timestamp(self.maturity_date))
+
+    def cashflow_key(self):
+        return (type(self).__name__,) + self._cashflow_terms()
+
+    def cached_cashflows(self):
+        """
+        Return this instrument's cashflows from the shared cashflow cache,
+        generating them on a miss. The returned frame must not be modified.
+        """
+        return cashflow_cache.get_or_compute(self.cashflow_key(), self.generate_cashflows)
+
+    def _discount_inputs(self, valuation_date):
+        """
+        Returns:
+            tuple: (t, amounts, rates, frequency) for ``discount_cashflows``.
+        """
+        df = self.cached_cashflows()
+        t = year_fraction(valuation_date, df['payment_date'].values, day_count_code(self.day_count))
+        amounts = (df['interest'] + df['principal']).values
+        return t, amounts, np.full(len(t), self.yield_rate), self.compounding_frequency
+
+    def risk_measures(self, valuation_date=None):
+        """
+        Price, Macaulay/modified duration, convexity and DV01 from one discounting pass.
+        """
+        if valuation_date is None:
+            valuation_date = pd.to_datetime(datetime.today().date())
+
+        t, amounts, rates, frequency = self._discount_inputs(valuation_date)
+        measures = discount_cashflows(np.zeros(len(t), dtype=np.int64), t, amounts, rates,
+                                      np.full(len(t), frequency), 1)
+        return {name: values[0] for name, values in measures.items()}
+
     @abstractmethod
     def generate_cashflows(self):
         pass
 
-    @abstractmethod
     def calculate_price(self, discount_curve=None, valuation_date=None):
-        pass
+        return self.risk_measures(valuation_date)["price"]
 
-    @abstractmethod
     def calculate_duration(self, valuation_date=None):
-        pass
+        measures = self.risk_measures(valuation_date)
+        return round(measures["macaulay"], 4), round(measures["modified"], 4)
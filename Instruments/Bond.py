@@ -1,7 +1,6 @@
 import pandas as pd
-from dateutil.relativedelta import relativedelta
 from Instruments.BaseInstrument import BaseInstrument
-from datetime import datetime
+from Analytics.Schedules import month_schedule
 
 
 class Bond(BaseInstrument):
@@ -32,6 +31,9 @@ class Bond(BaseInstrument):
             instrument_subtype=row.get("InstrumentSubtype", "Government")
         )
 
+    def _cashflow_terms(self):
+        return super()._cashflow_terms() + (self.frequency,)
+
     def generate_cashflows(self):
         issue = pd.to_datetime(self.issue_date)
         maturity = pd.to_datetime(self.maturity_date)
@@ -39,31 +41,7 @@ class Bond(BaseInstrument):
         payment = self.notional * self.coupon_rate / self.frequency
 
         return pd.DataFrame({
-            "payment_date": [issue + relativedelta(months=int(i * 12 / self.frequency)) for i in range(1, periods + 1)],
+            "payment_date": month_schedule(issue, self.frequency, periods).astype("datetime64[ns]"),
             "interest": [payment] * periods,
             "principal": [0] * (periods - 1) + [self.notional]
         })
-
-    def calculate_price(self, discount_curve=None, valuation_date=None):
-        df = self.generate_cashflows()
-        if valuation_date is None:
-            valuation_date = pd.to_datetime(datetime.today().date())
-
-        df['t'] = (df['payment_date'] - valuation_date).dt.days / 365
-        df['df'] = 1 / (1 + self.yield_rate / self.frequency) ** (self.frequency * df['t'])
-        df['pv'] = (df['interest'] + df['principal']) * df['df']
-        return df['pv'].sum()
-
-    def calculate_duration(self, valuation_date=None):
-        df = self.generate_cashflows()
-        if valuation_date is None:
-            valuation_date = pd.to_datetime(datetime.today().date())
-
-        df['t'] = (df['payment_date'] - valuation_date).dt.days / 365
-        df['df'] = 1 / (1 + self.yield_rate / self.frequency) ** (self.frequency * df['t'])
-        df['pv'] = (df['interest'] + df['principal']) * df['df']
-        df['weighted_time'] = df['t'] * df['pv']
-
-        macaulay = df['weighted_time'].sum() / df['pv'].sum()
-        modified = macaulay / (1 + self.yield_rate / self.frequency)
-        return round(macaulay, 4), round(modified, 4)
@@ -1,7 +1,7 @@
+import numpy as np
 import pandas as pd
-from dateutil.relativedelta import relativedelta
 from Instruments.BaseInstrument import BaseInstrument
-from datetime import datetime
+from Analytics.Schedules import month_schedule
 
 
 class DemandDeposit(BaseInstrument):
@@ -20,49 +20,29 @@ class DemandDeposit(BaseInstrument):
         return cls(
             ID=row["ID"],
             notional=row["Notional"],
-            withdrawal_rate=row.get("WithdrawalRate", 0.0),
+            maturity_date=row.get("MaturityDate", None),
+            issue_date=row["IssueDate"],
+            yield_rate=row.get("YieldRate", 0.0),
+            rate=row.get("Rate", 0.0),
+            decay_term_months=int(row.get("DecayTermMonths", 60)),
+            frequency=int(row.get("Frequency", 12)),
             day_count=row.get("DayCount", "30/360"),
             country=row.get("Country", None)
         )
 
+    def _cashflow_terms(self):
+        return (self.notional, self.rate, pd.Timestamp(self.issue_date),
+                self.decay_term_months, self.frequency)
+
     def generate_cashflows(self):
         start_date = pd.to_datetime(self.issue_date)
         period = 12 // self.frequency
-        payment_dates, interest_payments, principal_payments = [], [], []
-
-        for m in range(1, self.decay_term_months + 1):
-            date = start_date + relativedelta(months=m)
-            if m % period == 0:
-                remaining_balance = self.notional * (1 - (m / self.decay_term_months))
-                interest = remaining_balance * self.rate / self.frequency
-                principal = self.notional / self.decay_term_months
-                payment_dates.append(date)
-                interest_payments.append(interest)
-                principal_payments.append(principal)
+        count = self.decay_term_months // period
+        months = np.arange(1, count + 1) * period
 
+        remaining_balance = self.notional * (1 - months / self.decay_term_months)
         return pd.DataFrame({
-            'payment_date': payment_dates,
-            'interest': interest_payments,
-            'principal': principal_payments
+            'payment_date': month_schedule(start_date, 12 // period, count).astype("datetime64[ns]"),
+            'interest': remaining_balance * self.rate / self.frequency,
+            'principal': np.full(count, self.notional / self.decay_term_months)
         })
-
-    def calculate_price(self, discount_curve=None, valuation_date=None):
-        df = self.generate_cashflows()
-        if valuation_date is None:
-            valuation_date = pd.to_datetime(datetime.today().date())
-        df['t'] = (df['payment_date'] - valuation_date).dt.days / 365
-        df['df'] = 1 / (1 + self.yield_rate / self.frequency) ** (self.frequency * df['t'])
-        df['pv'] = (df['interest'] + df['principal']) * df['df']
-        return df['pv'].sum()
-
-    def calculate_duration(self, valuation_date=None):
-        df = self.generate_cashflows()
-        if valuation_date is None:
-            valuation_date = pd.to_datetime(datetime.today().date())
-        df['t'] = (df['payment_date'] - valuation_date).dt.days / 365
-        df['df'] = 1 / (1 + self.yield_rate / self.frequency) ** (self.frequency * df['t'])
-        df['pv'] = (df['interest'] + df['principal']) * df['df']
-        df['weighted_time'] = df['t'] * df['pv']
-        macaulay = df['weighted_time'].sum() / df['pv'].sum()
-        modified = macaulay / (1 + self.yield_rate / self.frequency)
-        return round(macaulay, 4), round(modified, 4)
@@ -1,8 +1,13 @@
+import hashlib
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
 from Instruments.BaseInstrument import BaseInstrument
+from Analytics.CashflowCache import cashflow_cache
+from Analytics.Curve import Curve
+from Analytics.DayCount import day_count_code, year_fraction
+from Analytics.Schedules import month_schedule
+from Analytics.SwapBookEngine import interpolate_curve
 
 
 class InterestRateSwap(BaseInstrument):
@@ -23,7 +28,7 @@ class InterestRateSwap(BaseInstrument):
             self.float_leg_day_count = "Actual/360"
 
     @classmethod
-    def from_dataframe_row(cls, row):
+    def from_dataframe_row(cls, row, zero_curve=None, forward_curve=None):
         return cls(
             ID=row["ID"],
             notional=row["Notional"],
@@ -34,42 +39,59 @@ class InterestRateSwap(BaseInstrument):
             yield_rate=row.get("Yield", 0.0),
             pay_fixed=row.get("PayFixed", True),
             frequency=row.get("FixedLegFrequency", 4),
-            zero_curve=None,
-            forward_curve=None,
+            zero_curve=zero_curve,
+            forward_curve=forward_curve,
             fixed_leg_day_count=row.get("DayCount", "30/360"),
             float_leg_day_count="Actual/360",
             country=row.get("Country", None)
         )
 
     @staticmethod
-    def _interpolate_curve(months, curve_df, column):
-        curve_months = curve_df['Months'].values
-        curve_values = curve_df[column].values
-        return np.interp(months, curve_months, curve_values)
+    def _interpolate_curve(months, curve_df, column, frequency=None):
+        return interpolate_curve(curve_df, months, column, frequency)
+
+    @staticmethod
+    def _curve_token(curve_df):
+        if curve_df is None:
+            return None
+        if isinstance(curve_df, Curve):
+            return curve_df.token
+        # A digest rather than ``hash``, which is salted per process, so keys
+        # agree across worker processes and shards.
+        return int.from_bytes(hashlib.blake2b(curve_df.to_numpy().tobytes(), digest_size=8).digest(), "little")
+
+    def _cashflow_terms(self):
+        return super()._cashflow_terms() + (self.float_spread, self.pay_fixed, self.frequency,
+                                            self._curve_token(self.forward_curve))
+
+    def cached_cashflows(self, valuation_date=None):
+        if valuation_date is None:
+            valuation_date = pd.to_datetime(datetime.today().date())
+        key = self.cashflow_key() + (pd.Timestamp(valuation_date),)
+        return cashflow_cache.get_or_compute(key, lambda: self.generate_cashflows(valuation_date))
 
     def generate_cashflows(self, valuation_date=None):
         if valuation_date is None:
             valuation_date = pd.to_datetime(datetime.today().date())
 
-        start = pd.to_datetime(self.issue_date)
-        end = pd.to_datetime(self.maturity_date)
-        delta = relativedelta(months=12 // self.frequency)
+        start = np.datetime64(pd.to_datetime(self.issue_date).date(), "D")
+        end = np.datetime64(pd.to_datetime(self.maturity_date).date(), "D")
+        period = 12 // self.frequency
 
-        payment_dates, t_months = [], []
-        current = start
-        while current < end:
-            current += delta
-            if current > end:
-                break
-            payment_dates.append(current)
-            t_months.append((current.year - valuation_date.year) * 12 + current.month - valuation_date.month)
+        # Dates step from the previous payment, as repeatedly adding the period
+        # would; the schedule is cut at the first date after the end date.
+        month_span = (end.astype("datetime64[M]") - start.astype("datetime64[M]")).astype(np.int64)
+        schedule = month_schedule(start, 12 // period, max(month_span // period + 1, 0), roll="chained")
+        payment_dates = schedule[:np.searchsorted(schedule, end, side="right")]
+        t_months = (payment_dates.astype("datetime64[M]")
+                    - np.datetime64(pd.Timestamp(valuation_date).date(), "M")).astype(np.int64)
 
-        fixed_leg = [self.notional * self.coupon_rate / self.frequency] * len(payment_dates)
+        fixed_leg = np.full(len(payment_dates), self.notional * self.coupon_rate / self.frequency)
         float_rates = self._interpolate_curve(t_months, self.forward_curve, 'Forward Rate')
-        float_leg = [self.notional * (r + self.float_spread) / self.frequency for r in float_rates]
+        float_leg = self.notional * (np.asarray(float_rates) + self.float_spread) / self.frequency
 
-        net_cashflows = [(float_leg[i] - fixed_leg[i]) if self.pay_fixed else (fixed_leg[i] - float_leg[i])
-                         for i in range(len(payment_dates))]
+        net_cashflows = float_leg - fixed_leg if self.pay_fixed else fixed_leg - float_leg
+        payment_dates = payment_dates.astype("datetime64[ns]")
 
         return pd.DataFrame({
             'payment_date': payment_dates,
@@ -79,22 +101,9 @@ class InterestRateSwap(BaseInstrument):
             'months_forward': t_months
         })
 
-    def calculate_price(self, discount_curve=None, valuation_date=None):
-        df = self.generate_cashflows(valuation_date)
-        months = df['months_forward'].values
-        zero_rates = self._interpolate_curve(months, self.zero_curve, 'Zero Rate')
-        df['discount_factor'] = 1 / (1 + zero_rates / self.frequency) ** (self.frequency * (months / 12))
-        df['pv'] = df['net_cashflow'] * df['discount_factor']
-        return df['pv'].sum()
-
-    def calculate_duration(self, valuation_date=None):
-        df = self.generate_cashflows(valuation_date)
+    def _discount_inputs(self, valuation_date):
+        df = self.cached_cashflows(valuation_date)
         months = df['months_forward'].values
-        zero_rates = self._interpolate_curve(months, self.zero_curve, 'Zero Rate')
-        df['discount_factor'] = 1 / (1 + zero_rates / self.frequency) ** (self.frequency * (months / 12))
-        df['pv'] = df['net_cashflow'] * df['discount_factor']
-        df['t_years'] = months / 12
-        df['weighted_time'] = df['t_years'] * df['pv']
-        macaulay = df['weighted_time'].sum() / df['pv'].sum()
-        modified = macaulay / (1 + np.mean(zero_rates) / self.frequency)
-        return round(macaulay, 4), round(modified, 4)
+        zero_rates = self._interpolate_curve(months, self.zero_curve, 'Zero Rate', self.frequency)
+        t = year_fraction(valuation_date, df['payment_date'].values, day_count_code(self.day_count))
+        return t, df['net_cashflow'].values, zero_rates, self.frequency
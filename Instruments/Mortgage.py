@@ -1,12 +1,13 @@
 # Mortgage.py
 import pandas as pd
-from dateutil.relativedelta import relativedelta
 from Instruments.BaseInstrument import BaseInstrument
+from Analytics.Schedules import month_schedule
 import numpy_financial as npf
-from datetime import datetime
 
 
 class Mortgage(BaseInstrument):
+    COMPOUNDING_FREQUENCY = 12
+
     def __init__(self, ID, notional, coupon_rate, maturity_date, issue_date, yield_rate,
                  term_months=360, day_count="30/360", country=None):
         super().__init__(ID, notional, coupon_rate, maturity_date, issue_date, yield_rate, day_count, country)
@@ -33,9 +34,16 @@ class Mortgage(BaseInstrument):
             country=row.get("COUNTRY", None)
         )
 
+    @property
+    def compounding_frequency(self):
+        return self.COMPOUNDING_FREQUENCY
+
+    def _cashflow_terms(self):
+        return super()._cashflow_terms() + (self.term_months,)
+
     def generate_cashflows(self):
         issue = pd.to_datetime(self.issue_date)
-        payment_dates = [issue + relativedelta(months=i) for i in range(1, self.term_months + 1)]
+        payment_dates = month_schedule(issue, 12, self.term_months).astype("datetime64[ns]")
         monthly_rate = self.coupon_rate / 12
         pmt = npf.pmt(rate=monthly_rate, nper=self.term_months, pv=-self.notional)
 
@@ -56,27 +64,3 @@ class Mortgage(BaseInstrument):
             "interest": interest_payments,
             "principal": principal_payments
         })
-
-    def calculate_price(self, discount_curve=None, valuation_date=None):
-        df = self.generate_cashflows()
-        if valuation_date is None:
-            valuation_date = pd.to_datetime(datetime.today().date())
-
-        df['t'] = (df['payment_date'] - valuation_date).dt.days / 365
-        df['df'] = 1 / (1 + self.yield_rate / 12) ** (12 * df['t'])
-        df['pv'] = (df['interest'] + df['principal']) * df['df']
-        return df['pv'].sum()
-
-    def calculate_duration(self, valuation_date=None):
-        df = self.generate_cashflows()
-        if valuation_date is None:
-            valuation_date = pd.to_datetime(datetime.today().date())
-
-        df['t'] = (df['payment_date'] - valuation_date).dt.days / 365
-        df['df'] = 1 / (1 + self.yield_rate / 12) ** (12 * df['t'])
-        df['pv'] = (df['interest'] + df['principal']) * df['df']
-        df['weighted_time'] = df['t'] * df['pv']
-
-        macaulay = df['weighted_time'].sum() / df['pv'].sum()
-        modified = macaulay / (1 + self.yield_rate / 12)
-        return round(macaulay, 4), round(modified, 4)
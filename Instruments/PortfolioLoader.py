@@ -0,0 +1,296 @@
+# Instruments/PortfolioLoader.py
+
+import os
+import re
+import numpy as np
+import pandas as pd
+from Analytics.PortfolioTable import OBJECT_ATTRIBUTES, PortfolioTable
+from Analytics.SwapBookEngine import default_swap_curves
+from Instruments.Bond import Bond
+from Instruments.Mortgage import Mortgage
+from Instruments.InterestRateSwap import InterestRateSwap
+from Instruments.DemandDeposit import DemandDeposit
+
+
+# Spelling variants seen in source files, keyed by the lower-case alphanumeric
+# form of the column name, mapped to the normalized schema.
+COLUMN_ALIASES = {
+    "id": "ID",
+    "instrumenttype": "instrument_type", "type": "instrument_type",
+    "notional": "notional",
+    "couponrate": "coupon_rate", "coupon": "coupon_rate",
+    "yieldrate": "yield_rate", "yield": "yield_rate",
+    "issuedate": "issue_date", "startdate": "issue_date",
+    "maturitydate": "maturity_date", "enddate": "maturity_date",
+    "frequency": "frequency", "fixedlegfrequency": "frequency",
+    "daycount": "day_count",
+    "country": "country",
+    "instrumentsubtype": "instrument_subtype", "subtype": "instrument_subtype",
+    "termmonths": "term_months",
+    "rate": "rate", "depositrate": "rate",
+    "decaytermmonths": "decay_term_months",
+    "fixedrate": "fixed_rate",
+    "floatingspread": "float_spread", "floatspread": "float_spread",
+    "payfixed": "pay_fixed",
+}
+
+_REQUIRED = object()
+
+# Per type: (constructor argument, candidate normalized columns, default, kind).
+INSTRUMENT_SCHEMAS = {
+    "Bond": (Bond, [
+        ("ID", ["ID"], _REQUIRED, "str"),
+        ("notional", ["notional"], _REQUIRED, "float"),
+        ("coupon_rate", ["coupon_rate"], 0.0, "float"),
+        ("maturity_date", ["maturity_date"], _REQUIRED, "date"),
+        ("issue_date", ["issue_date"], _REQUIRED, "date"),
+        ("yield_rate", ["yield_rate"], 0.0, "float"),
+        ("frequency", ["frequency"], 2, "int"),
+        ("day_count", ["day_count"], "30/360", "str"),
+        ("country", ["country"], None, "str"),
+        ("instrument_subtype", ["instrument_subtype"], "Government", "str"),
+    ]),
+    "Mortgage": (Mortgage, [
+        ("ID", ["ID"], _REQUIRED, "str"),
+        ("notional", ["notional"], _REQUIRED, "float"),
+        ("coupon_rate", ["coupon_rate"], _REQUIRED, "float"),
+        ("maturity_date", ["maturity_date"], _REQUIRED, "date"),
+        ("issue_date", ["issue_date"], _REQUIRED, "date"),
+        ("yield_rate", ["yield_rate"], _REQUIRED, "float"),
+        ("term_months", ["term_months"], 360, "int"),
+        ("day_count", ["day_count"], "30/360", "str"),
+        ("country", ["country"], None, "str"),
+    ]),
+    "DemandDeposit": (DemandDeposit, [
+        ("ID", ["ID"], _REQUIRED, "str"),
+        ("notional", ["notional"], _REQUIRED, "float"),
+        ("maturity_date", ["maturity_date"], None, "date"),
+        ("issue_date", ["issue_date"], _REQUIRED, "date"),
+        ("yield_rate", ["yield_rate"], 0.0, "float"),
+        ("rate", ["rate", "coupon_rate"], 0.0, "float"),
+        ("decay_term_months", ["decay_term_months"], 60, "int"),
+        ("frequency", ["frequency"], 12, "int"),
+        ("day_count", ["day_count"], "30/360", "str"),
+        ("country", ["country"], None, "str"),
+    ]),
+    "InterestRateSwap": (InterestRateSwap, [
+        ("ID", ["ID"], _REQUIRED, "str"),
+        ("notional", ["notional"], _REQUIRED, "float"),
+        ("fixed_rate", ["fixed_rate", "coupon_rate"], 0.0, "float"),
+        ("float_spread", ["float_spread"], 0.0, "float"),
+        ("start_date", ["issue_date"], _REQUIRED, "date"),
+        ("end_date", ["maturity_date"], _REQUIRED, "date"),
+        ("yield_rate", ["yield_rate"], 0.0, "float"),
+        ("pay_fixed", ["pay_fixed"], True, "bool"),
+        ("frequency", ["frequency"], 4, "int"),
+        ("fixed_leg_day_count", ["day_count"], "30/360", "str"),
+        ("country", ["country"], None, "str"),
+    ]),
+}
+
+
+def normalize_columns(df):
+    """
+    Rename source columns to the normalized schema (``COLUMN_ALIASES``).
+    Unrecognized columns are kept as they are.
+    """
+    renames = {}
+    for column in df.columns:
+        key = re.sub(r"[^0-9a-z]", "", str(column).lower())
+        renames[column] = COLUMN_ALIASES.get(key, column)
+    return df.rename(columns=renames)
+
+
+def read_portfolio_frame(source, file_format=None):
+    """
+    Read a raw portfolio table from Excel, CSV or Parquet.
+
+    Parameters:
+        source: Path or file-like object (e.g. a Streamlit upload).
+        file_format (str): 'excel', 'csv' or 'parquet'; inferred from the file
+            name when omitted.
+    """
+    if file_format is None:
+        name = str(getattr(source, "name", source))
+        extension = os.path.splitext(name)[1].lower()
+        file_format = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}.get(extension, "excel")
+
+    readers = {"excel": pd.read_excel, "csv": pd.read_csv, "parquet": pd.read_parquet}
+    if file_format not in readers:
+        raise ValueError(f"Unsupported portfolio format '{file_format}'")
+    return readers[file_format](source)
+
+
+def _convert_array(values, kind, default):
+    """
+    Convert a whole column to a typed array: datetime64[D] (NaT when missing)
+    for dates, numeric dtypes, and object arrays of str for everything else.
+    """
+    if kind == "date":
+        codes, uniques = pd.factorize(values)
+        lookup = np.append(pd.to_datetime(uniques).to_numpy().astype("datetime64[D]"), np.datetime64("NaT", "D"))
+        return lookup[codes]
+    if kind == "float":
+        return pd.to_numeric(values).fillna(default if default is not _REQUIRED else np.nan).to_numpy(dtype=float)
+    if kind == "int":
+        return pd.to_numeric(values).fillna(default).to_numpy(dtype=np.int64)
+    if kind == "bool":
+        if values.dtype == object:
+            values = values.astype(str).str.strip().str.lower().isin(["true", "1", "yes", "y"]).where(values.notna())
+        return values.fillna(default).to_numpy(dtype=bool)
+    codes, uniques = pd.factorize(values)
+    lookup = np.array(pd.Index(uniques).astype(str).tolist() + [default], dtype=object)
+    return lookup[codes]
+
+
+def _convert(values, kind, default):
+    """
+    Convert a whole column to the Python values the constructors expect.
+    """
+    if kind == "date":
+        # Few distinct dates in practice: parse each one once and share the Timestamp.
+        codes, uniques = pd.factorize(values)
+        lookup = list(pd.to_datetime(uniques)) + [default]
+        return [lookup[code] for code in codes]
+    return _convert_array(values, kind, default).tolist()
+
+
+def _check_required(df, source, instrument_type):
+    """
+    Raise ValueError naming the rows of ``df`` with a blank ``source`` cell:
+    by ID where they have one, else by data row (1-based, header excluded).
+    """
+    values = df[source]
+    missing = values.isna().to_numpy()
+    if values.dtype == object:
+        missing |= values.astype(str).str.strip().eq("").to_numpy()
+    if not missing.any():
+        return
+    ids = df["ID"] if "ID" in df.columns and source != "ID" else pd.Series(np.nan, index=df.index)
+    labels = [str(ID) if pd.notna(ID) and str(ID).strip() else f"row {row + 1}"
+              for row, ID in zip(df.index[missing], ids[missing])]
+    shown = ", ".join(labels[:10]) + (f" and {len(labels) - 10} more" if len(labels) > 10 else "")
+    raise ValueError(f"{instrument_type} rows with a blank '{source}': {shown}")
+
+
+def _schema_columns(df, instrument_type, convert):
+    """
+    Yield (constructor argument, converted column) for one instrument type.
+    Required columns must be present and filled in on every row.
+    """
+    _, schema = INSTRUMENT_SCHEMAS[instrument_type]
+    for argument, candidates, default, kind in schema:
+        source = next((c for c in candidates if c in df.columns), None)
+        if source is None:
+            if default is _REQUIRED:
+                raise ValueError(f"{instrument_type} rows need a '{candidates[0]}' column")
+            yield argument, [default] * len(df)
+        else:
+            if default is _REQUIRED:
+                _check_required(df, source, instrument_type)
+            yield argument, convert(df[source], kind, default)
+
+
+def build_instruments(df, instrument_type, shared=None):
+    """
+    Build all instruments of one type from a normalized frame, converting whole
+    columns at once instead of iterating over rows. ``shared`` holds constructor
+    arguments common to every row (a swap book's curves).
+    """
+    cls = INSTRUMENT_SCHEMAS[instrument_type][0]
+    arguments, columns = zip(*_schema_columns(df, instrument_type, _convert))
+    shared = shared or {}
+    return [cls(**dict(zip(arguments, row)), **shared) for row in zip(*columns)]
+
+
+def build_table(df, instrument_type, shared=None):
+    """
+    Build the PortfolioTable of one type from a normalized frame, keeping
+    every column as a typed array (no instrument objects are created).
+    """
+    arguments = dict(_schema_columns(df, instrument_type, _convert_array))
+    ids = arguments.pop("ID")
+    return PortfolioTable.from_arguments(instrument_type, ids, arguments, shared=shared)
+
+
+def _shared_arguments(groups, zero_curve, forward_curve):
+    """
+    {instrument type: shared constructor arguments}: portfolio files carry no
+    curves, so every loaded swap is attached the same zero and forward curve
+    (the sample curves where none are given) and can be priced.
+    """
+    curves = None
+    shared = {}
+    for instrument_type, _ in groups:
+        if instrument_type in OBJECT_ATTRIBUTES:
+            if curves is None:
+                curves = default_swap_curves(zero_curve, forward_curve)
+            shared[instrument_type] = {name: curves[name] for name in OBJECT_ATTRIBUTES[instrument_type]}
+    return shared
+
+
+def _typed_groups(source, file_format):
+    """
+    Read and normalize a portfolio file, then yield (instrument type, rows)
+    groups in order of first appearance; rows keep their file positions as index.
+    """
+    df = normalize_columns(read_portfolio_frame(source, file_format))
+    if "instrument_type" not in df.columns:
+        raise ValueError("Portfolio file needs an instrument type column")
+
+    df = df.reset_index(drop=True)
+    types = df["instrument_type"].astype(str).str.strip()
+    unknown = ~types.isin(INSTRUMENT_SCHEMAS.keys())
+    if unknown.any():
+        print(f"⚠️ Skipping {int(unknown.sum())} rows with unknown instrument type: "
+              f"{sorted(types[unknown].unique())}")
+
+    return df[~unknown].groupby(types[~unknown], sort=False)
+
+
+def load_portfolio(source, file_format=None, zero_curve=None, forward_curve=None):
+    """
+    Load portfolio instruments from an Excel, CSV or Parquet file.
+
+    Column names are normalized once, then each instrument type is built from
+    whole columns. Rows with an unknown instrument type are skipped. Swaps
+    are attached ``zero_curve`` and ``forward_curve`` (``Curve`` objects or
+    curve DataFrames; the sample curves of ``build_zero_forward_curve`` by
+    default).
+
+    Returns:
+        list: Instrument objects in file order.
+    """
+    groups = list(_typed_groups(source, file_format))
+    shared = _shared_arguments(groups, zero_curve, forward_curve)
+    positions, portfolio = [], []
+    for instrument_type, rows in groups:
+        positions.append(rows.index.to_numpy())
+        portfolio.extend(build_instruments(rows, instrument_type, shared.get(instrument_type)))
+
+    order = np.argsort(np.concatenate(positions), kind="stable") if positions else []
+    return [portfolio[i] for i in order]
+
+
+def load_portfolio_tables(source, file_format=None, zero_curve=None, forward_curve=None):
+    """
+    Load a portfolio file as one PortfolioTable per instrument type.
+
+    This is the memory-light path for large books: no per-instrument objects
+    are created. Rows with an unknown instrument type are skipped and swaps
+    share one attached curve pair (the table's ``shared`` attributes), as in
+    ``load_portfolio``.
+
+    Returns:
+        list: PortfolioTables whose positions follow the file order of the
+        loaded rows.
+    """
+    groups = [(instrument_type, rows) for instrument_type, rows in _typed_groups(source, file_format)]
+    kept = np.sort(np.concatenate([rows.index.to_numpy() for _, rows in groups])) if groups else []
+    shared = _shared_arguments(groups, zero_curve, forward_curve)
+
+    tables = []
+    for instrument_type, rows in groups:
+        table = build_table(rows, instrument_type, shared.get(instrument_type))
+        tables.append(table.with_positions(np.searchsorted(kept, rows.index.to_numpy())))
+    return tables
@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from rbi.liquidity import structural_liquidity_statement
 
 
 def export_results_to_excel(filepath, prices, durations, cashflows_dict,
@@ -21,42 +23,42 @@ def export_results_to_excel(filepath, prices, durations, cashflows_dict,
             shock_df.to_excel(writer, sheet_name="RBI_Rate_Shock_Report", index=False)
 
 
-def export_rbi_reports_to_excel(filepath, cashflows_dict, valuation_date):
+def export_rbi_reports_to_excel(filepath, cashflows_dict, valuation_date, instrument_map=None, shock_df=None):
+    """
+    Write the RBI Structural Liquidity Statement (see ``rbi.liquidity``) and,
+    given ``shock_df`` (``results["rate_shock_results"]``: Shock (bps),
+    Portfolio Market Value, Change in Market Value), the rate shock report.
+    Without ``instrument_map`` every cashflow is treated as an inflow.
+    """
+    instrument_map = instrument_map or {}
+    frames = list(cashflows_dict.values())
 
-    RBI_BUCKETS = [
-        ("1-7 days", 7), ("8-14 days", 14), ("15-30 days", 30),
-        ("31-60 days", 60), ("61-90 days", 90), ("91-180 days", 180),
-        ("181-365 days", 365), ("1-2 years", 730), ("2-3 years", 1095),
-        ("3-5 years", 1825), ("Over 5 years", float("inf")),
-    ]
+    def amounts(df):
+        return sum(df[c].to_numpy(dtype=float) for c in ('interest', 'principal') if c in df.columns) + np.zeros(len(df))
 
-    rows = []
-    for ID, df in cashflows_dict.items():
-        df = df.copy()
-        df['payment_date'] = pd.to_datetime(df['payment_date'])
-        df['days'] = (df['payment_date'] - valuation_date).dt.days
-        df = df[df['days'] >= 0]
-
-        for label, upper in RBI_BUCKETS:
-            lower = 0 if label == "1-7 days" else RBI_BUCKETS[RBI_BUCKETS.index((label, upper)) - 1][1]
-            bucket_df = df[(df['days'] > lower) & (df['days'] <= upper)]
-            inflow = bucket_df.get('interest', 0).sum() + bucket_df.get('principal', 0).sum()
-            rows.append({"Bucket": label, "Instrument": ID, "Inflow": inflow})
-
-    rbi_df = pd.DataFrame(rows)
-    report = rbi_df.groupby("Bucket")[["Inflow"]].sum().reset_index()
-    report["Cumulative Inflow"] = report["Inflow"].cumsum()
+    report = structural_liquidity_statement(
+        np.concatenate([pd.to_datetime(df['payment_date']).to_numpy() for df in frames]) if frames else [],
+        np.repeat([instrument_map.get(ID, "Unknown") for ID in cashflows_dict], [len(df) for df in frames]),
+        np.concatenate([amounts(df) for df in frames]) if frames else [],
+        valuation_date,
+    )
 
     with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
         report.to_excel(writer, sheet_name="RBI_Liquidity_Report", index=False)
 
-        summary = pd.DataFrame({
-            "Shock (bps)": [-200, -100, 0, 100, 200],
-            "Portfolio Value": [980000, 990000, 1000000, 990000, 980000],
-            "Change in Value": [-20000, -10000, 0, -10000, -20000],
-            "Impact (%)": [-2, -1, 0, -1, -2]
-        })
-        summary.to_excel(writer, sheet_name="RBI_Rate_Shock_Report", index=False)
+        if shock_df is not None:
+            value = shock_df["Portfolio Market Value"].to_numpy(dtype=float)
+            change = shock_df["Change in Market Value"].to_numpy(dtype=float)
+            base = value - change
+            with np.errstate(divide="ignore", invalid="ignore"):
+                impact = np.where(base != 0, change / base * 100, np.nan)
+            summary = pd.DataFrame({
+                "Shock (bps)": shock_df["Shock (bps)"].to_numpy(),
+                "Portfolio Value": value,
+                "Change in Value": change,
+                "Impact (%)": impact,
+            })
+            summary.to_excel(writer, sheet_name="RBI_Rate_Shock_Report", index=False)
 
 
 def RBI_Regulatory_Reports_Exists():
@@ -0,0 +1,262 @@
+# Output/Exporters.py
+
+import contextvars
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Analytics.Instrumentation import track
+
+
+# Result tables written next to the cashflows: (results key, sheet / file name).
+SUMMARY_TABLES = [
+    ("pricing", "Pricing"),
+    ("daily_agg", "Daily_Aggregated_CF"),
+    ("monthly_agg", "Monthly_Aggregated_CF"),
+    ("rate_shock_results", "RBI_Rate_Shock_Report"),
+    ("rate_shock_by_type", "Rate_Shock_By_Type"),
+    ("curve_scenario_results", "Curve_Scenarios"),
+    ("curve_scenario_by_type", "Curve_Scenarios_By_Type"),
+    ("key_rate_durations", "Key_Rate_Durations"),
+    ("nii_by_type", "NII_By_Type"),
+    ("nii_monthly", "NII_Monthly"),
+]
+
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def result_tables(results):
+    """
+    Flat {name: DataFrame} of the summary tables and RBI reports in ``results``.
+    """
+    tables = {}
+    for key, name in SUMMARY_TABLES:
+        df = results.get(key)
+        if df is not None:
+            tables[name] = df.reset_index() if df.index.name is not None else df
+    for name, df in (results.get("rbi_reports") or {}).items():
+        tables[name] = df
+    return tables
+
+
+def iter_cashflow_chunks(cashflow_table, ids, types, chunk_rows):
+    """
+    Yield the long-format cashflow table in chunks, with instrument_index
+    replaced by the instrument's ID and type.
+    """
+    ids = np.asarray(ids, dtype=object)
+    types = np.asarray(types, dtype=object)
+    for start in range(0, len(cashflow_table), chunk_rows):
+        chunk = cashflow_table.iloc[start:start + chunk_rows]
+        index = chunk["instrument_index"].to_numpy()
+        yield pd.DataFrame({
+            "ID": ids[index],
+            "instrument_type": types[index],
+            "payment_date": chunk["payment_date"].to_numpy(),
+            "interest": chunk["interest"].to_numpy(),
+            "principal": chunk["principal"].to_numpy(),
+        })
+
+
+class ResultExporter:
+    """
+    Base class for result exporters.
+
+    Subclasses write the consolidated cashflow table chunk by chunk plus one
+    table per summary result. ``export`` returns the path written.
+
+    Parameters:
+        chunk_rows (int): Cashflow rows converted and written per chunk.
+    """
+
+    default_path = None
+
+    def __init__(self, chunk_rows=500_000):
+        self.chunk_rows = chunk_rows
+
+    def export(self, path, tables, cashflow_table, ids, types):
+        raise NotImplementedError
+
+
+class _DirectoryExporter(ResultExporter):
+    """
+    Writes a directory with cashflows.<ext> and one file per summary table.
+    """
+
+    extension = None
+
+    def export(self, path, tables, cashflow_table, ids, types):
+        os.makedirs(path, exist_ok=True)
+        with track("write_cashflows", rows=len(cashflow_table)):
+            self._write_chunks(os.path.join(path, f"cashflows.{self.extension}"),
+                               iter_cashflow_chunks(cashflow_table, ids, types, self.chunk_rows))
+        with track("write_tables", tables=len(tables)):
+            for name, df in tables.items():
+                self._write_chunks(os.path.join(path, f"{report_file_name(name)}.{self.extension}"), [df])
+        return path
+
+    def _write_chunks(self, filepath, chunks):
+        raise NotImplementedError
+
+
+class CsvExporter(_DirectoryExporter):
+    extension = "csv"
+    default_path = "/tmp/ALM_Results_csv"
+
+    def _write_chunks(self, filepath, chunks):
+        header = True
+        with open(filepath, "w", newline="") as f:
+            for chunk in chunks:
+                chunk.to_csv(f, header=header, index=False)
+                header = False
+
+
+class ParquetExporter(_DirectoryExporter):
+    extension = "parquet"
+    default_path = "/tmp/ALM_Results_parquet"
+
+    def _write_chunks(self, filepath, chunks):
+        write_parquet_chunks(filepath, chunks)
+
+
+def write_parquet_chunks(filepath, chunks):
+    """
+    Stream DataFrame chunks with the same columns into one Parquet file
+    (nothing is written when there are no chunks).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from e
+
+    writer = None
+    try:
+        for chunk in chunks:
+            batch = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(filepath, batch.schema)
+            writer.write_table(batch.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class ExcelExporter(ResultExporter):
+    """
+    Single workbook written with xlsxwriter in constant-memory mode: rows are
+    streamed to disk as they are written, so memory stays flat however many
+    cashflows there are. All cashflows go to one consolidated 'Cashflows'
+    sheet, continued on 'Cashflows (2)', ... past Excel's row limit.
+    """
+
+    default_path = "/tmp/ALM_Results.xlsx"
+
+    def export(self, path, tables, cashflow_table, ids, types):
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd",
+            "nan_inf_to_errors": True,
+        })
+        try:
+            with track("write_cashflows", rows=len(cashflow_table)):
+                self._write_sheets(workbook, "Cashflows",
+                                   iter_cashflow_chunks(cashflow_table, ids, types, self.chunk_rows))
+            with track("write_tables", tables=len(tables)):
+                for name, df in tables.items():
+                    self._write_sheets(workbook, name[:31], [df])
+        finally:
+            with track("close_workbook"):
+                workbook.close()
+        return path
+
+    def _write_sheets(self, workbook, name, chunks):
+        sheet, row, part, header = None, 0, 1, []
+        for chunk in chunks:
+            header = [str(c) for c in chunk.columns]
+            for values in _rows(chunk):
+                if sheet is None or row == EXCEL_MAX_ROWS:
+                    title = name if part == 1 else f"{name[:26]} ({part})"
+                    sheet, row, part = workbook.add_worksheet(title), 1, part + 1
+                    sheet.write_row(0, 0, header)
+                sheet.write_row(row, 0, values)
+                row += 1
+        if sheet is None:
+            workbook.add_worksheet(name).write_row(0, 0, header)
+
+
+def _rows(df):
+    """
+    Row lists with dates as Python datetimes and missing values as None.
+    """
+    columns = []
+    for _, values in df.items():
+        if pd.api.types.is_datetime64_any_dtype(values):
+            columns.append(values.dt.to_pydatetime().tolist() if values.notna().all()
+                           else [None if pd.isna(v) else v.to_pydatetime() for v in values])
+        else:
+            columns.append(values.astype(object).where(values.notna(), None).tolist())
+    return zip(*columns)
+
+
+def report_file_name(name):
+    """
+    File-system safe form of a report name ("Structural Liquidity Statement"
+    -> "Structural_Liquidity_Statement"), used for exported files and stored tables.
+    """
+    return re.sub(r"[^0-9A-Za-z]+", "_", name).strip("_")
+
+
+EXPORTERS = {"excel": ExcelExporter, "parquet": ParquetExporter, "csv": CsvExporter}
+
+_export_thread = None
+
+
+def get_exporter(export_format, **kwargs):
+    if export_format not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {list(EXPORTERS)}")
+    return EXPORTERS[export_format](**kwargs)
+
+
+def export_results(results, cashflow_table, ids, types, export_format="excel", path=None,
+                   background=False, exporter=None):
+    """
+    Export ALM results through a pluggable exporter.
+
+    Parameters:
+        results (dict): ``run_alm`` results (summary tables and RBI reports).
+        cashflow_table (DataFrame): Long-format cashflow table.
+        ids, types: Instrument ID and type by instrument_index.
+        export_format (str): 'excel', 'parquet' or 'csv'.
+        path (str): Output workbook (excel) or directory; defaults per format.
+        background (bool): Write on a background thread and return at once.
+            The results must not be modified until the export has finished.
+        exporter (ResultExporter): Custom exporter overriding export_format.
+
+    Returns:
+        Future: resolves to the written path (already done unless background).
+    """
+    global _export_thread
+    exporter = exporter or get_exporter(export_format)
+    path = path or exporter.default_path
+    tables = result_tables(results)
+    args = (path, tables, cashflow_table, ids, types)
+
+    def export():
+        with track("export", format=type(exporter).__name__, background=background):
+            return exporter.export(*args)
+
+    if background:
+        if _export_thread is None:
+            _export_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alm-export")
+        # Run in a copy of the caller's context so the export reports to its instrumentation.
+        return _export_thread.submit(contextvars.copy_context().run, export)
+
+    future = Future()
+    future.set_result(export())
+    return future
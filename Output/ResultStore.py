@@ -0,0 +1,283 @@
+# Output/ResultStore.py
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Analytics.Instrumentation import track
+from Output.Exporters import SUMMARY_TABLES, iter_cashflow_chunks, report_file_name, write_parquet_chunks
+
+
+DEFAULT_ROOT = os.environ.get("ALM_RESULT_STORE") or os.path.join(os.path.expanduser("~"), "ALM_Result_Store")
+
+CASHFLOWS = "cashflows"
+RUNS = "_runs"
+PART = "part-0.parquet"
+
+
+def _day(valuation_date):
+    return pd.Timestamp(valuation_date).strftime("%Y-%m-%d")
+
+
+def settings_digest(settings=None):
+    """
+    Hex digest of the settings a run was made with besides its portfolio
+    and valuation date (e.g. {"prepayment": ...}); unset (None) settings are
+    left out, so the default settings always give the same digest.
+    """
+    settings = {name: value for name, value in (settings or {}).items() if value is not None}
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def to_cashflow_table(cashflows):
+    """
+    Stored long-format cashflows (ID, instrument_type, payment_date,
+    interest, principal) back in the engine layout.
+
+    Returns:
+        tuple: (cashflow_table, ids, types) as ``export_results`` takes them.
+    """
+    index, ids = pd.factorize(cashflows["ID"])
+    _, first = np.unique(index, return_index=True)
+    table = pd.DataFrame({
+        "instrument_index": index.astype(np.int64),
+        "payment_date": cashflows["payment_date"].to_numpy(),
+        "interest": cashflows["interest"].to_numpy(),
+        "principal": cashflows["principal"].to_numpy(),
+    })
+    return table, np.asarray(ids, dtype=object), cashflows["instrument_type"].to_numpy()[first]
+
+
+class ResultStore:
+    """
+    Persistent columnar store of ALM runs on local disk.
+
+    Each run is keyed by valuation date, portfolio digest
+    (``Analytics.PortfolioTable.portfolio_digest``) and the digest of the
+    other settings that change its results (``settings_digest``; e.g. the
+    prepayment model). Every table is a Parquet dataset partitioned by
+    these keys::
+
+        root/<table>/valuation_date=YYYY-MM-DD/portfolio=<digest>/settings=<digest>/part-0.parquet
+
+    where <table> is 'cashflows' (long format with ID and type), a
+    ``run_alm`` results key from ``SUMMARY_TABLES`` (pricing, daily_agg,
+    rate_shock_results, ...) or an RBI report's file name
+    (Structural_Liquidity_Statement, ...). A JSON manifest per run under
+    root/_runs is written last, so a run interrupted while saving is
+    never listed. Saving the same date, portfolio and settings again
+    replaces the run.
+
+    Parameters:
+        root (str): Store directory (default $ALM_RESULT_STORE, else
+            ~/ALM_Result_Store).
+        chunk_rows (int): Cashflow rows converted and written per chunk.
+    """
+
+    def __init__(self, root=None, chunk_rows=500_000):
+        self.root = root or DEFAULT_ROOT
+        self.chunk_rows = chunk_rows
+
+    def _partition(self, table, valuation_date, portfolio, settings):
+        return os.path.join(self.root, table, f"valuation_date={_day(valuation_date)}", f"portfolio={portfolio}",
+                            f"settings={settings}")
+
+    def _manifest_path(self, valuation_date, portfolio, settings):
+        return os.path.join(self.root, RUNS, f"valuation_date={_day(valuation_date)}", f"portfolio={portfolio}",
+                            f"settings={settings}.json")
+
+    def _write(self, table, key, chunks):
+        directory = self._partition(table, *key)
+        os.makedirs(directory, exist_ok=True)
+        temporary = os.path.join(directory, f".{PART}.{os.getpid()}")
+        write_parquet_chunks(temporary, chunks)
+        if os.path.exists(temporary):
+            os.replace(temporary, os.path.join(directory, PART))
+
+    def save(self, results, cashflow_table, ids, types, valuation_date, portfolio, label=None, settings=None):
+        """
+        Store one run.
+
+        Parameters:
+            results (dict): ``run_alm`` results.
+            cashflow_table (DataFrame): Long-format cashflow table.
+            ids, types: Instrument ID and type by instrument_index.
+            valuation_date: Valuation date (stored by day).
+            portfolio (str): Portfolio digest.
+            label (str): Free text shown when listing runs (e.g. the file name).
+            settings (dict): JSON-serializable settings that changed the
+                results (e.g. {"prepayment": token}), part of the run key.
+
+        Returns:
+            dict: The run's manifest.
+        """
+        run_key = (valuation_date, portfolio, settings_digest(settings))
+        with track("store_run", rows=len(cashflow_table)):
+            self.delete_run(valuation_date, portfolio, settings)
+            tables = {}
+            self._write(CASHFLOWS, run_key,
+                        iter_cashflow_chunks(cashflow_table, ids, types, self.chunk_rows))
+            tables[CASHFLOWS] = {"rows": len(cashflow_table), "index": None}
+
+            for key, _ in SUMMARY_TABLES:
+                df = results.get(key)
+                if df is None:
+                    continue
+                index = df.index.name
+                self._write(key, run_key, [df.reset_index() if index is not None else df])
+                tables[key] = {"rows": len(df), "index": index}
+
+            reports = {}
+            for name, df in (results.get("rbi_reports") or {}).items():
+                table = report_file_name(name)
+                self._write(table, run_key, [df])
+                tables[table] = {"rows": len(df), "index": None}
+                reports[table] = name
+
+            manifest = {
+                "valuation_date": _day(valuation_date),
+                "portfolio": portfolio,
+                "settings": {name: value for name, value in (settings or {}).items() if value is not None},
+                "settings_digest": run_key[2],
+                "label": label,
+                "instruments": len(ids),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "tables": tables,
+                "reports": reports,
+            }
+            path = self._manifest_path(*run_key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(path + ".tmp", path)
+        return manifest
+
+    def delete_run(self, valuation_date, portfolio, settings=None):
+        """
+        Remove a run (its manifest first, then its partitions).
+        """
+        digest = settings_digest(settings)
+        path = self._manifest_path(valuation_date, portfolio, digest)
+        if os.path.exists(path):
+            os.remove(path)
+        for directory in glob.glob(self._partition("*", valuation_date, portfolio, digest)):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _manifests(self, start=None, end=None, portfolio=None, settings=None):
+        """
+        Manifests of the stored runs in the date range, for the portfolio and
+        with the settings given (None: any), selected from their partition
+        names before any is read.
+        """
+        settings = "*" if settings is None else settings_digest(settings)
+        pattern = os.path.join(self.root, RUNS, "valuation_date=*", f"portfolio={portfolio or '*'}",
+                               f"settings={settings}.json")
+        start = None if start is None else _day(start)
+        end = None if end is None else _day(end)
+        manifests = []
+        for path in sorted(glob.glob(pattern)):
+            day = os.path.basename(os.path.dirname(os.path.dirname(path))).split("=", 1)[1]
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            with open(path) as f:
+                manifests.append(json.load(f))
+        return manifests
+
+    def runs(self, start=None, end=None, portfolio=None, settings=None):
+        """
+        Stored runs, oldest first.
+
+        Returns:
+            DataFrame: valuation_date, portfolio, settings (dict),
+            settings_digest, label, instruments, created.
+        """
+        manifests = self._manifests(start, end, portfolio, settings)
+        return pd.DataFrame({
+            "valuation_date": pd.to_datetime([m["valuation_date"] for m in manifests]),
+            "portfolio": [m["portfolio"] for m in manifests],
+            "settings": pd.Series([m["settings"] for m in manifests], dtype=object),
+            "settings_digest": [m["settings_digest"] for m in manifests],
+            "label": [m["label"] for m in manifests],
+            "instruments": np.array([m["instruments"] for m in manifests], dtype=np.int64),
+            "created": pd.to_datetime([m["created"] for m in manifests]),
+        })
+
+    def has_run(self, valuation_date, portfolio, settings=None):
+        return os.path.exists(self._manifest_path(valuation_date, portfolio, settings_digest(settings)))
+
+    def query(self, table, columns=None, start=None, end=None, portfolio=None, settings=None):
+        """
+        Time series of one table across stored runs.
+
+        Only the partitions of runs between ``start`` and ``end`` (inclusive,
+        by valuation date), for ``portfolio`` (default: every portfolio) and
+        with ``settings`` (default: any) are opened, and only ``columns`` (default: all) are read from them.
+
+        Example:
+            store.query("rate_shock_results", ["Shock (bps)", "Portfolio Market Value"],
+                        start="2025-01-01")
+
+        Returns:
+            DataFrame: valuation_date, portfolio and settings_digest (runs of
+            one date and portfolio with other settings are separate rows),
+            then the requested columns.
+        """
+        frames = []
+        with track("query_store", table=table) as record:
+            for manifest in self._manifests(start, end, portfolio, settings):
+                if table not in manifest["tables"]:
+                    continue
+                path = os.path.join(self._partition(table, manifest["valuation_date"], manifest["portfolio"],
+                                                    manifest["settings_digest"]), PART)
+                if not os.path.exists(path):
+                    continue
+                df = pd.read_parquet(path, columns=columns)
+                df.insert(0, "settings_digest", manifest["settings_digest"])
+                df.insert(0, "portfolio", manifest["portfolio"])
+                df.insert(0, "valuation_date", pd.Timestamp(manifest["valuation_date"]))
+                frames.append(df)
+            record.update(partitions=len(frames))
+        if not frames:
+            return pd.DataFrame(columns=["valuation_date", "portfolio", "settings_digest"] + list(columns or []))
+        return pd.concat(frames, ignore_index=True)
+
+    def load_run(self, valuation_date, portfolio, cashflows=True, settings=None):
+        """
+        One stored run as ``run_alm``-style results: the summary tables
+        (indexes restored), 'rbi_reports', 'valuation_date', 'portfolio',
+        'stored_run' (the manifest) and, with ``cashflows``,
+        'cashflow_table' (long format with ID and instrument_type).
+        """
+        digest = settings_digest(settings)
+        path = self._manifest_path(valuation_date, portfolio, digest)
+        if not os.path.exists(path):
+            raise KeyError(f"No stored run for portfolio {portfolio} at {_day(valuation_date)} "
+                           f"with settings {settings or {}}")
+        with open(path) as f:
+            manifest = json.load(f)
+
+        results = {"rbi_reports": {}}
+        with track("load_run", tables=len(manifest["tables"])):
+            for table, info in manifest["tables"].items():
+                if table == CASHFLOWS and not cashflows:
+                    continue
+                file = os.path.join(self._partition(table, valuation_date, portfolio, digest), PART)
+                df = pd.read_parquet(file) if os.path.exists(file) else pd.DataFrame()
+                if info["index"] is not None:
+                    df = df.set_index(info["index"])
+                if table in manifest["reports"]:
+                    results["rbi_reports"][manifest["reports"][table]] = df
+                elif table == CASHFLOWS:
+                    results["cashflow_table"] = df
+                else:
+                    results[table] = df
+
+        results.update(valuation_date=pd.Timestamp(manifest["valuation_date"]), portfolio=portfolio,
+                       stored_run=manifest)
+        return results
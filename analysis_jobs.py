@@ -0,0 +1,196 @@
+# analysis_jobs.py
+
+import hashlib
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+
+import pandas as pd
+
+from Analytics.LRUCache import LRUCache
+from Analytics.Pipeline import Pipeline
+from Analytics.PortfolioTable import portfolio_digest
+from Instruments.PortfolioLoader import load_portfolio_tables
+from main import build_alm_pipeline, run_alm
+from Output.Exporters import export_results
+from Output.ResultStore import settings_digest, to_cashflow_table
+
+
+def _nbytes(value, seen):
+    """
+    Approximate bytes held by ``value``: the DataFrames, arrays, bytes and
+    objects with an ``nbytes`` reachable through dicts, lists, tuples and
+    pipeline outputs, each counted once.
+    """
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, Pipeline):
+        return _nbytes(value.outputs(), seen)
+    if isinstance(value, dict):
+        return sum(_nbytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item, seen) for item in value)
+    return 0
+
+
+class ResultCache(LRUCache):
+    """
+    LRU cache of finished analyses (results dicts with their workbook bytes)
+    and of the per-upload pipelines, bounded by their approximate total size
+    in memory rather than by count.
+    """
+
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes=max_bytes, sizeof=lambda value: _nbytes(value, set()))
+
+
+class AnalysisJob:
+    """
+    One ALM run on a worker thread, with the progress last reported by ``run_alm``.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.progress = 0.0
+        self.message = "Queued"
+        self.future = None
+
+    def update(self, fraction, message):
+        self.progress = fraction
+        self.message = message
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+
+class AnalysisJobs:
+    """
+    Shared, thread-safe runner for ALM analyses behind the Streamlit app.
+
+    Analyses are keyed by (upload content hash, valuation date). Finished
+    results are kept in a ``ResultCache``, so reruns, other widgets and
+    other sessions with the same upload reuse them. Each analysis exports its
+    workbook to its own in-memory buffer (``results["export_bytes"]``), never
+    to a shared file. Runs execute on a small thread pool so the UI thread
+    only polls progress. Each upload keeps its own stage pipeline in the
+    same cache, so rerunning it at another valuation date reuses the
+    projected cashflows. The least recently used results and pipelines are
+    evicted once together they hold more than ``max_bytes``.
+
+    With a ``result_store`` every analysis is also persisted, and an upload
+    whose portfolio and valuation date are already stored is loaded from the
+    store instead of being analysed again (uploads run without a prepayment
+    model, so only runs stored with the default settings are reused);
+    ``load`` opens any stored run.
+
+    Parameters:
+        max_workers (int): Analyses running at the same time.
+        max_bytes (int): Approximate memory for cached results and pipelines.
+        result_store (ResultStore): Persistent store of past runs.
+    """
+
+    def __init__(self, max_workers=2, max_bytes=2 * 2 ** 30, result_store=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alm-job")
+        self._cache = ResultCache(max_bytes)
+        self._running = {}
+        self._lock = Lock()
+        self.result_store = result_store
+
+    @staticmethod
+    def job_key(content, valuation_date):
+        return hashlib.sha256(content).hexdigest(), pd.Timestamp(valuation_date).normalize()
+
+    def submit(self, content, file_name, valuation_date):
+        """
+        Return the job for this upload and valuation date, starting it unless
+        it is already cached or running.
+        """
+        key = self.job_key(content, valuation_date)
+        return self._job(key, self._run, content, file_name, key[1])
+
+    @staticmethod
+    def stored_key(valuation_date, portfolio, settings=None):
+        return "stored", portfolio, pd.Timestamp(valuation_date).normalize(), settings_digest(settings)
+
+    def load(self, valuation_date, portfolio, settings=None):
+        """
+        Return the job loading a stored run (see ``ResultStore.runs``).
+        """
+        key = self.stored_key(valuation_date, portfolio, settings)
+        return self._job(key, self._load, portfolio, key[2], settings)
+
+    def _job(self, key, fn, *args):
+        with self._lock:
+            job = self._running.get(key)
+            if job is not None:
+                return job
+
+            job = AnalysisJob(key)
+            cached = self._cache.get(("results",) + key)
+            if cached is not None:
+                job.future = Future()
+                job.future.set_result(cached)
+                job.update(1.0, "Loaded from cache")
+                return job
+
+            self._running[key] = job
+            job.future = self._executor.submit(self._finish, job, fn, *args)
+            return job
+
+    def _finish(self, job, fn, *args):
+        try:
+            results = fn(job, *args)
+            self._cache.put(("results",) + job.key, results)
+            return results
+        finally:
+            with self._lock:
+                self._running.pop(job.key, None)
+
+    def _run(self, job, content, file_name, valuation_date):
+        job.update(0.0, "Loading portfolio")
+        source = io.BytesIO(content)
+        source.name = file_name
+        portfolio = load_portfolio_tables(source)
+
+        store = self.result_store
+        if store is not None:
+            digest = portfolio_digest(portfolio)
+            if store.has_run(valuation_date, digest):
+                return self._load(job, digest, valuation_date)
+
+        with self._lock:
+            pipeline = self._cache.get(("pipeline", job.key[0])) or build_alm_pipeline()
+        buffer = io.BytesIO()
+        results = run_alm(portfolio, valuation_date, export_format="excel", output_path=buffer,
+                          progress_callback=job.update, pipeline=pipeline, result_store=store, run_label=file_name)
+        results["export"].result()
+        results["export_bytes"] = buffer.getvalue()
+        # Re-cached after the run, sized with the outputs it now holds.
+        self._cache.put(("pipeline", job.key[0]), pipeline)
+        return results
+
+    def _load(self, job, portfolio, valuation_date, settings=None):
+        # A stored run is read back, not recomputed; only the workbook is rebuilt.
+        job.update(0.1, "Loading stored run")
+        results = self.result_store.load_run(valuation_date, portfolio, settings=settings)
+        job.update(0.6, "Rebuilding workbook")
+        buffer = io.BytesIO()
+        export_results(results, *to_cashflow_table(results["cashflow_table"]), "excel", buffer).result()
+        results["export_bytes"] = buffer.getvalue()
+        job.update(1.0, "Loaded stored run")
+        return results
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,50 @@
+# benchmarks/__main__.py
+"""
+Run the ALM benchmarks.
+
+    python -m benchmarks --sizes 1k 10k --output bench.json
+    python -m benchmarks --sizes 1k 10k --baseline bench.json --threshold 0.2
+
+Exits with status 1 when a comparison finds regressions.
+"""
+
+import argparse
+import sys
+
+from benchmarks.harness import compare, load_report, run_benchmarks, save_report
+from benchmarks.synthetic import DEFAULT_SEED
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ALM benchmarks")
+    parser.add_argument("--sizes", nargs="+", default=["1k", "10k"],
+                        help="Portfolio sizes: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per measurement (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced memory runs")
+    parser.add_argument("--no-engines", action="store_true", help="Only time run_alm and its stages")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Compare against this JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown flagged as regression")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore timings below this in both reports")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.seed, args.repeat, not args.no_memory, not args.no_engines)
+    if args.output:
+        save_report(report, args.output)
+        print(f"Report written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, load_report(args.baseline), args.threshold, args.min_seconds)
+        for r in regressions:
+            print(f"REGRESSION {r['size']} {r['group']}/{r['name']} {r['metric']}: "
+                  f"{r['baseline']:.3f} -> {r['current']:.3f} (+{r['change']:.0%})")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
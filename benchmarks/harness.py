@@ -0,0 +1,236 @@
+# benchmarks/harness.py
+
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Analytics.AggregatedCashflows import CashflowAggregator
+from Analytics.BatchCashflowEngine import generate_cashflow_table
+from Analytics.CurveScenarioEngine import key_rate_durations, run_curve_scenarios
+from Analytics.PortfolioTable import portfolio_types
+from Analytics.RiskKernel import compute_risk_measures
+from Analytics.ScenarioEngine import DEFAULT_SHOCKS_BPS, run_rate_shock_scenarios
+from benchmarks.synthetic import DEFAULT_SEED, parse_size, synthetic_portfolio
+from main import build_alm_pipeline, run_alm
+from rbi.liquidity import structural_liquidity_statement
+
+
+VALUATION_DATE = pd.Timestamp("2025-03-31")
+
+# Engines timed on their own: name -> fn(tables, valuation_date, cashflow_table).
+ENGINE_BENCHMARKS = {
+    "cashflow_table": lambda tables, vd, cf: generate_cashflow_table(tables, valuation_date=vd),
+    "risk_measures": lambda tables, vd, cf: compute_risk_measures(tables, vd, cf),
+    "rate_shocks": lambda tables, vd, cf: run_rate_shock_scenarios(
+        tables, DEFAULT_SHOCKS_BPS, vd, shock_type="multiplicative", cashflow_table=cf),
+    "curve_scenarios": lambda tables, vd, cf: run_curve_scenarios(tables, valuation_date=vd, cashflow_table=cf),
+    "key_rate_durations": lambda tables, vd, cf: key_rate_durations(tables, valuation_date=vd, cashflow_table=cf),
+    "aggregation": lambda tables, vd, cf: CashflowAggregator().add_cashflow_table(cf, portfolio_types(tables)).monthly(),
+    "liquidity_buckets": lambda tables, vd, cf: structural_liquidity_statement(
+        cf["payment_date"].to_numpy(), portfolio_types(tables)[cf["instrument_index"].to_numpy()],
+        (cf["interest"] + cf["principal"]).to_numpy(), vd),
+}
+
+
+def measure(fn, *args, memory=False):
+    """
+    Run ``fn(*args)`` once.
+
+    Returns:
+        tuple: (output, {"wall_s", "cpu_s"[, "peak_mb"]}). With ``memory`` the
+        peak of Python-tracked allocations (NumPy and pandas included) made
+        during the call is recorded; tracing slows the call, so its timing
+        should not be compared with untraced runs.
+    """
+    if memory:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        _carry_peak()
+        tracemalloc.reset_peak()
+        frame = [tracemalloc.get_traced_memory()[0], 0]
+        _open_measurements.append(frame)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        output = fn(*args)
+    finally:
+        stats = {"wall_s": time.perf_counter() - wall, "cpu_s": time.process_time() - cpu}
+        if memory:
+            _carry_peak()
+            _open_measurements.pop()
+            stats["peak_mb"] = (frame[1] - frame[0]) / 2 ** 20
+            if started:
+                tracemalloc.stop()
+    return output, stats
+
+
+# [baseline, peak] of each traced measurement in progress, outermost first.
+_open_measurements = []
+
+
+def _carry_peak():
+    # Nested measurements reset tracemalloc's peak; keep the enclosing ones'.
+    peak = tracemalloc.get_traced_memory()[1]
+    for frame in _open_measurements:
+        frame[1] = max(frame[1], peak)
+
+
+def _best(runs):
+    """
+    Fastest wall time of repeated runs, with the CPU time of that run.
+    """
+    return min(runs, key=lambda stats: stats["wall_s"])
+
+
+def _profiled_pipeline(timings, memory):
+    """
+    ALM pipeline whose stage computations record their own timings.
+    """
+    pipeline = build_alm_pipeline()
+    for stage in pipeline.stages:
+        def timed(*args, _compute=stage.compute, _name=stage.name):
+            output, stats = measure(_compute, *args, memory=memory)
+            timings.setdefault(_name, []).append(stats)
+            return output
+        stage.compute = timed
+    return pipeline
+
+
+def benchmark_size(size, seed=DEFAULT_SEED, repeat=1, memory=True, engines=True):
+    """
+    Benchmark one portfolio size.
+
+    ``run_alm`` runs on a fresh pipeline each time so no stage is cached,
+    with stages one at a time so their timings and memory peaks don't overlap.
+    Timings are the best of ``repeat`` untraced runs; memory comes from one
+    additional traced run.
+
+    Returns:
+        dict: positions, cashflow rows, run_alm totals, per-stage and
+        per-engine results.
+    """
+    n = parse_size(size)
+    tables, generate = measure(synthetic_portfolio, n, seed)
+
+    def run_once(traced):
+        timings = {}
+        _, total = measure(lambda: run_alm(tables, VALUATION_DATE, export_format=None,
+                                           pipeline=_profiled_pipeline(timings, traced), max_workers=1),
+                           memory=traced)
+        return total, timings
+
+    totals, stages = [], {}
+    for _ in range(repeat):
+        total, timings = run_once(False)
+        totals.append(total)
+        for name, runs in timings.items():
+            stages.setdefault(name, []).extend(runs)
+    result = {
+        "positions": n,
+        "generate_s": generate["wall_s"],
+        "run_alm": _best(totals),
+        "stages": {name: _best(runs) for name, runs in stages.items()},
+        "engines": {},
+    }
+    if memory:
+        total, timings = run_once(True)
+        result["run_alm"]["peak_mb"] = total["peak_mb"]
+        for name, runs in timings.items():
+            result["stages"][name]["peak_mb"] = runs[0]["peak_mb"]
+
+    cashflow_table = generate_cashflow_table(tables, valuation_date=VALUATION_DATE)
+    result["cashflow_rows"] = len(cashflow_table)
+    if engines:
+        for name, fn in ENGINE_BENCHMARKS.items():
+            runs = [measure(fn, tables, VALUATION_DATE, cashflow_table)[1] for _ in range(repeat)]
+            result["engines"][name] = _best(runs)
+            if memory:
+                result["engines"][name]["peak_mb"] = measure(fn, tables, VALUATION_DATE, cashflow_table,
+                                                             memory=True)[1]["peak_mb"]
+    return result
+
+
+def environment():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes, seed=DEFAULT_SEED, repeat=1, memory=True, engines=True, log=print):
+    """
+    Benchmark every size and return the JSON-ready report.
+    """
+    report = {"environment": environment(), "seed": seed, "repeat": repeat, "sizes": {}}
+    for size in sizes:
+        if log is not None:
+            log(f"Benchmarking {size} positions...")
+        report["sizes"][str(size)] = benchmark_size(size, seed, repeat, memory, engines)
+        if log is not None:
+            log(format_size(str(size), report["sizes"][str(size)]))
+    return report
+
+
+def format_size(size, result):
+    lines = [f"{size}: {result['positions']} positions, {result['cashflow_rows']} cashflow rows"]
+    for group in ("run_alm", "stages", "engines"):
+        rows = {group: result[group]} if group == "run_alm" else result[group]
+        for name, stats in rows.items():
+            memory = f"  peak {stats['peak_mb']:9.1f} MB" if "peak_mb" in stats else ""
+            lines.append(f"  {group:8s} {name:20s} wall {stats['wall_s']:9.3f} s  cpu {stats['cpu_s']:9.3f} s{memory}")
+    return "\n".join(lines)
+
+
+def compare(report, baseline, threshold=0.2, min_seconds=0.05):
+    """
+    Regressions of ``report`` against ``baseline``.
+
+    A measurement regresses when it is more than ``threshold`` (relative)
+    above the baseline. Wall times below ``min_seconds`` in both runs are
+    ignored as noise. Sizes or measurements missing from either report are
+    skipped.
+
+    Returns:
+        list: dicts with size, group, name, metric, baseline, current, change.
+    """
+    regressions = []
+    for size, result in report["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for group in ("run_alm", "stages", "engines"):
+            current_rows = {group: result[group]} if group == "run_alm" else result[group]
+            base_rows = {group: base.get(group, {})} if group == "run_alm" else base.get(group, {})
+            for name, stats in current_rows.items():
+                for metric in ("wall_s", "peak_mb"):
+                    old, new = base_rows.get(name, {}).get(metric), stats.get(metric)
+                    if old is None or new is None or old <= 0:
+                        continue
+                    if metric == "wall_s" and max(old, new) < min_seconds:
+                        continue
+                    change = new / old - 1
+                    if change > threshold:
+                        regressions.append({"size": size, "group": group, "name": name, "metric": metric,
+                                            "baseline": old, "current": new, "change": change})
+    return regressions
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,151 @@
+# benchmarks/synthetic.py
+
+import numpy as np
+
+from Analytics.Schedules import add_months
+from Analytics.PortfolioTable import PortfolioTable
+from Analytics.YieldCurveBuilder import build_zero_forward_curve
+
+
+# Named portfolio sizes used by the benchmark harness.
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Share of positions per instrument type, roughly a retail bank book.
+DEFAULT_MIX = {"Bond": 0.30, "Mortgage": 0.40, "DemandDeposit": 0.25, "InterestRateSwap": 0.05}
+
+DEFAULT_SEED = 42
+
+# Issue dates are drawn from the ten years before this date.
+AS_OF = np.datetime64("2025-03-31", "D")
+
+_PREFIXES = {"Bond": "BND", "Mortgage": "MTG", "DemandDeposit": "DEP", "InterestRateSwap": "IRS"}
+
+
+def parse_size(size):
+    """
+    Number of positions for a size name ('1k', '100k', '1m') or an integer.
+    """
+    if isinstance(size, str):
+        key = size.lower()
+        if key in SIZES:
+            return SIZES[key]
+        return int(float(key))
+    return int(size)
+
+
+def _issue_dates(rng, n, max_years=10):
+    return AS_OF - rng.integers(0, 365 * max_years, n).astype("timedelta64[D]")
+
+
+def _bonds(rng, n):
+    issue = _issue_dates(rng, n)
+    coupon = np.round(rng.uniform(0.05, 0.09, n), 4)
+    return {
+        "notional": np.round(rng.lognormal(np.log(5e6), 0.8, n), -3),
+        "coupon_rate": coupon,
+        "yield_rate": np.round(coupon + rng.normal(0.0, 0.004, n), 4),
+        "issue_date": issue,
+        "maturity_date": add_months(issue, 12 * rng.choice([3, 5, 7, 10, 15, 30], n, p=[.2, .25, .15, .25, .1, .05])),
+        "frequency": rng.choice([1, 2, 4], n, p=[.3, .6, .1]),
+        "country": rng.choice(np.array(["India", None], dtype=object), n, p=[.8, .2]),
+        "instrument_subtype": rng.choice(np.array(["Government", "Corporate", "PSU"], dtype=object), n,
+                                         p=[.5, .35, .15]),
+    }
+
+
+def _mortgages(rng, n):
+    issue = _issue_dates(rng, n, max_years=15)
+    term = rng.choice([120, 180, 240, 360], n, p=[.15, .25, .35, .25])
+    coupon = np.round(rng.uniform(0.075, 0.105, n), 4)
+    return {
+        "notional": np.round(rng.lognormal(np.log(4e6), 0.6, n), -3),
+        "coupon_rate": coupon,
+        "yield_rate": np.round(coupon + rng.normal(0.0, 0.003, n), 4),
+        "issue_date": issue,
+        "maturity_date": add_months(issue, term),
+        "term_months": term,
+        "country": np.full(n, "India", dtype=object),
+    }
+
+
+def _deposits(rng, n):
+    issue = _issue_dates(rng, n, max_years=5)
+    return {
+        "notional": np.round(rng.lognormal(np.log(2e5), 1.2, n), -2),
+        "rate": np.round(rng.uniform(0.025, 0.04, n), 4),
+        "yield_rate": np.round(rng.uniform(0.05, 0.07, n), 4),
+        "issue_date": issue,
+        "maturity_date": add_months(issue, 12 * rng.choice([1, 3, 5, 10], n)),
+        "decay_term_months": rng.choice([12, 36, 60, 120], n, p=[.2, .3, .3, .2]),
+        "frequency": rng.choice([4, 12], n),
+        "country": np.full(n, "India", dtype=object),
+    }
+
+
+def _swaps(rng, n):
+    start = _issue_dates(rng, n, max_years=3)
+    return {
+        "notional": np.round(rng.choice([1e7, 5e7, 1e8, 2.5e8], n), 0),
+        "fixed_rate": np.round(rng.uniform(0.055, 0.075, n), 4),
+        "float_spread": np.round(rng.uniform(0.0, 0.002, n), 4),
+        "yield_rate": np.round(rng.uniform(0.06, 0.07, n), 4),
+        "start_date": start,
+        "end_date": add_months(start, 12 * rng.choice([2, 3, 5, 7, 10], n)),
+        "pay_fixed": rng.random(n) < 0.5,
+        "frequency": rng.choice([2, 4], n, p=[.3, .7]),
+        "country": np.full(n, "India", dtype=object),
+    }
+
+
+_GENERATORS = {"Bond": _bonds, "Mortgage": _mortgages, "DemandDeposit": _deposits, "InterestRateSwap": _swaps}
+
+
+def synthetic_portfolio(size, seed=DEFAULT_SEED, mix=None, as_instruments=False):
+    """
+    Reproducible synthetic portfolio for benchmarks.
+
+    Positions are split across instrument types by ``mix`` and shuffled so
+    the types interleave as in a real file. Each type draws from its own
+    child of ``SeedSequence(seed)``, so the bonds of a 10k portfolio do not
+    change when the swap share does. Swaps share the sample zero/forward
+    curve.
+
+    Parameters:
+        size: Number of positions or a name from ``SIZES``.
+        seed (int): Random seed.
+        mix (dict): {instrument type: share}; defaults to DEFAULT_MIX.
+        as_instruments (bool): Return instrument objects in portfolio order
+            instead of PortfolioTables (slow for large sizes).
+
+    Returns:
+        list: PortfolioTables with positions set, or instrument objects.
+    """
+    n = parse_size(size)
+    mix = DEFAULT_MIX if mix is None else mix
+    types = [t for t in _GENERATORS if mix.get(t, 0) > 0]
+    shares = np.array([mix[t] for t in types], dtype=float)
+    counts = np.floor(n * shares / shares.sum()).astype(np.int64)
+    counts[np.argmax(shares)] += n - counts.sum()
+
+    root = np.random.SeedSequence(seed)
+    type_seeds = dict(zip(_GENERATORS, root.spawn(len(_GENERATORS))))
+    positions = np.random.default_rng(root.spawn(1)[0]).permutation(n)
+    zero_curve, forward_curve = build_zero_forward_curve()
+
+    tables, offset = [], 0
+    for instrument_type, count in zip(types, counts):
+        rng = np.random.default_rng(type_seeds[instrument_type])
+        ids = np.array([f"{_PREFIXES[instrument_type]}{i:07d}" for i in range(count)], dtype=object)
+        shared = ({"zero_curve": zero_curve, "forward_curve": forward_curve}
+                  if instrument_type == "InterestRateSwap" else None)
+        table = PortfolioTable.from_arguments(instrument_type, ids, _GENERATORS[instrument_type](rng, count), shared)
+        tables.append(table.with_positions(np.sort(positions[offset:offset + count])))
+        offset += count
+
+    if not as_instruments:
+        return tables
+    instruments = [None] * n
+    for table in tables:
+        for row, position in enumerate(table.positions):
+            instruments[position] = table.instrument(row)
+    return instruments
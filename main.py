@@ -1,126 +1,396 @@
 # main.py
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-from Instruments.Bond import Bond
-from Instruments.Mortgage import Mortgage
-from Instruments.InterestRateSwap import InterestRateSwap
-from Instruments.DemandDeposit import DemandDeposit
+from Instruments.PortfolioLoader import load_portfolio, load_portfolio_tables
+from Analytics.PortfolioTable import as_tables, portfolio_digest, portfolio_fingerprint, portfolio_ids, portfolio_types
+from Analytics.BatchCashflowEngine import (BATCH_GENERATORS, CURVE_GENERATORS, generate_cashflow_table,
+                                          update_cashflow_table)
 from Analytics.CashflowCalculator import generate_cashflows_for_portfolio
-from Analytics.RateShockEngine import apply_parallel_rate_shocks
-from Analytics.AggregatedCashflows import (
-    aggregate_daily_cashflows_by_type,
-    aggregate_monthly_cashflows_by_type
-)
+from Analytics.CashflowCache import cashflow_cache
+from Analytics.ExecutionBackend import get_default_backend
+from Analytics.RiskKernel import compute_risk_measures
+from Analytics.CurveScenarioEngine import run_curve_scenarios, key_rate_durations
+from Analytics.ScenarioEngine import DEFAULT_SHOCKS_BPS, run_rate_shock_scenarios
+from Analytics.AggregatedCashflows import CashflowAggregator
+from Analytics.NIIEngine import project_nii
+from Analytics.Instrumentation import Instrumentation, counts_by_type, track
+from Analytics.Pipeline import Pipeline, Recompute, Stage
+from Analytics.Sharding import merge_partials, select_shard, write_partial
 from rbi.reporting import generate_rbi_reports
-from Output.ExcelWriter import export_results_to_excel
+from Output.Exporters import export_results
+
+
+def load_portfolio_from_excel(file_path, zero_curve=None, forward_curve=None):
+    """
+    Load portfolio instruments from an Excel file (CSV and Parquet are
+    detected from the file name), attaching the given curves (sample curves
+    by default) to swaps. See ``Instruments.PortfolioLoader``.
+    """
+    return load_portfolio(file_path, zero_curve=zero_curve, forward_curve=forward_curve)
 
 
-def load_portfolio_from_excel(file_path):
+def price_and_duration(portfolio, valuation_date=None, cashflow_table=None, prepayment=None):
     """
-    Load portfolio instruments from an Excel file.
+    Calculate price, duration, convexity and DV01 for each instrument in one
+    discounting pass over the portfolio's cashflows (projected with
+    ``prepayment``, as ``cashflow_table`` was).
     """
-    df = pd.read_excel(file_path)
-    portfolio = []
+    if valuation_date is None:
+        valuation_date = pd.Timestamp.today()
 
-    instrument_map = {
-        "Bond": Bond,
-        "Mortgage": Mortgage,
-        "InterestRateSwap": InterestRateSwap,
-        "DemandDeposit": DemandDeposit,
-    }
+    measures = compute_risk_measures(portfolio, valuation_date, cashflow_table, backend=get_default_backend(),
+                                     prepayment=prepayment)
 
-    for _, row in df.iterrows():
-        instrument_type = row.get("InstrumentType")
-        cls = instrument_map.get(instrument_type)
-        if cls:
-            portfolio.append(cls.from_dataframe_row(row))
+    pricing_df = pd.DataFrame({
+        "ID": portfolio_ids(portfolio),
+        "Instrument Type": portfolio_types(portfolio),
+        "Price": measures["price"],
+        "Macaulay Duration": measures["macaulay"].round(4),
+        "Modified Duration": measures["modified"].round(4),
+        "Convexity": measures["convexity"].round(4),
+        "DV01": measures["dv01"]
+    })
 
-    return portfolio
+    return pricing_df[~np.isnan(measures["price"])].reset_index(drop=True)
 
 
-def price_and_duration(portfolio, valuation_date=None):
+def _model_token(model):
+    return None if model is None else model.token
+
+
+def _run_settings(prepayment):
     """
-    Calculate price and duration for each instrument.
+    The settings besides portfolio and valuation date that change a run's
+    results, as stored with it (``ResultStore.save``).
     """
-    if valuation_date is None:
-        valuation_date = pd.Timestamp.today()
+    token = _model_token(prepayment)
+    return {"prepayment": None if token is None else str(token)}
+
+
+def _reusable_keys(tables):
+    """
+    Row key by position for batch-projected instruments, 0 for the rest.
+    """
+    keys = np.zeros(sum(len(table) for table in tables), dtype=np.uint64)
+    for table in tables:
+        if table.instrument_type in BATCH_GENERATORS:
+            keys[table.positions] = table.row_keys()
+    return keys
+
+
+def _projection_date(tables, valuation_date):
+    """
+    Fingerprint of the date cashflows are projected from: the valuation
+    date when the book holds curve-projected types (swap floating legs read
+    forward rates from it), else None, so other books reuse their projection
+    across valuation dates.
+    """
+    if any(table.instrument_type in CURVE_GENERATORS and len(table) for table in tables):
+        return pd.Timestamp(valuation_date)
+    return None
+
+
+def _project_cashflows(tables, prepayment, valuation_date):
+    return {"table": generate_cashflow_table(tables, prepayment, valuation_date), "keys": _reusable_keys(tables),
+            "token": object(), "based_on": None, "carried": None}
+
 
-    pricing_data = []
+def _update_cashflows(previous, previous_inputs, tables, prepayment, valuation_date):
+    # Only instruments whose terms changed (or that are new) are projected
+    # again, plus every curve-projected one (a new valuation date moves its
+    # floating legs); a different prepayment model changes every mortgage.
+    if _model_token(previous_inputs[1]) != _model_token(prepayment):
+        raise Recompute
+    keys = _reusable_keys(tables)
+    table, previous_positions, positions = update_cashflow_table(previous["table"], previous["keys"], tables, keys,
+                                                                 prepayment, valuation_date)
+    return {"table": table, "keys": keys, "token": object(), "based_on": previous["token"],
+            "carried": (previous_positions, positions)}
 
-    for instrument in portfolio:
-        try:
-            price = instrument.calculate_price(valuation_date=valuation_date)
-            macaulay, modified = instrument.calculate_duration(valuation_date=valuation_date)
 
-            pricing_data.append({
-                "ID": instrument.ID,
-                "Instrument Type": instrument.__class__.__name__,
-                "Price": price,
-                "Macaulay Duration": macaulay,
-                "Modified Duration": modified
-            })
+def _aggregate_cashflows(tables, projection):
+    aggregator = CashflowAggregator().add_cashflow_table(projection["table"], portfolio_types(tables))
+    return {"aggregator": aggregator, "daily": aggregator.daily(), "monthly": aggregator.monthly()}
 
-        except Exception as e:
-            print(f"Error calculating price or duration for {instrument.ID}: {e}")
 
-    return pd.DataFrame(pricing_data)
+def _update_aggregates(previous, previous_inputs, tables, projection):
+    # Delta update: remove the cashflows of dropped or changed instruments and
+    # add those of new ones, instead of re-aggregating the whole book.
+    previous_tables, previous_projection = previous_inputs
+    if projection["based_on"] is not previous_projection["token"]:
+        raise Recompute
 
+    previous_positions, positions = projection["carried"]
+    old_table, new_table = previous_projection["table"], projection["table"]
+    kept_old = np.zeros(len(previous_projection["keys"]), dtype=bool)
+    kept_old[previous_positions] = True
+    kept_new = np.zeros(len(projection["keys"]), dtype=bool)
+    kept_new[positions] = True
+
+    aggregator = previous["aggregator"].copy()
+    aggregator.add_cashflow_table(old_table[~kept_old[old_table["instrument_index"].to_numpy()]],
+                                  portfolio_types(previous_tables), sign=-1)
+    aggregator.add_cashflow_table(new_table[~kept_new[new_table["instrument_index"].to_numpy()]],
+                                  portfolio_types(tables))
+    return {"aggregator": aggregator, "daily": aggregator.daily(), "monthly": aggregator.monthly()}
+
+
+def _rbi_reports(aggregates, shock_scenarios, nii, valuation_date):
+    return generate_rbi_reports({
+        "daily_agg": aggregates["daily"],
+        "monthly_agg": aggregates["monthly"],
+        "rate_shock_results": shock_scenarios["portfolio"],
+        "nii_sensitivity": nii["sensitivity"],
+        "valuation_date": valuation_date
+    })
+
+
+def build_alm_pipeline():
+    """
+    The ALM stage graph. Sources: portfolio, tables (the portfolio as
+    PortfolioTables), valuation_date, prepayment (model or None) and
+    projection_date (the valuation date, fingerprinted by ``_projection_date``).
+    Cashflow projection and aggregation depend on the valuation date only
+    through swap floating legs, so a new valuation date re-projects just the
+    swaps (and reuses everything for books without them); portfolio edits
+    re-project and re-aggregate by delta.
 
-def run_alm(portfolio, valuation_date=None):
+    After projection the stages are independent of one another (bar the RBI
+    reports) and run concurrently. All run on threads: the engines spend
+    their time in NumPy / pandas kernels that release the GIL, and splitting
+    cashflows per instrument only builds an ``InstrumentCashflows`` view
+    (frames are sliced on lookup), so no stage holds the GIL for long.
+    """
+    return Pipeline([
+        Stage("projection", ["tables", "prepayment", "projection_date"], _project_cashflows, _update_cashflows,
+              "Projecting cashflows"),
+        Stage("cashflows", ["portfolio", "projection"],
+              lambda portfolio, projection: generate_cashflows_for_portfolio(
+                  portfolio, cashflow_table=projection["table"]),
+              label="Splitting cashflows by instrument"),
+        Stage("pricing", ["tables", "valuation_date", "projection", "prepayment"],
+              lambda tables, valuation_date, projection, prepayment: price_and_duration(
+                  tables, valuation_date, projection["table"], prepayment),
+              label="Pricing"),
+        Stage("shock_scenarios", ["tables", "valuation_date", "projection", "prepayment"],
+              lambda tables, valuation_date, projection, prepayment: run_rate_shock_scenarios(
+                  tables, DEFAULT_SHOCKS_BPS, valuation_date, shock_type="multiplicative",
+                  cashflow_table=projection["table"], prepayment=prepayment),
+              label="Rate shock scenarios"),
+        Stage("curve_scenarios", ["tables", "valuation_date", "projection"],
+              lambda tables, valuation_date, projection: run_curve_scenarios(
+                  tables, valuation_date=valuation_date, cashflow_table=projection["table"]),
+              label="Curve scenarios"),
+        Stage("key_rate_durations", ["tables", "valuation_date", "projection"],
+              lambda tables, valuation_date, projection: key_rate_durations(
+                  tables, valuation_date=valuation_date, cashflow_table=projection["table"]),
+              label="Key-rate durations"),
+        Stage("nii", ["tables", "valuation_date", "projection"],
+              lambda tables, valuation_date, projection: project_nii(
+                  tables, valuation_date, DEFAULT_SHOCKS_BPS, cashflow_table=projection["table"]),
+              label="Net interest income"),
+        Stage("aggregates", ["tables", "projection"], _aggregate_cashflows, _update_aggregates,
+              "Aggregating cashflows"),
+        Stage("rbi_reports", ["aggregates", "shock_scenarios", "nii", "valuation_date"], _rbi_reports,
+              label="RBI reports"),
+    ])
+
+
+def run_alm(portfolio, valuation_date=None, export_format="excel", output_path=None, background_export=False,
+            progress_callback=None, pipeline=None, instrumentation=None, prepayment=None, max_workers=None,
+            shard=None, result_store=None, run_label=None):
     """
     Perform full ALM analysis for a portfolio.
+
+    ``portfolio`` is a list of instrument objects or PortfolioTables; it is
+    converted to tables once and every stage reads the same columns.
+
+    The analysis runs as the dependency-tracked stages of
+    ``build_alm_pipeline``, on a fresh pipeline unless ``pipeline`` is given.
+    Passing the same pipeline to successive runs opts in to reuse (it keeps
+    every stage's last output alive meanwhile): stages whose inputs are
+    unchanged since its previous run are reused, so a new valuation date
+    re-projects and re-aggregates only the swaps, and editing a few
+    positions updates projection and aggregation by delta.
+    ``results["pipeline_stages"]`` records what this run cached, updated or
+    computed.
+
+    Results are exported through ``Output.Exporters`` ('excel', 'parquet',
+    'csv' or None to skip) to ``output_path`` (default per format). With
+    ``background_export=True`` the export runs on a background thread and
+    run_alm returns as soon as the analytics are done; ``results["export"]``
+    is a Future resolving to the written path. ``output_path`` may also be a
+    writable buffer such as ``io.BytesIO`` for the Excel format.
+
+    ``progress_callback(fraction, message)`` is called as each stage starts.
+
+    ``instrumentation`` (an ``Analytics.Instrumentation.Instrumentation``, or
+    True for a default one) records wall time, CPU time, optional peak
+    memory and row / instrument counts for every stage and engine call;
+    the report is returned as ``results["instrumentation"]``. A background
+    export adds its records to the Instrumentation object when it finishes.
+
+    ``prepayment`` (an ``Analytics.Prepayment.PrepaymentModel``) projects
+    mortgages with behavioural prepayments; rate-dependent models also
+    re-project them under every rate shock.
+
+    Independent stages (pricing, shock and curve scenarios, key-rate
+    durations, NII, aggregation) run concurrently on up to ``max_workers``
+    threads (default: the pipeline's setting, else CPU count); 1 runs them
+    one after another, as does instrumentation with memory tracking (so
+    per-stage peaks don't overlap). If stages fail, the others still finish and
+    ``Analytics.Pipeline.PipelineError`` is raised listing each failed stage
+    with its exception and the stages skipped because of it.
+
+    ``shard=(index, count)`` analyses only the positions whose ID hashes to
+    that shard (``Analytics.Sharding.select_shard``) and records them as
+    ``results["shard"]`` (the only result when the shard is empty);
+    ``run_shard`` and ``run_sharded`` build on it.
+
+    ``result_store`` (an ``Output.ResultStore.ResultStore``) keeps the run's
+    cashflows and summary tables, keyed by valuation date, portfolio digest
+    and the prepayment model, under the optional ``run_label``; ``results["stored_run"]`` is
+    its manifest.
     """
     if valuation_date is None:
         valuation_date = pd.Timestamp.today()
+    if pipeline is None:
+        pipeline = build_alm_pipeline()
+    if instrumentation is True:
+        instrumentation = Instrumentation()
+    if instrumentation is None:
+        return _run_alm(portfolio, valuation_date, export_format, output_path, background_export,
+                        progress_callback, pipeline, prepayment, max_workers, shard, result_store, run_label)
 
-    # 1. Generate projected cashflows
-    cashflows = generate_cashflows_for_portfolio(portfolio)
+    token = instrumentation.activate()
+    try:
+        results = _run_alm(portfolio, valuation_date, export_format, output_path, background_export,
+                           progress_callback, pipeline, prepayment, max_workers, shard, result_store, run_label)
+    finally:
+        instrumentation.deactivate(token)
+    results["instrumentation"] = instrumentation.report()
+    return results
 
-    # Build instrument map (needed for cashflow aggregation functions)
-    instrument_map = {inst.ID: type(inst).__name__ for inst in portfolio}
 
-    # 2. Price and duration
-    pricing_df = price_and_duration(portfolio, valuation_date)
+def _run_alm(portfolio, valuation_date, export_format, output_path, background_export, progress_callback, pipeline,
+             prepayment, max_workers, shard, result_store, run_label):
+    with track("run_alm") as run_record:
+        shard_info = None
+        if shard is not None:
+            with track("select_shard", shard=shard[0], shards=shard[1]):
+                portfolio, shard_info = select_shard(portfolio, *shard)
+            if not portfolio:
+                # Nothing hashed to this shard: there is nothing to analyse.
+                return {"shard": shard_info}
+        tables = as_tables(portfolio)
+        run_record["instruments"] = counts_by_type(tables)
+        with track("fingerprint"):
+            fingerprint = portfolio_fingerprint(tables)
 
-    # 3. Apply parallel rate shocks
-    shock_results = apply_parallel_rate_shocks(portfolio)
+        def stage_progress(fraction, message):
+            if progress_callback is not None:
+                progress_callback(0.85 * fraction, message)
 
-    # 4. Aggregate cashflows
-    daily_agg = aggregate_daily_cashflows_by_type(cashflows, instrument_map)
-    monthly_agg = aggregate_monthly_cashflows_by_type(cashflows, instrument_map)
+        stages, statuses = pipeline.run(
+            {"portfolio": portfolio, "tables": tables, "valuation_date": valuation_date, "prepayment": prepayment,
+             "projection_date": valuation_date},
+            {"portfolio": fingerprint, "tables": fingerprint, "valuation_date": pd.Timestamp(valuation_date),
+             "prepayment": _model_token(prepayment), "projection_date": _projection_date(tables, valuation_date)},
+            stage_progress,
+            max_workers=max_workers,
+        )
+        shock_scenarios = stages["shock_scenarios"]
+        curve_scenarios = stages["curve_scenarios"]
 
-    # 5. RBI Regulatory Reports
-    rbi_reports = generate_rbi_reports({
-        "daily_agg": daily_agg,
-        "monthly_agg": monthly_agg,
-        "rate_shock_results": shock_results
-    })
+        # Combine results
+        results = {
+            "cashflows": stages["cashflows"],
+            "pricing": stages["pricing"],
+            "daily_agg": stages["aggregates"]["daily"],
+            "monthly_agg": stages["aggregates"]["monthly"],
+            "rate_shock_results": shock_scenarios["portfolio"],
+            "rate_shock_by_type": shock_scenarios["by_type"],
+            "rate_shock_by_instrument": shock_scenarios["by_instrument"],
+            "curve_scenario_results": curve_scenarios["portfolio"],
+            "curve_scenario_by_type": curve_scenarios["by_type"],
+            "key_rate_durations": stages["key_rate_durations"],
+            "nii_sensitivity": stages["nii"]["sensitivity"],
+            "nii_by_type": stages["nii"]["by_type"],
+            "nii_monthly": stages["nii"]["monthly"],
+            "rbi_reports": stages["rbi_reports"],
+            "cashflow_cache_stats": cashflow_cache.stats(),
+            "pipeline_stages": statuses
+        }
+        if shard_info is not None:
+            results["shard"] = shard_info
+
+        if result_store is not None:
+            if progress_callback is not None:
+                progress_callback(0.85, "Storing results")
+            results["stored_run"] = result_store.save(results, stages["projection"]["table"], portfolio_ids(tables),
+                                                      portfolio_types(tables), valuation_date,
+                                                      portfolio_digest(tables), run_label,
+                                                      _run_settings(prepayment))
 
-    # 6. Combine results
-    results = {
-        "cashflows": cashflows,
-        "pricing": pricing_df,
-        "daily_agg": daily_agg,
-        "monthly_agg": monthly_agg,
-        "rate_shock_results": shock_results,
-        "rbi_reports": rbi_reports
-    }
-
-    # 7. Save results to file
-    output_file = "/tmp/ALM_Results.xlsx"
-
-    # Prepare prices and durations dicts for export
-    prices = pricing_df.set_index("ID")["Price"].to_dict()
-    durations = pricing_df.set_index("ID")[["Macaulay Duration", "Modified Duration"]].to_dict("index")
-
-    export_results_to_excel(
-        filepath=output_file,
-        prices=prices,
-        durations=durations,
-        cashflows_dict=cashflows,
-        daily_agg_df=daily_agg,
-        monthly_agg_df=monthly_agg,
-        shock_df=shock_results
-    )
+        if progress_callback is not None:
+            progress_callback(0.85, "Exporting results")
+        # Save results (one consolidated cashflow table plus the summary tables)
+        if export_format is not None:
+            results["export"] = export_results(results, stages["projection"]["table"], portfolio_ids(tables),
+                                               portfolio_types(tables), export_format, output_path,
+                                               background=background_export)
+
+        if progress_callback is not None:
+            progress_callback(1.0, "Analysis complete")
 
     return results
+
+
+def run_shard(source, shard, shards, output_dir, valuation_date=None, prepayment=None, max_workers=None):
+    """
+    Analyse one shard of a portfolio file and write its partial results
+    under ``output_dir`` (see ``Analytics.Sharding.write_partial``).
+
+    Every shard reads the whole file and keeps its own positions, so a
+    shard needs only the file, its number and the shard count, and can run
+    in any process or on any host. All shards of a run must use the same
+    valuation date (default today).
+
+    Returns:
+        str: The partial's directory.
+    """
+    valuation_date = pd.Timestamp.today().normalize() if valuation_date is None else pd.Timestamp(valuation_date)
+    results = run_alm(load_portfolio_tables(source), valuation_date, export_format=None, prepayment=prepayment,
+                      max_workers=max_workers, shard=(shard, shards))
+    return write_partial(results, output_dir, valuation_date)
+
+
+def run_sharded(source, shards, output_dir, valuation_date=None, processes=None, prepayment=None):
+    """
+    Map-reduce ``run_alm`` over ``shards`` shards of a portfolio file on
+    local worker processes, then merge the partial results.
+
+    Workers are started with ``spawn`` (no forked thread pools) and run
+    their stages one at a time, the processes providing the parallelism.
+    Multi-host runs call ``run_shard`` on each host instead and
+    ``Analytics.Sharding.merge_partials`` on the collected partials.
+
+    Parameters:
+        processes (int): Worker processes (default: shards, capped at CPU count).
+
+    Returns:
+        dict: Merged results (see ``merge_partials``).
+    """
+    valuation_date = pd.Timestamp.today().normalize() if valuation_date is None else pd.Timestamp(valuation_date)
+    processes = processes or min(shards, os.cpu_count() or 1)
+    with track("run_sharded", shards=shards, processes=processes):
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(run_shard, source, shard, shards, output_dir, valuation_date, prepayment, 1)
+                       for shard in range(shards)]
+            paths = [future.result() for future in futures]
+        return merge_partials(paths)
@@ -1,11 +1,16 @@
 # rbi/reporting.py
 
+import pandas as pd
+from Analytics.Instrumentation import track
+from rbi.liquidity import structural_liquidity_statement, liquidity_by_type
+
 def generate_rbi_reports(results_dict):
     """
     Generate RBI required regulatory reports based on ALM results.
 
     Args:
-        results_dict (dict): Dictionary containing daily cashflows, monthly cashflows, rate shock results.
+        results_dict (dict): Dictionary containing daily cashflows, monthly cashflows, rate shock results,
+            NII sensitivity and the valuation date (default today) the liquidity buckets are measured from.
 
     Returns:
         dict: Dictionary of RBI regulatory report DataFrames.
@@ -24,6 +29,15 @@ def generate_rbi_reports(results_dict):
             liquidity_profile.columns = ['Date', 'Cumulative Cashflow']
             reports["Liquidity Gap Profile"] = liquidity_profile
 
+            # Structural Liquidity Statement over the RBI time buckets
+            daily = results_dict["daily_agg"]
+            valuation_date = results_dict.get("valuation_date") or pd.Timestamp.today().normalize()
+            flows = (daily['payment_date'].to_numpy(), daily['instrument_type'].to_numpy(),
+                     (daily['interest'] + daily['principal']).to_numpy(), valuation_date)
+            with track("liquidity_buckets", rows=len(daily)):
+                reports["Structural Liquidity Statement"] = structural_liquidity_statement(*flows)
+                reports["Liquidity by Instrument Type"] = liquidity_by_type(*flows)
+
     # Interest Rate Sensitivity Report
     shocks_df = results_dict.get("rate_shock_results")
     if shocks_df is not None:
@@ -34,4 +48,13 @@ def generate_rbi_reports(results_dict):
         else:
             print("⚠️ Skipping Interest Rate Sensitivity Report: Missing expected columns.")
 
+    # Earnings sensitivity: net interest income over the horizon per shock
+    nii_df = results_dict.get("nii_sensitivity")
+    if nii_df is not None:
+        expected_cols = ['Shock (bps)', 'Net Interest Income', 'Change in NII', 'Change (%)']
+        if all(col in nii_df.columns for col in expected_cols):
+            reports["NII Sensitivity"] = nii_df[expected_cols]
+        else:
+            print("⚠️ Skipping NII Sensitivity Report: Missing expected columns.")
+
     return reports
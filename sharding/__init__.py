@@ -0,0 +1 @@
+# sharding/__init__.py
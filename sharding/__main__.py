@@ -0,0 +1,75 @@
+# sharding/__main__.py
+"""
+Sharded ALM runs: each shard analyses the positions whose ID hashes to it
+and writes partial results; merging the partials gives the single-node results.
+
+    python -m sharding run Portfolio.xlsx --shard 0 --shards 4 --valuation-date 2025-03-31 --output parts
+    python -m sharding merge parts --export merged --format parquet
+    python -m sharding local Portfolio.xlsx --shards 4 --valuation-date 2025-03-31 --output parts
+
+``run`` is one map task (one per process or host, sharing the portfolio
+file); ``local`` runs every shard on local processes and merges them.
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from Analytics.Sharding import merge_partials
+from main import run_shard, run_sharded
+from Output.Exporters import EXPORTERS, export_results
+
+
+def export_merged(results, export_format, path):
+    # Partials carry no cashflow detail, so the cashflow table is empty.
+    cashflows = pd.DataFrame({"instrument_index": pd.Series(dtype="int64"),
+                              "payment_date": pd.Series(dtype="datetime64[ns]"),
+                              "interest": pd.Series(dtype=float), "principal": pd.Series(dtype=float)})
+    return export_results(results, cashflows, [], [], export_format, path).result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sharding", description="Sharded ALM runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Analyse one shard and write its partial results")
+    run.add_argument("portfolio", help="Portfolio file (Excel, CSV or Parquet)")
+    run.add_argument("--shard", type=int, required=True)
+    run.add_argument("--shards", type=int, required=True)
+    run.add_argument("--output", required=True, help="Directory the partial is written under")
+
+    merge = commands.add_parser("merge", help="Merge partial results and export them")
+    merge.add_argument("partials", nargs="+", help="Partial directories, or directories holding them")
+
+    local = commands.add_parser("local", help="Run every shard on local processes and merge")
+    local.add_argument("portfolio", help="Portfolio file (Excel, CSV or Parquet)")
+    local.add_argument("--shards", type=int, required=True)
+    local.add_argument("--processes", type=int, help="Worker processes (default: shards, capped at CPU count)")
+    local.add_argument("--output", required=True, help="Directory the partials are written under")
+
+    for command in (run, local):
+        command.add_argument("--valuation-date", help="YYYY-MM-DD, the same for every shard (default today)")
+    for command in (merge, local):
+        command.add_argument("--export", dest="export_path", help="Write the merged results here")
+        command.add_argument("--format", default="parquet", choices=list(EXPORTERS))
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        print(run_shard(args.portfolio, args.shard, args.shards, args.output, args.valuation_date))
+        return 0
+
+    if args.command == "merge":
+        results = merge_partials(args.partials)
+    else:
+        results = run_sharded(args.portfolio, args.shards, args.output, args.valuation_date, args.processes)
+    print(f"Merged {results['shards']} shards at {results['valuation_date'].date()}")
+    if "rate_shock_results" in results:
+        print(results["rate_shock_results"].to_string(index=False))
+    if args.export_path:
+        print(f"Results written to {export_merged(results, args.format, args.export_path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
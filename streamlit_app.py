@@ -1,67 +1,124 @@
 # streamlit_app.py
 
+import time
+from datetime import date
+
 import streamlit as st
 import plotly.express as px
-from main import run_alm, load_portfolio_from_excel
+from analysis_jobs import AnalysisJobs
+from Output.ResultStore import ResultStore
 
 st.set_page_config(page_title="ALM System", layout="wide")
 st.title("📈 Asset Liability Management System")
 
-uploaded_file = st.file_uploader("Upload Portfolio Excel File", type=["xlsx"])
 
+@st.cache_resource
+def get_analysis_jobs():
+    # One runner per server: results are shared across sessions by upload hash and valuation date,
+    # and every run is kept in the result store.
+    return AnalysisJobs(result_store=ResultStore())
+
+
+def first_instrument_cashflows(results):
+    cashflows = results.get("cashflows")
+    if cashflows:
+        return cashflows[next(iter(cashflows))]
+    # Stored runs keep the long-format table instead.
+    table = results["cashflow_table"]
+    return table[table["ID"] == table["ID"].iloc[0]] if len(table) else table
+
+
+jobs = get_analysis_jobs()
+uploaded_file = st.file_uploader("Upload Portfolio File", type=["xlsx", "csv", "parquet"])
+valuation_date = st.date_input("Valuation Date", value=date.today())
+
+runs = jobs.result_store.runs()
+past_runs = {f"{run.valuation_date:%Y-%m-%d} · {run.label or 'unnamed'} · {run.portfolio}"
+             + "".join(f" · {name}: {value}" for name, value in run.settings.items()): run
+             for run in runs.iloc[::-1].itertuples()}
+past_run = past_runs.get(st.sidebar.selectbox("Past runs", ["None"] + list(past_runs)))
+
+job = None
 if uploaded_file:
-    with st.spinner("Processing Portfolio..."):
-        portfolio = load_portfolio_from_excel(uploaded_file)
+    content = uploaded_file.getvalue()
+    key = AnalysisJobs.job_key(content, valuation_date)
+
+    # Keep this session's job across reruns; a failed job is not resubmitted until the inputs change.
+    job = st.session_state.get("alm_job")
+    if job is None or job.key != key:
+        job = jobs.submit(content, uploaded_file.name, valuation_date)
+        st.session_state["alm_job"] = job
+elif past_run is not None:
+    job = st.session_state.get("alm_job")
+    if job is None or job.key != AnalysisJobs.stored_key(past_run.valuation_date, past_run.portfolio,
+                                                         past_run.settings):
+        job = jobs.load(past_run.valuation_date, past_run.portfolio, past_run.settings)
+        st.session_state["alm_job"] = job
+
+if job is not None:
+    if not job.done():
+        st.progress(job.progress, text=job.message)
+        time.sleep(0.5)
+        st.rerun()
 
-        st.success("Portfolio Loaded Successfully!")
+    try:
+        results = job.result()
+    except Exception as e:
+        st.error(f"Analysis failed: {e}")
+        st.stop()
 
-        # Run full ALM Analysis
-        results = run_alm(portfolio)
+    st.success("Analysis Complete!")
 
-        st.success("Analysis Complete!")
+    # Show key results
+    st.header("Portfolio Pricing Summary")
+    st.dataframe(results["pricing"], use_container_width=True)
 
-        # Show key results
-        st.header("Portfolio Pricing Summary")
-        st.dataframe(results["pricing"], use_container_width=True)
+    st.header("Cashflows (First Instrument Shown)")
+    st.dataframe(first_instrument_cashflows(results).head(100), use_container_width=True)
 
-        st.header("Cashflows (First Instrument Shown)")
-        first_instrument_id = list(results["cashflows"].keys())[0]
-        st.dataframe(results["cashflows"][first_instrument_id].head(100), use_container_width=True)
+    st.header("Daily Aggregated Cashflows")
+    st.dataframe(results["daily_agg"].head(100), use_container_width=True)
 
-        st.header("Daily Aggregated Cashflows")
-        st.dataframe(results["daily_agg"].head(100), use_container_width=True)
+    st.header("Monthly Aggregated Cashflows")
+    st.dataframe(results["monthly_agg"].head(100), use_container_width=True)
 
-        st.header("Monthly Aggregated Cashflows")
-        st.dataframe(results["monthly_agg"].head(100), use_container_width=True)
+    # Plot Monthly Cashflow
+    st.subheader("Monthly Cashflow Profile")
+    if "Month" in results["monthly_agg"].columns:
+        x_axis = "Month"
+    else:
+        x_axis = results["monthly_agg"].columns[0]  # fallback in case
 
-        # Plot Monthly Cashflow
-        st.subheader("Monthly Cashflow Profile")
-        if "Month" in results["monthly_agg"].columns:
-            x_axis = "Month"
-        else:
-            x_axis = results["monthly_agg"].columns[0]  # fallback in case
+    st.plotly_chart(
+        px.bar(
+            results["monthly_agg"],
+            x=x_axis,
+            y=["interest", "principal"],
+            title="Monthly Interest and Principal Cashflows",
+            labels={x_axis: "Month", "value": "Amount"},
+            barmode="stack"
+        ),
+        use_container_width=True
+    )
 
+    # Value of this portfolio across its stored valuation dates
+    stored_run = results.get("stored_run") or {}
+    portfolio = stored_run.get("portfolio")
+    history = jobs.result_store.query("rate_shock_results", ["Shock (bps)", "Portfolio Market Value"],
+                                      portfolio=portfolio, settings=stored_run.get("settings")) if portfolio else None
+    if history is not None and history["valuation_date"].nunique() > 1:
+        st.subheader("Market Value History")
         st.plotly_chart(
-            px.bar(
-                results["monthly_agg"],
-                x=x_axis,
-                y=["interest", "principal"],
-                title="Monthly Interest and Principal Cashflows",
-                labels={x_axis: "Month", "value": "Amount"},
-                barmode="stack"
-            ),
+            px.line(history, x="valuation_date", y="Portfolio Market Value", color="Shock (bps)",
+                    markers=True, labels={"valuation_date": "Valuation Date"}),
             use_container_width=True
         )
 
-        # Download Results
-        st.header("Download ALM Results")
-        try:
-            with open("/tmp/ALM_Results.xlsx", "rb") as f:
-                st.download_button(
-                    label="📥 Download Full ALM Results",
-                    data=f,
-                    file_name="ALM_Results.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-        except FileNotFoundError:
-            st.error("ALM Results file not found. Please re-run the analysis.")
+    # Download Results
+    st.header("Download ALM Results")
+    st.download_button(
+        label="📥 Download Full ALM Results",
+        data=results["export_bytes"],
+        file_name="ALM_Results.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
@@ -0,0 +1,33 @@
+# tests/conftest.py
+
+import pandas as pd
+import pytest
+
+from Analytics.CashflowCache import cashflow_cache
+from benchmarks.synthetic import synthetic_portfolio
+
+
+VALUATION_DATE = pd.Timestamp("2025-03-31")
+
+
+@pytest.fixture(autouse=True)
+def empty_cashflow_cache():
+    # Every test starts from a cold cache, so none passes on another's entries.
+    cashflow_cache.clear()
+    yield
+    cashflow_cache.clear()
+
+
+@pytest.fixture
+def valuation_date():
+    return VALUATION_DATE
+
+
+@pytest.fixture
+def tables():
+    return synthetic_portfolio(400, seed=7)
+
+
+@pytest.fixture
+def instruments():
+    return synthetic_portfolio(200, seed=7, as_instruments=True)
@@ -0,0 +1,38 @@
+# tests/test_cashflow_engine.py
+
+import numpy as np
+import pandas as pd
+
+from Analytics.BatchCashflowEngine import generate_cashflow_table, split_cashflow_table
+from Analytics.PortfolioTable import PortfolioTable
+
+
+def _reference(inst, valuation_date):
+    # Per-instrument projection in the table layout (swaps: net cashflow as interest).
+    if type(inst).__name__ == "InterestRateSwap":
+        df = inst.generate_cashflows(valuation_date)
+        return df["payment_date"].to_numpy(), df["net_cashflow"].to_numpy(), np.zeros(len(df))
+    df = inst.generate_cashflows()
+    return pd.to_datetime(df["payment_date"]).to_numpy(), df["interest"].to_numpy(), df["principal"].to_numpy()
+
+
+def test_batch_projection_matches_each_instrument(instruments, valuation_date):
+    table = generate_cashflow_table(instruments, valuation_date=valuation_date)
+    cashflows = split_cashflow_table(table, instruments)
+
+    for inst in instruments:
+        dates, interest, principal = _reference(inst, valuation_date)
+        df = cashflows[inst.ID]
+        np.testing.assert_array_equal(df["payment_date"].to_numpy(), dates.astype("datetime64[ns]"))
+        np.testing.assert_allclose(df["interest"].to_numpy(), interest, rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(df["principal"].to_numpy(), principal, rtol=1e-12, atol=1e-6)
+
+
+def test_tables_and_objects_project_the_same_cashflows(instruments, valuation_date):
+    from_objects = generate_cashflow_table(instruments, valuation_date=valuation_date)
+    tables = [PortfolioTable.from_instruments([inst for inst in instruments if type(inst).__name__ == name],
+                                              positions=[i for i, inst in enumerate(instruments)
+                                                         if type(inst).__name__ == name])
+              for name in dict.fromkeys(type(inst).__name__ for inst in instruments)]
+    from_tables = generate_cashflow_table(tables, valuation_date=valuation_date)
+    pd.testing.assert_frame_equal(from_objects, from_tables)
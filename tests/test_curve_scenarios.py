@@ -0,0 +1,40 @@
+# tests/test_curve_scenarios.py
+
+import numpy as np
+import pytest
+
+from Analytics.CurveScenarioEngine import key_rate_durations, run_curve_scenarios
+from Analytics.YieldCurveBuilder import bootstrap_curve, build_zero_forward_curve
+from Instruments.Bond import Bond
+from Instruments.InterestRateSwap import InterestRateSwap
+from main import price_and_duration
+
+
+def _swap(ID, curve, valuation_date):
+    return InterestRateSwap(ID, 10_000_000, 0.035, 0.001, valuation_date, "2035-03-31", 0.03, pay_fixed=False,
+                            frequency=4, zero_curve=curve, forward_curve=curve)
+
+
+def test_scenario_base_is_the_price_on_the_attached_curve(valuation_date):
+    curve = bootstrap_curve(valuation_date=valuation_date)
+    portfolio = [_swap("S1", curve, valuation_date),
+                 Bond("B1", 1_000_000, 0.07, "2032-03-31", valuation_date, 0.068, 2)]
+    prices = price_and_duration(portfolio, valuation_date).set_index("ID")["Price"]
+
+    base = run_curve_scenarios(portfolio, valuation_date=valuation_date)["by_instrument"]["Base"]
+    np.testing.assert_allclose(base[prices.index], prices, rtol=1e-12)
+
+    krd = key_rate_durations(portfolio, valuation_date=valuation_date)
+    parallel = run_curve_scenarios(portfolio, {"Up": lambda t: np.full_like(t, 1e-4)},
+                                   valuation_date=valuation_date)["by_instrument"]
+    np.testing.assert_allclose(krd.sum(axis=1), -(parallel["Up"] - parallel["Base"]) / parallel["Base"] / 1e-4,
+                               rtol=0.05)
+
+
+def test_swaps_on_different_curves_need_an_explicit_curve(valuation_date):
+    sample, _ = build_zero_forward_curve()
+    portfolio = [_swap("S1", bootstrap_curve(valuation_date=valuation_date), valuation_date),
+                 _swap("S2", sample, valuation_date)]
+    with pytest.raises(ValueError, match="different zero curves"):
+        run_curve_scenarios(portfolio, valuation_date=valuation_date)
+    run_curve_scenarios(portfolio, curve=sample, valuation_date=valuation_date)
@@ -0,0 +1,38 @@
+# tests/test_execution_backend.py
+
+import numpy as np
+import pytest
+
+from Analytics.BatchCashflowEngine import BATCH_GENERATORS, generate_cashflow_table
+from Analytics.ExecutionBackend import ExecutionBackend
+from Analytics.PortfolioTable import portfolio_types
+from Analytics.Prepayment import ConstantCPR
+from Analytics.RiskKernel import compute_risk_measures
+
+
+@pytest.fixture(scope="module")
+def backend():
+    with ExecutionBackend(max_workers=2, min_parallel_instruments=1) as backend:
+        yield backend
+
+
+@pytest.mark.parametrize("prepayment", [None, ConstantCPR(0.1)])
+def test_backend_matches_serial_risk_measures(tables, valuation_date, backend, prepayment):
+    cashflow_table = generate_cashflow_table(tables, prepayment, valuation_date)
+    serial = compute_risk_measures(tables, valuation_date, cashflow_table, prepayment=prepayment)
+    for table in (cashflow_table, None):
+        parallel = compute_risk_measures(tables, valuation_date, table, backend=backend, prepayment=prepayment)
+        for name, values in serial.items():
+            np.testing.assert_allclose(parallel[name], values, rtol=1e-12, equal_nan=True)
+
+
+def test_backend_discounts_the_cashflow_table_it_is_given(tables, valuation_date, backend):
+    cashflow_table = generate_cashflow_table(tables, valuation_date=valuation_date)
+    doubled = cashflow_table.assign(interest=cashflow_table["interest"] * 2,
+                                    principal=cashflow_table["principal"] * 2)
+    base = compute_risk_measures(tables, valuation_date, cashflow_table, backend=backend)["price"]
+    prices = compute_risk_measures(tables, valuation_date, doubled, backend=backend)["price"]
+
+    batch = np.isin(portfolio_types(tables), list(BATCH_GENERATORS))
+    np.testing.assert_allclose(prices[batch], 2 * base[batch], rtol=1e-12)
+    np.testing.assert_allclose(prices[~batch], base[~batch], rtol=1e-12)
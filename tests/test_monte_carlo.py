@@ -0,0 +1,18 @@
+# tests/test_monte_carlo.py
+
+import numpy as np
+import pytest
+
+from Analytics.MonteCarlo import HullWhite, Vasicek, run_monte_carlo
+
+
+@pytest.mark.parametrize("model", [Vasicek(sigma=1e-9), HullWhite(sigma=1e-9)], ids=repr)
+def test_paths_reprice_the_base_without_volatility(tables, valuation_date, model):
+    summary = run_monte_carlo(tables, model, n_paths=50, valuation_date=valuation_date, seed=1)["summary"]
+    np.testing.assert_allclose(summary["Mean"], summary["Base"], rtol=1e-8)
+
+
+def test_vasicek_paths_are_unbiased_against_the_analytic_curve(tables, valuation_date):
+    results = run_monte_carlo(tables, Vasicek(sigma=0.01), n_paths=5_000, valuation_date=valuation_date, seed=3)
+    eve = results["summary"].set_index("Metric").loc["EVE"]
+    assert abs(eve["Mean"] - eve["Base"]) < 4 * eve["Std Dev"] / np.sqrt(5_000)
@@ -0,0 +1,71 @@
+# tests/test_pipeline.py
+
+import pandas as pd
+
+from Analytics.Pipeline import Pipeline, Recompute, Stage
+from Analytics.PortfolioTable import PortfolioTable
+from Analytics.Prepayment import ConstantCPR
+from main import build_alm_pipeline, run_alm
+
+
+COMPARED = ["pricing", "daily_agg", "monthly_agg", "rate_shock_results", "curve_scenario_results",
+            "nii_sensitivity"]
+
+
+def _edited(tables, instrument_type, rows, factor):
+    # A copy of the book with the notionals of a few positions scaled.
+    edited = []
+    for table in tables:
+        if table.instrument_type == instrument_type:
+            columns = dict(table.columns)
+            columns["notional"] = columns["notional"].copy()
+            columns["notional"][rows] *= factor
+            table = PortfolioTable(table.instrument_type, table.ids, columns, table.categories, table.shared,
+                                   table.positions)
+        edited.append(table)
+    return edited
+
+
+def _assert_same_results(results, expected):
+    for key in COMPARED:
+        pd.testing.assert_frame_equal(results[key].reset_index(drop=True), expected[key].reset_index(drop=True),
+                                      check_exact=False, rtol=1e-9, atol=1e-6)
+
+
+def test_incremental_runs_match_fresh_runs(tables, valuation_date):
+    pipeline = build_alm_pipeline()
+    run_alm(tables, valuation_date, export_format=None, pipeline=pipeline)
+
+    edited = _edited(tables, "Mortgage", [0, 5, 9], 1.5)
+    results = run_alm(edited, valuation_date, export_format=None, pipeline=pipeline)
+    assert results["pipeline_stages"]["projection"] == "updated"
+    assert results["pipeline_stages"]["aggregates"] == "updated"
+    _assert_same_results(results, run_alm(edited, valuation_date, export_format=None))
+
+    later = valuation_date + pd.offsets.MonthEnd(3)
+    results = run_alm(edited, later, export_format=None, pipeline=pipeline)
+    _assert_same_results(results, run_alm(edited, later, export_format=None))
+
+
+def test_new_prepayment_model_is_reported_as_computed(tables, valuation_date):
+    pipeline = build_alm_pipeline()
+    run_alm(tables, valuation_date, export_format=None, pipeline=pipeline)
+
+    results = run_alm(tables, valuation_date, export_format=None, pipeline=pipeline, prepayment=ConstantCPR(0.1))
+    assert results["pipeline_stages"]["projection"] == "computed"
+    assert results["pipeline_stages"]["aggregates"] == "computed"
+    _assert_same_results(results, run_alm(tables, valuation_date, export_format=None, prepayment=ConstantCPR(0.1)))
+
+
+def test_update_raising_recompute_falls_back_to_compute():
+    def update(previous, previous_inputs, x):
+        if x < 0:
+            raise Recompute
+        return previous + x - previous_inputs[0]
+
+    pipeline = Pipeline([Stage("total", ["x"], lambda x: x * 1.0, update)])
+    assert pipeline.run({"x": 1}, {"x": 1})[1] == {"total": "computed"}
+    values, statuses = pipeline.run({"x": 3}, {"x": 3})
+    assert (values["total"], statuses["total"]) == (3.0, "updated")
+    values, statuses = pipeline.run({"x": -2}, {"x": -2})
+    assert (values["total"], statuses["total"]) == (-2.0, "computed")
@@ -0,0 +1,26 @@
+# tests/test_prepayment.py
+
+import pandas as pd
+
+from Analytics.CashflowCalculator import generate_cashflows_for_portfolio
+from Analytics.Prepayment import ConstantCPR
+from Instruments.Mortgage import Mortgage
+from main import run_alm
+
+
+def _mortgage():
+    return Mortgage("M1", 1_000_000, 0.07, "2050-01-01", "2020-01-01", 0.05)
+
+
+def test_prepayment_run_leaves_contractual_cashflows_cached(valuation_date):
+    mortgage = _mortgage()
+    price = mortgage.calculate_price(valuation_date=valuation_date)
+    scheduled = mortgage.generate_cashflows()
+
+    results = run_alm([mortgage], valuation_date, export_format=None, prepayment=ConstantCPR(0.2))
+
+    assert results["cashflows"]["M1"]["principal"].iloc[:12].sum() > scheduled["principal"].iloc[:12].sum()
+    assert mortgage.calculate_price(valuation_date=valuation_date) == price
+    pd.testing.assert_frame_equal(mortgage.cached_cashflows().reset_index(drop=True),
+                                  scheduled.reset_index(drop=True), check_dtype=False)
+    assert generate_cashflows_for_portfolio([mortgage])["M1"]["principal"].sum() == scheduled["principal"].sum()
@@ -0,0 +1,30 @@
+# tests/test_result_store.py
+
+import numpy as np
+
+from Analytics.Prepayment import ConstantCPR
+from Output.ResultStore import ResultStore, settings_digest
+from main import run_alm
+
+
+def test_runs_with_other_settings_are_stored_apart(tables, valuation_date, tmp_path):
+    store = ResultStore(str(tmp_path))
+    plain = run_alm(tables, valuation_date, export_format=None, result_store=store)
+    prepaid = run_alm(tables, valuation_date, export_format=None, result_store=store, prepayment=ConstantCPR(0.2))
+    portfolio, settings = plain["stored_run"]["portfolio"], prepaid["stored_run"]["settings"]
+
+    assert settings_digest(settings) != settings_digest() == settings_digest({"prepayment": None})
+    assert len(store.runs(portfolio=portfolio)) == 2
+    assert store.has_run(valuation_date, portfolio) and store.has_run(valuation_date, portfolio, settings)
+
+    for results, run_settings in ((plain, None), (prepaid, settings)):
+        stored = store.load_run(valuation_date, portfolio, settings=run_settings)
+        np.testing.assert_allclose(stored["rate_shock_results"]["Portfolio Market Value"],
+                                   results["rate_shock_results"]["Portfolio Market Value"])
+
+    history = store.query("rate_shock_results", ["Shock (bps)", "Portfolio Market Value"], portfolio=portfolio)
+    assert set(history["settings_digest"]) == {settings_digest(), settings_digest(settings)}
+    assert len(store.query("rate_shock_results", portfolio=portfolio, settings={})) == 5
+
+    store.delete_run(valuation_date, portfolio, settings)
+    assert list(store.runs()["settings_digest"]) == [settings_digest()]
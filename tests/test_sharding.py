@@ -0,0 +1,26 @@
+# tests/test_sharding.py
+
+import numpy as np
+import pandas as pd
+
+from Analytics.Sharding import merge_partials, write_partial
+from main import run_alm
+
+
+def test_sharded_run_matches_single_node(tables, valuation_date, tmp_path):
+    single = run_alm(tables, valuation_date, export_format=None)
+    for shard in range(3):
+        results = run_alm(tables, valuation_date, export_format=None, shard=(shard, 3))
+        write_partial(results, tmp_path, valuation_date)
+    merged = merge_partials([tmp_path])
+
+    pd.testing.assert_frame_equal(merged["pricing"], single["pricing"], rtol=1e-9)
+    for key in ("rate_shock_results", "curve_scenario_results", "nii_sensitivity"):
+        np.testing.assert_allclose(merged[key].select_dtypes("number").to_numpy(),
+                                   single[key].select_dtypes("number").to_numpy(), rtol=1e-9)
+    keys = ["payment_date", "instrument_type"]
+    daily = merged["daily_agg"].sort_values(keys, ignore_index=True)
+    expected = single["daily_agg"].sort_values(keys, ignore_index=True)
+    assert (daily[keys].astype(str) == expected[keys].astype(str)).all().all()
+    np.testing.assert_allclose(daily[["interest", "principal"]].to_numpy(),
+                               expected[["interest", "principal"]].to_numpy(), rtol=1e-9, atol=1e-6)
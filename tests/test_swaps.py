@@ -0,0 +1,38 @@
+# tests/test_swaps.py
+
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from Analytics.YieldCurveBuilder import build_zero_forward_curve
+from Instruments.InterestRateSwap import InterestRateSwap
+from main import run_alm
+
+
+def _swap():
+    zero_curve, forward_curve = build_zero_forward_curve()
+    return InterestRateSwap("S1", 10_000_000, 0.065, 0.001, "2020-03-15", "2030-03-15", 0.06,
+                            pay_fixed=True, frequency=4, zero_curve=zero_curve, forward_curve=forward_curve)
+
+
+def test_run_cashflows_project_swaps_from_the_valuation_date():
+    swap = _swap()
+    for valuation_date in (pd.Timestamp("2022-06-30"), pd.Timestamp("2025-03-31")):
+        results = run_alm([swap], valuation_date, export_format=None)
+        df = results["cashflows"]["S1"]
+        expected = swap.generate_cashflows(valuation_date)
+        assert list(df.columns[-2:]) == ["interest", "principal"]
+        np.testing.assert_array_equal(df["payment_date"].to_numpy(), expected["payment_date"].to_numpy())
+        np.testing.assert_allclose(df["interest"].to_numpy(), expected["net_cashflow"].to_numpy(), rtol=1e-12)
+        assert (df["principal"] == 0).all()
+
+
+def test_dataframe_curve_token_is_the_same_in_every_process():
+    script = ("import pandas as pd; from Instruments.InterestRateSwap import InterestRateSwap; "
+              "curve = pd.DataFrame({'Months': [1, 12, 120], 'Zero Rate': [0.05, 0.055, 0.06], "
+              "'Forward Rate': [0.05, 0.056, 0.062]}); print(InterestRateSwap._curve_token(curve))")
+    tokens = {subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                             env={"PYTHONHASHSEED": seed, "PYTHONPATH": "."}).stdout for seed in ("1", "2")}
+    assert len(tokens) == 1